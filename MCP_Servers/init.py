@@ -1,10 +1,21 @@
 import os
 import sys
 import json
-from supabase import create_client, Client
+import asyncio
+import argparse
 from pathlib import Path
 from dotenv import load_dotenv
 
+try:
+    from supabase import create_client, Client
+except ImportError:  # a carga em volume com --sqlite não precisa do cliente
+    create_client, Client = None, None
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.manifests import PROTOCOL_RULES, ManifestValidationEngine, iter_sources, load_schema
+from services.manifest_loader import BulkManifestLoader, Checkpoint, PostgRESTManifestTable, SQLiteManifestTable
+
 def load_env():
     """Carrega variáveis de ambiente do .env"""
     env_path = Path(__file__).parent / '.env'
@@ -80,7 +91,57 @@ def create_default_manifest(path: Path):
     with open(path, 'w') as f:
         json.dump(default_manifest, f, indent=2)
 
+async def bulk_register(args) -> bool:
+    """Carrega em volume os manifestos de args.paths; retorna se tudo entrou"""
+    if args.sqlite:
+        table = SQLiteManifestTable(args.sqlite)
+    else:
+        load_env()
+        url, key = os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_KEY')
+        if not url or not key:
+            print("❌ SUPABASE_URL e SUPABASE_KEY são obrigatórios no .env")
+            sys.exit(1)
+        table = PostgRESTManifestTable(url, key, os.getenv('MANIFEST_TABLE', 'mcp_manifests'), args.concurrency)
+
+    with ManifestValidationEngine(load_schema(extra=PROTOCOL_RULES), workers=args.workers) as engine:
+        loader = BulkManifestLoader(
+            table, engine, batch_size=args.batch_size, concurrency=args.concurrency,
+            checkpoint=Checkpoint(args.checkpoint)
+        )
+        try:
+            report = await loader.load(iter_sources(args.paths))
+        finally:
+            await table.close()
+
+    for verdict in report.invalid:
+        print(f"❌ {verdict.source}: {'; '.join(verdict.errors)}")
+    for number, error in report.failed:
+        print(f"❌ Lote {number} não foi gravado: {error}")
+    print(f"✅ {report.inserted} manifesto(s) inserido(s), {report.unchanged} já existia(m), "
+          f"{report.resumed} pulado(s) pelo checkpoint, {len(report.invalid)} inválido(s)")
+    if report.failed:
+        print("⚠️ Execute de novo com o mesmo --checkpoint para retomar os lotes que falharam")
+    return not report.failed and not report.invalid
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Setup do MCP Server e registro de manifestos")
+    parser.add_argument('--bulk', nargs='+', dest='paths', metavar='PATH',
+                        help="Carga em volume: diretórios, .ndjson/.jsonl ou - (não executa o schema.sql)")
+    parser.add_argument('--batch-size', type=int, default=500, help="Linhas por insert")
+    parser.add_argument('--concurrency', type=int, default=4, help="Lotes enviados ao mesmo tempo")
+    parser.add_argument('--workers', type=int, default=0, help="Processos de validação")
+    parser.add_argument('--checkpoint', help="Arquivo com os hashes já gravados, para retomar a carga")
+    parser.add_argument('--sqlite', help="Grava numa tabela mcp_manifests local (SQLite) em vez do Supabase")
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+    if args.paths:
+        print("🚀 Carga em volume de manifestos...")
+        sys.exit(0 if asyncio.run(bulk_register(args)) else 1)
+
     print("🚀 Iniciando setup do MCP Server...")
     
     # Carrega variáveis de ambiente
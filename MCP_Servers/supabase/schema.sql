@@ -10,10 +10,14 @@ CREATE TABLE IF NOT EXISTS mcp_manifests (
     id UUID DEFAULT uuid_generate_v4() PRIMARY KEY,
     manifest JSONB NOT NULL,
     version VARCHAR(50) NOT NULL,
+    content_hash TEXT,
     created_at TIMESTAMPTZ DEFAULT NOW(),
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Hash SHA-256 do manifesto canônico: chave do upsert da carga em volume (init.py --bulk)
+ALTER TABLE mcp_manifests ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
 -- Tabela de transações
 CREATE TABLE IF NOT EXISTS mcp_transactions (
     id UUID DEFAULT uuid_generate_v4() PRIMARY KEY,
@@ -60,6 +64,7 @@ CREATE TRIGGER update_mcp_manifests_updated_at
 
 -- Índices para melhor performance
 CREATE INDEX IF NOT EXISTS idx_manifests_version ON mcp_manifests(version);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_manifests_content_hash ON mcp_manifests(content_hash);
 CREATE INDEX IF NOT EXISTS idx_transactions_status ON mcp_transactions(status);
 CREATE INDEX IF NOT EXISTS idx_semantic_cache_expires ON semantic_cache(expires_at);
 CREATE INDEX IF NOT EXISTS idx_cache_metrics_timestamp ON cache_metrics(timestamp);
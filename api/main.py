@@ -1,18 +1,46 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
-from google.protobuf import timestamp_pb2
+from typing import Any, Dict, List, Optional
+from enum import Enum
+import hmac
 import json
-import csv
 import logging
+import asyncio
+import os
+import time
 from datetime import datetime
-
-# Configuração do logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
+from itertools import islice
+from services.catalog import CatalogStore
+from services.embeddings import LazyEmbedder
+from services import intent_codec
+from services.fast_json import TrustedJSONResponse, dumps
+from services.parallel_search import ParallelSearch
+from services.query_cache import QueryCache, SQLiteSemanticCache
+from services.precomputed import PrecomputedResponse, parse_quality
+from services.rate_limit import (
+    ANY_TARGET, IP, RateLimiter, RateLimitMiddleware, RateLimitRule, SQLiteRateLimitBackend,
+    format_duration, parse_duration
 )
+from services.proto_loader import load_generated
+from services.log import SampledLogger, configure_logging
+from services.metrics import REGISTRY as METRICS, MetricsMiddleware
+from services.registry import RegistryService
+from services.registry_store import RegistryStore, catalog_row
+from services.intent_codec import IntentDecodeError
+from services.startup import FirstRequestMiddleware, StartupProfile
+from models.intent import Intent, IntentResponse
+
+# Fases do startup desde o início do processo; STARTUP_PROFILE=arquivo.json
+# grava o relatório (com o tempo até a primeira resposta) nesse arquivo
+startup_profile = StartupProfile(os.getenv('STARTUP_PROFILE') or None)
+
+# Configuração do logging (LOG_LEVEL, LOG_FORMAT=text|json). As linhas de
+# cada busca são amostradas: uma a cada SEARCH_LOG_SAMPLE_EVERY
+configure_logging(os.getenv('LOG_LEVEL', 'info'), os.getenv('LOG_FORMAT', 'text'))
+search_log = SampledLogger(logging.getLogger('api.search'), int(os.getenv('SEARCH_LOG_SAMPLE_EVERY', '100')))
 
 app = FastAPI(
     title="ProtoAi MCP API",
@@ -20,6 +48,92 @@ app = FastAPI(
     version="1.0.0"
 )
 
+CATALOG_PATH = os.getenv('CATALOG_PATH', 'api/repositories.csv')
+CATALOG_RELOAD_INTERVAL = float(os.getenv('CATALOG_RELOAD_INTERVAL', '5'))
+# CATALOG_FORMAT=columnar compila o CSV num arquivo colunar (CATALOG_COMPILED_PATH)
+# lido via mmap: os workers compartilham o page cache e sobem sem reprocessar o CSV
+CATALOG_FORMAT = os.getenv('CATALOG_FORMAT', 'csv')
+CATALOG_COMPILED_PATH = os.getenv('CATALOG_COMPILED_PATH', os.path.splitext(CATALOG_PATH)[0] + '.pcat')
+# Busca semântica (mode=semantic|hybrid): EMBEDDING_MODEL=hashing (sem modelo,
+# EMBEDDING_DIM posições) ou o nome/caminho de um modelo sentence-transformers
+# local; vazio desativa. HYBRID_ALPHA é o peso do cosseno no modo hybrid
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'hashing')
+HYBRID_ALPHA = float(os.getenv('HYBRID_ALPHA', '0.5'))
+# Aquecimento antes de aceitar tráfego (lista separada por vírgulas): readme
+# (respostas do manifesto, carrega o protobuf), semantic (embeddings a cada
+# carga do catálogo), http (cliente do RegistryService, com o contexto TLS),
+# ranking (BM25 do catálogo colunar), fuzzy (vocabulário da busca aproximada)
+# e openapi (schema da /docs). O que ficar de fora é montado no primeiro uso
+WARMUP = [step.strip() for step in os.getenv('WARMUP', 'readme,semantic,http').split(',') if step.strip()]
+embedder = LazyEmbedder(EMBEDDING_MODEL, int(os.getenv('EMBEDDING_DIM', '256'))) if EMBEDDING_MODEL else None
+catalog_store = CatalogStore(
+    CATALOG_PATH, CATALOG_COMPILED_PATH if CATALOG_FORMAT == 'columnar' else None, embedder=embedder,
+    embed_on_load='semantic' in WARMUP
+)
+MAX_PAGE_SIZE = 1000
+DEFAULT_TOP_K = 10
+
+# Buscas por substring que precisam varrer mais de SEARCH_INLINE_BYTES de texto
+# (catálogo colunar) saem do event loop: com SEARCH_WORKERS > 0, rodam em
+# shards de SEARCH_SHARD_ROWS linhas num pool de processos; sem ele, numa thread
+parallel_search = ParallelSearch(
+    workers=int(os.getenv('SEARCH_WORKERS', '0')),
+    shard_rows=int(os.getenv('SEARCH_SHARD_ROWS', str(1 << 17))),
+    inline_bytes=int(os.getenv('SEARCH_INLINE_BYTES', str(8 << 20)))
+)
+
+# Saída confiável: as rotas de leitura montam dicts já no formato do
+# response_model e os codificam direto (orjson), sem revalidar. Com
+# TRUSTED_OUTPUT=0 as respostas voltam a passar pelos modelos Pydantic
+TRUSTED_OUTPUT = os.getenv('TRUSTED_OUTPUT', '1') != '0'
+
+# Cache de consultas do /search; SEMANTIC_CACHE_DB ativa o write-through local
+query_cache = QueryCache(
+    max_entries=int(os.getenv('CACHE_MAX_SIZE', '1000')),
+    max_bytes=int(os.getenv('CACHE_MAX_BYTES', str(64 * 1024 * 1024))),
+    ttl=float(os.getenv('CACHE_TTL', '3600')),
+    backend=SQLiteSemanticCache(os.environ['SEMANTIC_CACHE_DB']) if os.getenv('SEMANTIC_CACHE_DB') else None
+)
+catalog_store.listeners.append(query_cache.clear)
+
+MAX_INTENT_BATCH = 1000
+MAX_REGISTRY_PAGE_SIZE = 1000
+
+# Serviços registrados em tempo de execução entram no /search sem recarregar o CSV
+registry_store = RegistryStore(os.getenv('REGISTRY_DATA_DIR', 'api/registry_data'))
+registry_store.listeners.append(
+    lambda added, removed: catalog_store.apply_registrations(
+        {record.service_id: catalog_row(record.manifest) for record in added}, removed
+    )
+)
+registry = RegistryService(os.getenv('MCP_URL', 'http://localhost:8000'), store=registry_store)
+
+# ProtoAiRegistry via gRPC no mesmo processo (o servidor Go usa a 50051); vazio desativa.
+# O servidor não usa TLS: por padrão só escuta em localhost
+GRPC_ADDRESS = os.getenv('GRPC_ADDRESS', '127.0.0.1:50052')
+# Registro e remoção de serviços (REST e gRPC) exigem "Authorization: Bearer <REGISTRY_ADMIN_TOKEN>"; vazio desativa
+REGISTRY_ADMIN_TOKEN = os.getenv('REGISTRY_ADMIN_TOKEN', '')
+
+# Limites de taxa (proto/protoai/v1/rate_limit.proto). RATE_LIMIT_DB compartilha
+# buckets e configurações entre workers; RATE_LIMIT_MAX_REQUESTS cria o limite padrão por IP
+rate_limiter = RateLimiter(
+    backend=SQLiteRateLimitBackend(os.environ['RATE_LIMIT_DB']) if os.getenv('RATE_LIMIT_DB') else None
+)
+if os.getenv('RATE_LIMIT_MAX_REQUESTS'):
+    rate_limiter.update(RateLimitRule(
+        id='default-ip',
+        type=IP,
+        target_id=ANY_TARGET,
+        requests_per_unit=int(os.environ['RATE_LIMIT_MAX_REQUESTS']),
+        time_unit=parse_duration(os.getenv('RATE_LIMIT_WINDOW', '15m'))
+    ))
+# PUT /ratelimit/config exige "Authorization: Bearer <RATE_LIMIT_ADMIN_TOKEN>"; vazio desativa
+RATE_LIMIT_ADMIN_TOKEN = os.getenv('RATE_LIMIT_ADMIN_TOKEN', '')
+# Adicionado antes do CORS para que as respostas 429 também levem os headers de CORS.
+# O /ratelimit/check fica de fora para que um limite estourado ainda possa ser
+# consultado; o /ratelimit/config passa pelo limite como qualquer rota
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter, exempt_paths=("/ratelimit/check",))
+
 # Configuração do CORS
 app.add_middleware(
     CORSMiddleware,
@@ -29,6 +143,24 @@ app.add_middleware(
     allow_headers=["*"],  # Permite todos os headers
 )
 
+# Por último: o mais externo, para contar também as respostas 429 e de CORS
+app.add_middleware(MetricsMiddleware)
+if startup_profile.path:
+    app.add_middleware(FirstRequestMiddleware, profile=startup_profile)
+
+# Etapas do /search: parse (parâmetros, cursor e chave do cache), filter
+# (cache ou índices) e serialize (montagem da resposta)
+SEARCH_STAGE = METRICS.histogram('protoai_search_stage_seconds', 'Tempo de cada etapa do /search', ('stage',))
+SEARCH_PARSE = SEARCH_STAGE.labels('parse')
+SEARCH_FILTER = SEARCH_STAGE.labels('filter')
+SEARCH_SERIALIZE = SEARCH_STAGE.labels('serialize')
+METRICS.gauge('protoai_catalog_rows', 'Linhas no snapshot atual do catálogo', lambda: len(catalog_store.snapshot))
+METRICS.gauge('protoai_catalog_version', 'Versão do snapshot do catálogo', lambda: catalog_store.version)
+METRICS.gauge('protoai_query_cache_entries', 'Entradas no cache do /search', lambda: len(query_cache.entries))
+METRICS.gauge('protoai_query_cache_bytes', 'Bytes ocupados pelo cache do /search', lambda: query_cache.bytes)
+METRICS.gauge('protoai_registered_services', 'Serviços no registro embutido', lambda: len(registry_store))
+METRICS.gauge('protoai_startup_seconds', 'Do início do processo até aceitar requisições', lambda: startup_profile.ready or 0)
+
 # Modelos Pydantic que refletem a estrutura do README.protobuf
 class ProjectInfo(BaseModel):
     name: str
@@ -81,55 +213,104 @@ class ReadmeProto(BaseModel):
     update_policy: UpdatePolicy
     compliance_ref: ComplianceReference
 
-@app.get("/protoai/readme.protobuf", response_model=ReadmeProto)
-async def get_readme_protobuf():
-    # Exemplo de dados do manifesto
-    return {
-        "project_info": {
-            "name": "ProtoAi MCP",
-            "version": "1.0.0",
-            "description": "Sistema de Manifesto e Descoberta para APIs",
-            "repository": "https://github.com/user/protoai-mcp",
-            "tags": ["api", "discovery", "semantic-manifest"],
-            "owner": "ProtoAi Team",
-            "license": "MIT"
-        },
-        "communication_details": {
-            "access_interfaces": [
-                {
-                    "type": 2,  # REST_HTTP
-                    "base_url_or_address": "http://localhost:8000",
-                    "description": "REST API principal",
-                    "spec_url": "http://localhost:8000/docs",
-                    "available_methods_or_operations": ["/protoai/readme.protobuf", "/search"],
-                    "available_events": [],
-                    "data_formats": ["json"],
-                    "preferred_protocol_version": "HTTP/1.1"
-                }
-            ],
-            "default_data_formats": ["json", "protobuf"]
-        },
-        "security_info": {
-            "encryption_required": True,
-            "auth_reference": "./auth.proto",
-            "permissions_reference": "./permissions.proto",
-            "ignore_reference": "./ignore.proto",
-            "high_level_security_policies": ["JWT Bearer Token Required"]
-        },
-        "documentation": {
-            "human_readme_link": "https://github.com/user/protoai-mcp/README.md",
-            "api_reference_link": "http://localhost:8000/docs",
-            "contact_email": "contact@protoai.example.com"
-        },
-        "update_policy": {
-            "versioning_scheme": "semantic",
-            "changelog_link": "https://github.com/user/protoai-mcp/CHANGELOG.md",
-            "update_check_endpoint": "/version"
-        },
-        "compliance_ref": {
-            "compliance_proto_reference": "./compliance.proto"
-        }
+# Dados do manifesto: não mudam durante a execução, então são validados,
+# serializados e comprimidos uma única vez no startup
+README_MANIFEST = {
+    "project_info": {
+        "name": "ProtoAi MCP",
+        "version": "1.0.0",
+        "description": "Sistema de Manifesto e Descoberta para APIs",
+        "repository": "https://github.com/user/protoai-mcp",
+        "tags": ["api", "discovery", "semantic-manifest"],
+        "owner": "ProtoAi Team",
+        "license": "MIT"
+    },
+    "communication_details": {
+        "access_interfaces": [
+            {
+                "type": 2,  # REST_HTTP
+                "base_url_or_address": "http://localhost:8000",
+                "description": "REST API principal",
+                "spec_url": "http://localhost:8000/docs",
+                "available_methods_or_operations": ["/protoai/readme.protobuf", "/search"],
+                "available_events": [],
+                "data_formats": ["json"],
+                "preferred_protocol_version": "HTTP/1.1"
+            }
+        ],
+        "default_data_formats": ["json", "protobuf"]
+    },
+    "security_info": {
+        "encryption_required": True,
+        "auth_reference": "./auth.proto",
+        "permissions_reference": "./permissions.proto",
+        "ignore_reference": "./ignore.proto",
+        "high_level_security_policies": ["JWT Bearer Token Required"]
+    },
+    "documentation": {
+        "human_readme_link": "https://github.com/user/protoai-mcp/README.md",
+        "api_reference_link": "http://localhost:8000/docs",
+        "contact_email": "contact@protoai.example.com"
+    },
+    "update_policy": {
+        "versioning_scheme": "semantic",
+        "changelog_link": "https://github.com/user/protoai-mcp/CHANGELOG.md",
+        "update_check_endpoint": "/version"
+    },
+    "compliance_ref": {
+        "compliance_proto_reference": "./compliance.proto"
     }
+}
+
+PROTOBUF_MEDIA_TYPES = ("application/x-protobuf", "application/protobuf")
+readme_responses = {}
+
+def encode_readme_protobuf(manifest: dict) -> Optional[bytes]:
+    """Codifica o manifesto na mensagem protoai.v1.ReadmeProto de readme.proto.
+
+    A mensagem protobuf tem menos campos que o modelo JSON; a licença vai em
+    licensing_info. Retorna None se o código protobuf não foi gerado.
+    """
+    readme_pb2 = load_generated("protoai.v1.readme_pb2")
+    if readme_pb2 is None:
+        return None
+    # Importado aqui: o runtime do protobuf só carrega quando o manifesto é montado
+    from google.protobuf import json_format
+
+    message = json_format.ParseDict(manifest, readme_pb2.ReadmeProto(), ignore_unknown_fields=True)
+    message.licensing_info.license_type = manifest["project_info"]["license"]
+    return message.SerializeToString()
+
+def build_readme_responses():
+    manifest = ReadmeProto(**README_MANIFEST)
+    body = json.dumps(
+        jsonable_encoder(manifest), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+    readme_responses["json"] = PrecomputedResponse(body, "application/json")
+    protobuf_body = encode_readme_protobuf(README_MANIFEST)
+    if protobuf_body is not None:
+        readme_responses["protobuf"] = PrecomputedResponse(protobuf_body, PROTOBUF_MEDIA_TYPES[0])
+
+def prefers_protobuf(request: Request) -> bool:
+    """O Accept pede protobuf com qualidade maior ou igual à do JSON"""
+    accepted = parse_quality(request.headers.get("accept", ""))
+    wants_protobuf = any(accepted.get(media_type, 0) > 0 for media_type in PROTOBUF_MEDIA_TYPES)
+    return wants_protobuf and accepted.get("application/json", 0) <= max(accepted.get(m, 0) for m in PROTOBUF_MEDIA_TYPES)
+
+@app.get(
+    "/protoai/readme.protobuf",
+    response_model=ReadmeProto,
+    responses={200: {"content": {PROTOBUF_MEDIA_TYPES[0]: {}}}, 304: {"description": "Não modificado"}}
+)
+async def get_readme_protobuf(request: Request):
+    """Manifesto em JSON ou, com `Accept: application/x-protobuf`, em protobuf binário"""
+    if not readme_responses:
+        build_readme_responses()
+    if prefers_protobuf(request):
+        if "protobuf" not in readme_responses:
+            raise HTTPException(status_code=406, detail="Representação protobuf indisponível")
+        return readme_responses["protobuf"].respond(request)
+    return readme_responses["json"].respond(request)
 
 class SearchQuery(BaseModel):
     query: Optional[str] = None
@@ -150,56 +331,443 @@ class SearchResponse(BaseModel):
     results: List[SearchResult]
     total_count: int
     query_timestamp: str
+    next_cursor: Optional[str] = None
+
+@app.on_event("startup")
+async def load_catalog():
+    """Carrega o catálogo antes de aceitar requisições e inicia o watcher do CSV"""
+    try:
+        catalog_store.refresh()
+    except FileNotFoundError:
+        logging.error("Catálogo não encontrado em %s", CATALOG_PATH)
+    startup_profile.mark('catalog')
+    app.state.catalog_watcher = asyncio.create_task(catalog_store.watch(CATALOG_RELOAD_INTERVAL))
+
+@app.on_event("startup")
+async def start_parallel_search():
+    await parallel_search.start()
+
+@app.on_event("shutdown")
+async def stop_parallel_search():
+    parallel_search.shutdown()
+
+@app.on_event("shutdown")
+async def stop_catalog_watcher():
+    app.state.catalog_watcher.cancel()
+    query_cache.flush()
+
+@app.on_event("startup")
+async def start_registry():
+    registry_store.open()
+    catalog_store.apply_registrations(
+        {record.service_id: catalog_row(record.manifest) for record in registry_store.search()}
+    )
+
+@app.on_event("startup")
+async def start_grpc():
+    app.state.grpc_server = None
+    if GRPC_ADDRESS:
+        # Importado aqui: sem GRPC_ADDRESS o grpc nem é carregado
+        from services.grpc_server import start_grpc_server
+        app.state.grpc_server = await start_grpc_server(
+            catalog_store, registry_store, GRPC_ADDRESS, admin_token=REGISTRY_ADMIN_TOKEN
+        )
+
+WARMUP_STEPS = {
+    'readme': build_readme_responses,
+    'semantic': lambda: catalog_store.ensure_embeddings(catalog_store.snapshot) if embedder else None,
+    'http': registry.startup,
+    'ranking': lambda: catalog_store.snapshot.prepare(),
+    'fuzzy': lambda: catalog_store.snapshot.fuzzy_vocabulary(),
+    'openapi': app.openapi,
+}
+
+@app.on_event("startup")
+async def warm_up():
+    """Último passo do startup: monta o que está em WARMUP antes da primeira requisição"""
+    startup_profile.mark('startup')
+    for step in WARMUP:
+        if step not in WARMUP_STEPS:
+            logging.warning("Etapa de WARMUP desconhecida: %s", step)
+            continue
+        with startup_profile.phase(f'warmup:{step}'):
+            result = WARMUP_STEPS[step]()
+            if asyncio.iscoroutine(result):
+                await result
+    startup_profile.mark_ready()
+
+@app.on_event("shutdown")
+async def stop_grpc():
+    if app.state.grpc_server is not None:
+        await app.state.grpc_server.stop(grace=5)
+
+@app.on_event("shutdown")
+async def stop_registry():
+    await registry.shutdown()
+    registry_store.close()
+
+@app.get("/cache/metrics")
+async def cache_metrics():
+    """Acertos, faltas e latência do cache do /search (formato de cache_metrics)"""
+    return query_cache.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Métricas no formato de texto do Prometheus"""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/catalog/status")
+async def catalog_status():
+    """Versão do snapshot do catálogo em uso e horário da última reconstrução"""
+    return catalog_store.status()
+
+def respond(model, content: Dict[str, Any]):
+    """Resposta da rota a partir de `content`, que já tem o formato de `model`"""
+    if TRUSTED_OUTPUT:
+        return TrustedJSONResponse(content)
+    return model(**content)
+
+def stream_results(catalog, ids, limit: Optional[int], cursor_after):
+    """Gera os resultados em NDJSON à medida que são encontrados"""
+    last = None
+    for count, idx in enumerate(ids):
+        if limit is not None and count == limit:
+            yield dumps({"next_cursor": catalog.encode_cursor(cursor_after(last, count))}) + b"\n"
+            return
+        last = idx
+        yield dumps(catalog.result(idx)) + b"\n"
 
 @app.get("/search", response_model=SearchResponse)
 async def search_repositories(
     q: Optional[str] = Query(None, description="Termo de busca geral"),
     tags: Optional[str] = Query(None, description="Tags separadas por vírgula"),
     owner: Optional[str] = Query(None, description="Nome do proprietário"),
-    license: Optional[str] = Query(None, description="Tipo de licença")
+    license: Optional[str] = Query(None, description="Tipo de licença"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Máximo de resultados por página (page_size)"),
+    cursor: Optional[str] = Query(None, description="Cursor next_cursor da página anterior (page_token)"),
+    stream: bool = Query(False, description="Retorna os resultados em NDJSON, um por linha"),
+    sort: Optional[str] = Query(None, regex="^relevance$", description="relevance ordena por BM25 sobre nome e descrição"),
+    fuzzy: bool = Query(False, description="Tolera erros de digitação e inclui sinônimos nas tags e no q"),
+    mode: Optional[str] = Query(
+        None, regex="^(lexical|semantic|hybrid)$",
+        description="semantic ordena o q por embeddings; hybrid combina embeddings e BM25"
+    )
 ):
-    logging.info(f"Busca iniciada - query: {q}, tags: {tags}, owner: {owner}, license: {license}")
-    
-    results = []
-    with open('api/repositories.csv', 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            # Converte a string de tags em lista
-            row_tags = [tag.strip() for tag in row['tags'].strip('"').split(',')]
-            
-            # Aplica os filtros
-            matches = True
-            if q and not (q.lower() in row['name'].lower() or q.lower() in row['description'].lower()):
-                matches = False
-            if tags:
-                search_tags = [tag.strip() for tag in tags.split(',')]
-                if not any(tag in row_tags for tag in search_tags):
-                    matches = False
-            if owner and owner.lower() not in row['owner'].lower():
-                matches = False
-            if license and license.lower() not in row['license'].lower():
-                matches = False
-                
-            if matches:
-                results.append(SearchResult(
-                    name=row['name'],
-                    description=row['description'],
-                    url=row['url'],
-                    tags=row_tags,
-                    owner=row['owner'],
-                    license=row['license'],
-                    version=row['version']
-                ))
+    started = time.perf_counter()
+    search_log.info(
+        "Busca iniciada - query: %s, tags: %s, owner: %s, license: %s", q, tags, owner, license
+    )
     
-    response = SearchResponse(
-        results=results,
-        total_count=len(results),
-        query_timestamp=datetime.now().isoformat()
+    catalog = catalog_store.snapshot
+    after = -1
+    if cursor:
+        try:
+            after = catalog.decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    search_tags = [tag.strip() for tag in tags.split(',')] if tags else None
+    queries = [q]
+    if fuzzy:
+        if not catalog.fuzzy_ready:
+            # O vocabulário é montado na primeira busca aproximada, fora do event loop
+            await asyncio.get_running_loop().run_in_executor(None, catalog.fuzzy_vocabulary)
+        queries, search_tags = catalog.fuzzy_vocabulary().expand(q, search_tags)
+    semantic = mode in ("semantic", "hybrid") and bool(q)
+    if semantic and not catalog.semantic_ready:
+        if embedder is None:
+            raise HTTPException(status_code=400, detail="Busca semântica desativada (EMBEDDING_MODEL)")
+        # Sem o aquecimento "semantic", os embeddings do snapshot saem na primeira busca semântica
+        catalog = await asyncio.get_running_loop().run_in_executor(None, catalog_store.ensure_embeddings, catalog)
+    relevance = (sort == "relevance" or semantic) and bool(q)
+    if relevance:
+        # Só os melhores N são materializados; o cursor guarda a posição no ranking
+        size = limit if limit is not None else DEFAULT_TOP_K
+        cursor_after = lambda last, count: after + count
+    else:
+        cursor_after = lambda last, count: last
+
+    def matching_ids():
+        if relevance:
+            text, top = " ".join(queries), after + 2 + size
+            if mode == "semantic":
+                ranked = catalog.semantic_search(text, tags=search_tags, owner=owner, license=license, k=top)
+            elif mode == "hybrid":
+                ranked = catalog.hybrid_search(
+                    text, tags=search_tags, owner=owner, license=license, k=top, alpha=HYBRID_ALPHA
+                )
+            else:
+                ranked = catalog.ranked_search(text, tags=search_tags, owner=owner, license=license, k=top)
+            return iter(ranked[after + 1:])
+        return catalog.iter_search_any(queries, tags=search_tags, owner=owner, license=license, after=after)
+
+    def take(ids):
+        return list(islice(ids, limit + 1)) if limit is not None else list(ids)
+
+    if stream:
+        # No modo streaming a última linha traz o next_cursor quando há mais páginas
+        return StreamingResponse(
+            stream_results(catalog, matching_ids(), limit, cursor_after),
+            media_type="application/x-ndjson"
+        )
+
+    cache_key = query_cache.key(
+        catalog.fingerprint, q=q, tags=search_tags, owner=owner, license=license,
+        sort=sort if relevance else None, limit=limit, after=after, fuzzy=fuzzy,
+        mode=mode if semantic else None
     )
+    parsed = time.perf_counter()
+    SEARCH_PARSE.observe(parsed - started)
+    page = await query_cache.get_async(cache_key)
+    cache_hit = page is not None
+    if not cache_hit:
+        heavy = not relevance and parallel_search.is_heavy(catalog, q, after)
+        if heavy and len(queries) == 1:
+            page = await parallel_search.search(
+                catalog, q=q, tags=search_tags, owner=owner, license=license, after=after,
+                limit=limit + 1 if limit is not None else None
+            )
+        elif heavy or semantic or (relevance and not catalog.ranking_ready):
+            # Variantes de um q caro, o embedding do q e a busca nos vetores,
+            # ou a primeira busca por relevância no catálogo colunar (que
+            # monta o BM25) rodam fora do event loop
+            page = await asyncio.get_running_loop().run_in_executor(None, lambda: take(matching_ids()))
+        else:
+            page = take(matching_ids())
+        await query_cache.put_async(cache_key, page)
+    filtered = time.perf_counter()
+    SEARCH_FILTER.observe(filtered - parsed)
+    query_cache.record(cache_key, cache_hit, (filtered - parsed) * 1000)
+
+    next_cursor = None
+    if limit is not None and len(page) > limit:
+        page = page[:limit]
+        next_cursor = catalog.encode_cursor(cursor_after(page[-1], limit))
+    response = respond(SearchResponse, {
+        "results": [catalog.result(idx) for idx in page],
+        "total_count": len(page),
+        "query_timestamp": datetime.now().isoformat(),
+        "next_cursor": next_cursor
+    })
+    SEARCH_SERIALIZE.observe(time.perf_counter() - filtered)
     
-    logging.info(f"Busca concluída - {len(results)} resultados encontrados")
+    search_log.info("Busca concluída - %d resultados encontrados", len(page))
     return response
 
+# Credenciais de administrador (Bearer) das rotas de escrita
+def require_admin_token(authorization: Optional[str], expected: str, disabled: str):
+    if not expected:
+        raise HTTPException(status_code=403, detail=disabled)
+    scheme, _, token = (authorization or '').partition(' ')
+    if scheme.lower() != 'bearer' or not hmac.compare_digest(token.strip().encode(), expected.encode()):
+        raise HTTPException(status_code=401, detail="Credencial de administrador inválida",
+                            headers={"WWW-Authenticate": "Bearer"})
+
+def require_rate_limit_admin(authorization: Optional[str]):
+    require_admin_token(authorization, RATE_LIMIT_ADMIN_TOKEN,
+                        "Configuração de limites desativada (RATE_LIMIT_ADMIN_TOKEN)")
+
+def require_registry_admin(authorization: Optional[str] = Header(None)):
+    require_admin_token(authorization, REGISTRY_ADMIN_TOKEN,
+                        "Registro de serviços desativado (REGISTRY_ADMIN_TOKEN)")
+
+# Modelos do serviço ProtoAiRegistry (proto/protoai/registry/v1/registry.proto)
+class RegisterServiceRequest(BaseModel):
+    service_manifest: ReadmeProto
+
+class RegisterServiceResponse(BaseModel):
+    service_id: str
+    registration_time: str
+
+class UnregisterServiceResponse(BaseModel):
+    success: bool
+
+class GetServiceResponse(BaseModel):
+    service_id: str
+    service_manifest: Dict[str, Any]
+    last_updated: str
+
+class ListServicesResponse(BaseModel):
+    services: List[Dict[str, Any]]
+    next_page_token: Optional[str] = None
+
+class SearchServicesRequest(BaseModel):
+    tags: Optional[List[str]] = None
+    name_pattern: Optional[str] = None
+    description_pattern: Optional[str] = None
+
+class SearchServicesResponse(BaseModel):
+    matching_services: List[Dict[str, Any]]
+
+# Dependência das rotas de escrita: a credencial é conferida antes da validação do corpo
+@app.post("/registry/services", response_model=RegisterServiceResponse,
+          dependencies=[Depends(require_registry_admin)])
+async def register_service(request: RegisterServiceRequest):
+    """Registra o manifesto; o serviço já aparece no /search quando a resposta chega"""
+    try:
+        record = await registry_store.register(jsonable_encoder(request.service_manifest))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return RegisterServiceResponse(service_id=record.service_id, registration_time=record.registered_at)
+
+@app.delete("/registry/services/{service_id}", response_model=UnregisterServiceResponse,
+            dependencies=[Depends(require_registry_admin)])
+async def unregister_service(service_id: str):
+    return UnregisterServiceResponse(success=await registry_store.unregister(service_id))
+
+@app.get("/registry/services/{service_id}", response_model=GetServiceResponse)
+async def get_service(service_id: str):
+    record = registry_store.get(service_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Serviço não encontrado")
+    return respond(GetServiceResponse, {
+        "service_id": record.service_id, "service_manifest": record.manifest, "last_updated": record.updated_at
+    })
+
+@app.get("/registry/services", response_model=ListServicesResponse)
+async def list_services(
+    page_size: int = Query(100, ge=1, le=MAX_REGISTRY_PAGE_SIZE),
+    page_token: Optional[str] = Query(None, regex="^[0-9]+$")
+):
+    records, next_page_token = registry_store.list(page_size, page_token)
+    return respond(ListServicesResponse, {
+        "services": [record.manifest for record in records], "next_page_token": next_page_token
+    })
+
+@app.post("/registry/services/search", response_model=SearchServicesResponse)
+async def search_services(request: SearchServicesRequest):
+    records = registry_store.search(request.tags, request.name_pattern, request.description_pattern)
+    return respond(SearchServicesResponse, {"matching_services": [record.manifest for record in records]})
+
+# Modelos do RateLimitService (proto/protoai/v1/rate_limit.proto)
+class RateLimitType(str, Enum):
+    USER = "RATE_LIMIT_TYPE_USER"
+    IP = "RATE_LIMIT_TYPE_IP"
+    API_KEY = "RATE_LIMIT_TYPE_API_KEY"
+    SERVICE = "RATE_LIMIT_TYPE_SERVICE"
+
+class RateLimitConfig(BaseModel):
+    id: str
+    type: RateLimitType
+    target_id: str = ANY_TARGET  # "*" vale para todo alvo do tipo sem configuração própria
+    requests_per_unit: int
+    time_unit: str = "60s"
+    block_on_exceed: bool = True
+    metadata: Dict[str, str] = {}
+
+class CheckRateLimitRequest(BaseModel):
+    type: RateLimitType
+    target_id: str
+    endpoint: Optional[str] = None
+
+class CheckRateLimitResponse(BaseModel):
+    allowed: bool
+    remaining_requests: int  # -1 quando nenhum limite se aplica
+    reset_after: str
+
+class UpdateRateLimitRequest(BaseModel):
+    config: RateLimitConfig
+
+class UpdateRateLimitResponse(BaseModel):
+    config: RateLimitConfig
+
+@app.post("/ratelimit/check", response_model=CheckRateLimitResponse)
+async def check_rate_limit(request: CheckRateLimitRequest):
+    """Consome uma requisição do alvo e informa se ela está dentro do limite"""
+    decision = await rate_limiter.check_async(request.type.value, request.target_id)
+    return CheckRateLimitResponse(
+        allowed=decision.allowed,
+        remaining_requests=decision.remaining_requests,
+        reset_after=format_duration(decision.reset_after)
+    )
+
+@app.put("/ratelimit/config", response_model=UpdateRateLimitResponse)
+async def update_rate_limit(request: UpdateRateLimitRequest, authorization: Optional[str] = Header(None)):
+    """Cria ou substitui o limite de (type, target_id); vale a partir da próxima requisição"""
+    require_rate_limit_admin(authorization)
+    config = request.config
+    try:
+        rate_limiter.update(RateLimitRule(
+            id=config.id,
+            type=config.type.value,
+            target_id=config.target_id,
+            requests_per_unit=config.requests_per_unit,
+            time_unit=parse_duration(config.time_unit),
+            block_on_exceed=config.block_on_exceed,
+            metadata=config.metadata
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return UpdateRateLimitResponse(config=config)
+
+def inline_schema(model) -> Dict[str, Any]:
+    """JSON Schema do modelo com as referências resolvidas no lugar.
+
+    Funciona no Pydantic 1.x (schema(), com `definitions`) e no 2
+    (model_json_schema(), com `$defs`).
+    """
+    schema = model.model_json_schema() if hasattr(model, 'model_json_schema') else model.schema()
+    defs = {**schema.pop('definitions', {}), **schema.pop('$defs', {})}
+
+    def resolve(node):
+        if isinstance(node, dict):
+            if '$ref' in node:
+                return resolve(defs[node['$ref'].rsplit('/', 1)[1]])
+            return {key: resolve(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [resolve(value) for value in node]
+        return node
+
+    return resolve(schema)
+
+# O corpo é lido e validado pelo services.intent_codec, não pelo FastAPI; o
+# esquema continua documentado no OpenAPI
+INTENTS_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "application/json": {"schema": {"type": "array", "items": inline_schema(Intent)}},
+        PROTOBUF_MEDIA_TYPES[0]: {"schema": {"type": "string", "format": "binary", "description": "IntentBatch (proto/protoai/v1/intent.proto)"}},
+    },
+}
+
+@app.post(
+    "/intents",
+    response_model=List[IntentResponse],
+    responses={200: {"content": {PROTOBUF_MEDIA_TYPES[0]: {}}}},
+    openapi_extra={"requestBody": INTENTS_REQUEST_BODY}
+)
+async def process_intents(request: Request):
+    """Processa um lote de intenções; as respostas saem na ordem do lote.
+
+    O corpo é JSON ou, com `Content-Type: application/x-protobuf`, um
+    IntentBatch; com `Accept: application/x-protobuf` a resposta é um
+    IntentResponseBatch. Cada intenção é validada uma vez, aqui, e segue
+    como CompactIntent até a resposta, que já traz o `data` serializado.
+    """
+    protobuf_in = request.headers.get("content-type", "").split(";")[0].strip() in PROTOBUF_MEDIA_TYPES
+    protobuf_out = prefers_protobuf(request)
+    module = None
+    if protobuf_in or protobuf_out:
+        module = intent_codec.proto_module()
+        if module is None:
+            raise HTTPException(status_code=415 if protobuf_in else 406, detail="Representação protobuf indisponível")
+    body = await request.body()
+    try:
+        intents = intent_codec.decode_proto(body, module) if protobuf_in else intent_codec.decode_json(body)
+    except IntentDecodeError as e:
+        raise HTTPException(status_code=422, detail=e.detail())
+    if len(intents) > MAX_INTENT_BATCH:
+        raise HTTPException(status_code=413, detail=f"Lote maior que {MAX_INTENT_BATCH} intenções")
+    responses = await registry.process_intents(intents)
+    if protobuf_out:
+        return Response(intent_codec.encode_proto(responses, module), media_type=PROTOBUF_MEDIA_TYPES[0])
+    if TRUSTED_OUTPUT:
+        return Response(intent_codec.encode_json(responses), media_type="application/json")
+    return [response.to_model() for response in responses]
+
 @app.get("/")
 async def root():
-    return {"message": "Bem-vindo à API do ProtoAi MCP"}
\ No newline at end of file
+    return {"message": "Bem-vindo à API do ProtoAi MCP"}
+
+# Fim da montagem do app (modelos, rotas e middlewares)
+startup_profile.mark('app')
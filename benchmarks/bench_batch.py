@@ -0,0 +1,58 @@
+"""Vazão de RegistryService.process_intents contra um upstream local.
+
+Compara N chamadas sequenciais a process_intent com um único lote, para
+lotes de 1, 10, 100 e 1000 intenções (com descobertas repetidas no lote).
+
+Uso: python benchmarks/bench_batch.py [--upstream-delay 0.002]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.stub_server import StubServer
+from models.intent import Intent
+from services.registry import RegistryService
+
+
+def make_batch(size: int):
+    return [Intent(type="discovery", tags=[f"tag{i % 25}", "api"]) for i in range(size)]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--upstream-delay', type=float, default=0.002)
+    args = parser.parse_args()
+
+    stub = StubServer(delay=args.upstream_delay)
+    host, port = await stub.start()
+    # Sem cache de descoberta, para medir só o despacho do lote
+    async with RegistryService(f"http://{host}:{port}", discovery_ttl=0, discovery_stale_ttl=0) as registry:
+        for size in args.sizes:
+            batch = make_batch(size)
+
+            start = time.perf_counter()
+            for intent in batch:
+                await registry.process_intent(intent)
+            sequential = time.perf_counter() - start
+
+            requests_before = stub.requests
+            start = time.perf_counter()
+            responses = await registry.process_intents(batch)
+            batched = time.perf_counter() - start
+            assert len(responses) == size and all(response.success for response in responses)
+
+            print(
+                f"lote {size:5}: sequencial {size / sequential:8.0f} intenções/s | "
+                f"process_intents {size / batched:8.0f} intenções/s "
+                f"({stub.requests - requests_before} chamadas ao upstream)"
+            )
+    await stub.stop()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
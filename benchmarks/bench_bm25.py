@@ -0,0 +1,55 @@
+"""Latência do top-10 BM25 do /search?sort=relevance.
+
+Uso: python benchmarks/bench_bm25.py [--sizes 100000 1000000]
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import generate_catalog
+from services.catalog import read_rows
+from services.text_index import BM25Index
+
+QUERIES = [
+    "semantic",
+    "Integração de serviços",
+    "registry gateway",
+    "análise de dados modelo",
+    "fast agent discovery manifest",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            rows = read_rows(str(generate_catalog(Path(tmp) / f"repositories_{size}.csv", size)))
+            start = time.perf_counter()
+            index = BM25Index(f"{row.name} {row.description}" for row in rows)
+            build_time = time.perf_counter() - start
+            del rows
+
+            print(f"{size:>9} documentos | construção {build_time:.1f}s")
+            for query in QUERIES:
+                samples = []
+                for _ in range(args.rounds):
+                    start = time.perf_counter()
+                    index.top_k(query, 10)
+                    samples.append(time.perf_counter() - start)
+                samples.sort()
+                p50 = statistics.median(samples) * 1000
+                p99 = samples[int(len(samples) * 0.99) - 1] * 1000
+                print(f"  {query!r:34} top-10 p50 {p50:7.3f} ms  p99 {p99:7.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Compara a latência p50/p99 do /search por varredura do CSV com o catálogo indexado.
+
+Uso: python benchmarks/bench_catalog.py [--sizes 1000 100000 1000000]
+"""
+import argparse
+import csv
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import generate_catalog
+from services.catalog import Catalog
+
+QUERIES = [
+    {"q": "semantic"},
+    {"tags": ["grpc"]},
+    {"tags": ["nlp", "busca"], "license": "mit"},
+    {"owner": "owner1", "q": "agent"},
+    {"q": "dados", "tags": ["ia"], "license": "apache"},
+]
+
+
+def legacy_search(path, q=None, tags=None, owner=None, license=None):
+    """Varredura original do /search: relê e normaliza o CSV a cada chamada"""
+    results = []
+    with open(path, 'r', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            row_tags = [tag.strip() for tag in row['tags'].strip('"').split(',')]
+            matches = True
+            if q and not (q.lower() in row['name'].lower() or q.lower() in row['description'].lower()):
+                matches = False
+            if tags and not any(tag in row_tags for tag in tags):
+                matches = False
+            if owner and owner.lower() not in row['owner'].lower():
+                matches = False
+            if license and license.lower() not in row['license'].lower():
+                matches = False
+            if matches:
+                results.append(row)
+    return results
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return statistics.median(samples) * 1000, p99 * 1000
+
+
+def measure(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        for query in QUERIES:
+            start = time.perf_counter()
+            fn(**query)
+            samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = generate_catalog(Path(tmp) / f"repositories_{size}.csv", size)
+
+            start = time.perf_counter()
+            catalog = Catalog.from_csv(str(path))
+            load_time = time.perf_counter() - start
+
+            # Confere que o catálogo devolve exatamente o que a varredura devolvia
+            for query in QUERIES:
+                expected = [row['name'] for row in legacy_search(path, **query)]
+                assert [catalog.rows[i].name for i in catalog.search(**query)] == expected, query
+
+            rounds = max(1, min(200, 2_000_000 // size))
+            scan_p50, scan_p99 = measure(lambda **query: legacy_search(path, **query), max(1, rounds // 20))
+            idx_p50, idx_p99 = measure(catalog.search, rounds)
+
+            print(f"{size:>9} linhas | carga {load_time:.2f}s")
+            print(f"  varredura CSV : p50 {scan_p50:10.3f} ms  p99 {scan_p99:10.3f} ms")
+            print(f"  catálogo      : p50 {idx_p50:10.3f} ms  p99 {idx_p99:10.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
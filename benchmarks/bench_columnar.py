@@ -0,0 +1,110 @@
+"""Catálogo em memória (CSV) contra o catálogo colunar mapeado com mmap.
+
+Para cada tamanho mede a carga (parse do CSV contra abrir o arquivo
+compilado), a memória alocada pelo Python por linha (tracemalloc; as páginas
+do mmap ficam no page cache, compartilhadas entre workers, e não entram) e a
+latência dos filtros de tag/owner/license, página de 50 e lista completa.
+Confere também que os dois devolvem os mesmos resultados.
+
+Uso: python benchmarks/bench_columnar.py [--sizes 100000 1000000] [--output r.json]
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from itertools import islice
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.harness import percentiles, write_report
+from benchmarks.synthetic import generate_catalog
+from services.catalog import Catalog
+from services.columnar import ColumnarCatalog, compile_catalog
+
+QUERIES = [
+    {"tags": ["api"]},
+    {"tags": ["ia", "pagamentos"]},
+    {"tags": ["python"], "license": "MIT"},
+    {"owner": "owner7"},
+    {"license": "gpl"},
+    {"tags": ["busca"], "owner": "owner1", "license": "apache"},
+]
+
+
+def loaded(load):
+    """(catálogo, segundos, bytes alocados pelo Python)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    catalog = load()
+    elapsed = time.perf_counter() - start
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return catalog, elapsed, allocated
+
+
+def latency(catalog, page: bool, rounds: int):
+    samples = []
+    for _ in range(rounds):
+        for query in QUERIES:
+            start = time.perf_counter()
+            if page:
+                list(islice(catalog.iter_search(**query), 50))
+            else:
+                catalog.search(**query)
+            samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            csv_path = str(generate_catalog(Path(tmp) / f"repositories_{size}.csv", size))
+            compiled_path = os.path.join(tmp, f"repositories_{size}.pcat")
+            start = time.perf_counter()
+            compile_catalog(csv_path, compiled_path)
+            compile_time = time.perf_counter() - start
+
+            columnar, columnar_load, columnar_bytes = loaded(lambda: ColumnarCatalog(compiled_path))
+            memory, memory_load, memory_bytes = loaded(lambda: Catalog.from_csv(csv_path))
+            for query in QUERIES:
+                assert memory.search(**query) == columnar.search(**query), query
+
+            entry = {"rows": size, "compile_seconds": round(compile_time, 3),
+                     "file_bytes": os.path.getsize(compiled_path)}
+            for label, catalog, load_time, allocated in (
+                ("csv", memory, memory_load, memory_bytes),
+                ("columnar", columnar, columnar_load, columnar_bytes),
+            ):
+                entry[label] = {
+                    "load_seconds": round(load_time, 4),
+                    "python_bytes_per_row": round(allocated / size, 1),
+                    "filter_page": latency(catalog, True, args.rounds),
+                    "filter_all": latency(catalog, False, args.rounds),
+                }
+            results.append(entry)
+            del memory
+
+            print(f"{size:>9} linhas | compilação {compile_time:.2f}s, arquivo {entry['file_bytes'] / 2**20:.1f} MiB")
+            for label in ("csv", "columnar"):
+                stats = entry[label]
+                print(f"  {label:9} carga {stats['load_seconds']:8.3f}s  {stats['python_bytes_per_row']:8.1f} B/linha  "
+                      f"página p50 {stats['filter_page']['p50_ms']:7.3f} ms  "
+                      f"tudo p50 {stats['filter_all']['p50_ms']:8.3f} ms  p99 {stats['filter_all']['p99_ms']:8.3f} ms")
+
+    write_report(args.output, "columnar", vars(args), results)
+
+
+if __name__ == '__main__':
+    main()
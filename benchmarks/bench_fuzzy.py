@@ -0,0 +1,95 @@
+"""Latência da busca aproximada de termos (TermIndex) conforme o vocabulário cresce.
+
+Monta vocabulários sintéticos de tamanhos crescentes e, para cada um, mede
+`TermIndex.similar` com termos digitados com 1 ou 2 erros, contra a
+varredura que compara o termo com o vocabulário inteiro. Confere também que
+os dois devolvem os mesmos termos.
+
+Uso: python benchmarks/bench_fuzzy.py [--sizes 1000 10000 100000 1000000] [--output r.json]
+"""
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.harness import percentiles, write_report
+from services.fuzzy import TermIndex, edit_distance, max_distance
+from services.text_index import fold
+
+
+def vocabulary(size: int, rng: random.Random):
+    """Termos no formato das tags: uma a três palavras separadas por hífen"""
+    terms = set()
+    while len(terms) < size:
+        words = (''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(rng.randint(1, 3)))
+        terms.add('-'.join(words))
+    return list(terms)
+
+
+def typo(term: str, rng: random.Random) -> str:
+    """`term` com uma letra trocada, apagada, inserida ou duas vizinhas invertidas"""
+    pos = rng.randrange(len(term) - 1)
+    kind = rng.randrange(4)
+    if kind == 0:
+        return term[:pos] + rng.choice(string.ascii_lowercase) + term[pos + 1:]
+    if kind == 1:
+        return term[:pos] + term[pos + 1:]
+    if kind == 2:
+        return term[:pos] + rng.choice(string.ascii_lowercase) + term[pos:]
+    return term[:pos] + term[pos + 1] + term[pos] + term[pos + 2:]
+
+
+def scan(terms, term: str):
+    """A alternativa sem índice: distância para cada termo do vocabulário"""
+    folded = fold(term)
+    limit = max_distance(folded)
+    matches = ((edit_distance(folded, fold(other), limit), other) for other in terms)
+    return sorted(match for match in matches if match[0] <= limit)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--scan-queries', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = []
+    for size in args.sizes:
+        terms = vocabulary(size, rng)
+        index = TermIndex()
+        start = time.perf_counter()
+        index.add(terms)
+        build = time.perf_counter() - start
+
+        queries = [typo(rng.choice(terms), rng) for _ in range(args.queries)]
+        samples = []
+        for query in queries:
+            start = time.perf_counter()
+            index.similar(query)
+            samples.append(time.perf_counter() - start)
+        scan_samples = []
+        for query in queries[:args.scan_queries]:
+            start = time.perf_counter()
+            expected = scan(terms, query)
+            scan_samples.append(time.perf_counter() - start)
+            assert sorted(index.similar(query)) == expected, query
+
+        entry = {"terms": size, "build_seconds": round(build, 3),
+                 "index": percentiles(samples), "scan": percentiles(scan_samples)}
+        results.append(entry)
+        print(f"{size:>9} termos | índice p50 {entry['index']['p50_ms']:7.3f} ms  p99 {entry['index']['p99_ms']:7.3f} ms  "
+              f"varredura p50 {entry['scan']['p50_ms']:10.1f} ms  (montagem {build:.2f}s)")
+
+    write_report(args.output, "fuzzy", vars(args), results)
+
+
+if __name__ == '__main__':
+    main()
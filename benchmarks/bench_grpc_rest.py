@@ -0,0 +1,106 @@
+"""gRPC+protobuf contra REST+JSON nas mesmas consultas por tag.
+
+Sobe a API (uvicorn, com o servidor gRPC no mesmo processo) sobre um
+catálogo sintético e dispara as mesmas consultas por /search e por
+SearchServices/StreamSearchServices, medindo requisições/s e os bytes de
+payload recebidos (corpo HTTP no REST; mensagens mais o prefixo de 5 bytes
+de cada mensagem gRPC). Cabeçalhos e framing HTTP/2 não entram na conta.
+
+Requer os stubs gerados (python scripts/generate_proto.py).
+
+Uso: python benchmarks/bench_grpc_rest.py [--rows 10000] [--requests 500] [--concurrency 20]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import grpc
+import httpx
+
+from benchmarks.harness import api_server, free_port, wait_ready
+from benchmarks.synthetic import TAGS, generate_catalog
+from services.proto_loader import load_generated
+
+
+async def run(call, queries, total: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    received = 0
+
+    async def one(i):
+        nonlocal received
+        async with semaphore:
+            size = await call(queries[i % len(queries)])
+            received += size
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return total / (time.perf_counter() - start), received / total
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=20)
+    args = parser.parse_args()
+
+    registry_pb2 = load_generated("protoai.registry.v1.registry_pb2")
+    registry_pb2_grpc = load_generated("protoai.registry.v1.registry_pb2_grpc")
+    if registry_pb2 is None or registry_pb2_grpc is None:
+        sys.exit("Stubs gRPC ausentes: rode python scripts/generate_proto.py")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "catalog.csv")
+        generate_catalog(csv_path, args.rows)
+        grpc_port = free_port()
+        env = {
+            "GRPC_ADDRESS": f"127.0.0.1:{grpc_port}",
+            # Sem cache de consultas no /search: os dois lados fazem a mesma busca
+            "CACHE_MAX_SIZE": "0",
+        }
+        with api_server(csv_path, tmp, env) as base_url:
+            await wait_ready(base_url, args.rows)
+            queries = [[tag] for tag in TAGS]
+
+            limits = httpx.Limits(max_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+                async def rest(tags):
+                    response = await client.get("/search", params={"tags": ",".join(tags)})
+                    response.raise_for_status()
+                    return len(response.content)
+
+                async with grpc.aio.insecure_channel(f"127.0.0.1:{grpc_port}") as channel:
+                    stub = registry_pb2_grpc.ProtoAiRegistryStub(channel)
+
+                    async def unary(tags):
+                        response = await stub.SearchServices(registry_pb2.SearchServicesRequest(tags=tags))
+                        return response.ByteSize() + 5
+
+                    async def streaming(tags):
+                        size = 0
+                        async for message in stub.StreamSearchServices(registry_pb2.SearchServicesRequest(tags=tags)):
+                            size += message.ByteSize() + 5
+                        return size
+
+                    # Aquecimento (conexões, caches) antes de medir
+                    for call in (rest, unary, streaming):
+                        await run(call, queries, len(queries), args.concurrency)
+                    print(f"{args.rows} linhas, {args.requests} requisições, concorrência {args.concurrency}")
+                    for label, call in (
+                        ("REST + JSON (/search)", rest),
+                        ("gRPC SearchServices", unary),
+                        ("gRPC StreamSearchServices", streaming),
+                    ):
+                        throughput, size = await run(call, queries, args.requests, args.concurrency)
+                        print(f"{label:28} {throughput:8.0f} req/s  {size / 1024:8.1f} KiB/resposta")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,167 @@
+"""Vazão do codec de intenções (services.intent_codec) contra os modelos Pydantic.
+
+Mede, em intenções/s e sem rede, cada etapa do /intents num lote misto
+(descoberta, execução e registro):
+
+- decodificação e validação: List[Intent] do Pydantic a partir do JSON,
+  CompactIntent a partir do JSON e de um IntentBatch em protobuf;
+- respostas: IntentResponse com `data` em dicts aninhados serializado pelo
+  Pydantic, contra CompactIntentResponse com o payload já serializado;
+- ida e volta completa (corpo de entrada até corpo de saída).
+
+Uso: python benchmarks/bench_intents.py [--batch 100] [--services 10] [--output r.json]
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.harness import write_report
+from models.intent import CompactIntentResponse, Intent, IntentResponse
+from services import intent_codec
+from services.fast_json import dumps
+
+try:
+    from pydantic import TypeAdapter
+except ImportError:  # Pydantic 1.x (api/requirements.txt)
+    TypeAdapter = None
+
+if TypeAdapter is not None:
+    parse_intents = TypeAdapter(List[Intent]).validate_json
+    dump_responses = TypeAdapter(List[IntentResponse]).dump_json
+else:
+    from pydantic import parse_raw_as
+
+    def parse_intents(body: bytes):
+        return parse_raw_as(List[Intent], body)
+
+    def dump_responses(responses) -> bytes:
+        return json.dumps([response.dict() for response in responses]).encode()
+
+
+def make_batch(size: int, seed: int):
+    rng = random.Random(seed)
+    batch = []
+    for i in range(size):
+        kind = rng.choice(("discovery", "discovery", "execution", "registration"))
+        if kind == "discovery":
+            batch.append({"type": kind, "tags": [f"tag{rng.randrange(25)}", "api"], "context": {"fuzzy": rng.random() < 0.2}})
+        elif kind == "execution":
+            batch.append({"type": kind, "service_name": f"servico-{rng.randrange(50)}", "operation": "buscar",
+                          "parameters": {"id": i, "q": "pagamentos", "filtros": {"ativo": True, "limite": 20}},
+                          "context": {"deadline_ms": 500}})
+        else:
+            batch.append({"type": kind, "parameters": {"manifest": {
+                "project_info": {"name": f"servico-{i}", "version": "1.0.0", "tags": ["api", "rest"]},
+                "access_interfaces": [{"type": "REST", "base_url": f"https://api{i}.exemplo.com"}]}}})
+    return batch
+
+
+def make_services(count: int):
+    return [{"name": f"servico-{i}", "description": "Serviço de exemplo para descoberta " * 3,
+             "url": f"https://github.com/exemplo/servico-{i}", "owner": "exemplo", "license": "MIT",
+             "stars": 100 + i, "tags": ["api", "rest", f"tag{i}"], "updated_at": "2026-01-01T00:00:00Z"}
+            for i in range(count)]
+
+
+def to_proto(batch, module) -> bytes:
+    message = module.IntentBatch()
+    for intent in batch:
+        item = message.intents.add(type=module.IntentType.Value(f"INTENT_TYPE_{intent['type'].upper()}"))
+        for field in ("service_name", "operation"):
+            if field in intent:
+                setattr(item, field, intent[field])
+        for field in ("parameters", "context"):
+            if field in intent:
+                getattr(item, field).update(intent[field])
+        item.tags.extend(intent.get("tags", []))
+    return message.SerializeToString()
+
+
+def result_data(intent, services):
+    """`data` de cada tipo de resposta, como o RegistryService monta"""
+    if intent.type == "discovery":
+        return {"services": services}
+    if intent.type == "execution":
+        return {"result": {"status": 200, "body": intent.parameters}}
+    return {"service_id": "svc-1", "registration_time": "2026-01-01T00:00:00"}
+
+
+def pydantic_responses(intents, services):
+    return [IntentResponse(success=True, message="ok", data=result_data(intent, services)) for intent in intents]
+
+
+def compact_responses(intents, services, discovery_payload):
+    # A descoberta reaproveita o payload guardado no cache; as demais serializam uma vez
+    return [CompactIntentResponse(True, "ok", discovery_payload if intent.type == "discovery"
+                                  else dumps(result_data(intent, services))) for intent in intents]
+
+
+def measure(fn, batch_size: int, seconds: float) -> float:
+    fn()
+    count, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        fn()
+        count += 1
+    return count * batch_size / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch', type=int, default=100)
+    parser.add_argument('--services', type=int, default=10, help="Serviços em cada resposta de descoberta")
+    parser.add_argument('--seconds', type=float, default=1.0, help="Duração de cada medição")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    batch = make_batch(args.batch, args.seed)
+    services = make_services(args.services)
+    discovery_payload = dumps({"services": services})
+    body = json.dumps(batch).encode()
+    module = intent_codec.proto_module()
+    proto_body = to_proto(batch, module) if module is not None else None
+
+    models = parse_intents(body)
+    compact = intent_codec.decode_json(body)
+    old_responses = pydantic_responses(models, services)
+    new_responses = compact_responses(compact, services, discovery_payload)
+    # Os dois caminhos produzem o mesmo JSON
+    assert json.loads(dump_responses(old_responses)) == json.loads(intent_codec.encode_json(new_responses))
+
+    cases = {
+        "decodificar: pydantic": lambda: parse_intents(body),
+        "decodificar: codec json": lambda: intent_codec.decode_json(body),
+        "respostas: pydantic": lambda: dump_responses(pydantic_responses(models, services)),
+        "respostas: codec json": lambda: intent_codec.encode_json(compact_responses(compact, services, discovery_payload)),
+        "ida e volta: pydantic": lambda: dump_responses(pydantic_responses(parse_intents(body), services)),
+        "ida e volta: codec json": lambda: intent_codec.encode_json(
+            compact_responses(intent_codec.decode_json(body), services, discovery_payload)),
+    }
+    if proto_body is not None:
+        cases["decodificar: codec protobuf"] = lambda: intent_codec.decode_proto(proto_body, module)
+        cases["respostas: codec protobuf"] = lambda: intent_codec.encode_proto(
+            compact_responses(compact, services, discovery_payload), module)
+        cases["ida e volta: codec protobuf"] = lambda: intent_codec.encode_proto(
+            compact_responses(intent_codec.decode_proto(proto_body, module), services, discovery_payload), module)
+    else:
+        print("Código de intent.proto não gerado (scripts/generate_proto.py): casos protobuf ignorados")
+
+    results = {}
+    for name in sorted(cases, key=lambda name: ["decodificar", "respostas", "ida e volta"].index(name.split(":")[0])):
+        rate = measure(cases[name], args.batch, args.seconds)
+        baseline = results.get(f"{name.split(':')[0]}: pydantic", {}).get("per_second")
+        results[name] = {"per_second": round(rate, 1)}
+        speedup = f"  {rate / baseline:5.1f}x" if baseline else ""
+        print(f"{name:30} {rate:12.0f} intenções/s{speedup}")
+    write_report(args.output, "intents", vars(args), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""Carga em volume de manifestos (init.py --bulk) contra um PostgREST local.
+
+O servidor é um StubServer que imita o upsert do PostgREST em mcp_manifests
+(on_conflict=content_hash, ignore-duplicates), com um atraso por requisição
+no lugar da ida e volta até o Supabase. Compara o registro antigo (um insert
+por manifesto) com lotes de vários tamanhos e concorrências, mede a nova
+execução idempotente e, com --fail-every, a retomada pelo checkpoint depois
+de lotes que falham.
+
+Uso: python benchmarks/bench_manifest_load.py [--manifests 5000] [--delay 0.02] [--output r.json]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.bench_manifests import generate
+from benchmarks.harness import write_report
+from benchmarks.stub_server import StubServer
+from services.manifest_loader import BulkManifestLoader, Checkpoint, PostgRESTManifestTable
+from services.manifests import PROTOCOL_RULES, ManifestValidationEngine, iter_sources, load_schema
+
+
+class PostgRESTStub:
+    """Tabela em memória com o upsert do PostgREST; a cada `fail_every`
+    requisições, uma responde 503"""
+
+    def __init__(self, fail_every: int = 0):
+        self.rows = {}
+        self.fail_every = fail_every
+        self.requests = 0
+
+    async def handle(self, method: str, target: str, body: bytes):
+        self.requests += 1
+        if self.fail_every and self.requests % self.fail_every == 0:
+            return 503, b'{"message": "unavailable"}'
+        inserted = []
+        for row in json.loads(body):
+            if row["content_hash"] not in self.rows:
+                self.rows[row["content_hash"]] = row
+                inserted.append({"content_hash": row["content_hash"]})
+        return 201, json.dumps(inserted).encode()
+
+
+async def load(url: str, sources, batch_size: int, concurrency: int, checkpoint: Checkpoint, retries: int = 3):
+    table = PostgRESTManifestTable(url, "chave", concurrency=concurrency)
+    with ManifestValidationEngine(load_schema(extra=PROTOCOL_RULES)) as engine:
+        loader = BulkManifestLoader(table, engine, batch_size, concurrency, retries, checkpoint)
+        try:
+            return await loader.load(sources)
+        finally:
+            await table.close()
+
+
+async def run(args, sources):
+    results = {}
+
+    async def measure(label, batch_size, concurrency, stub=None, checkpoint=None, retries=3, subset=None):
+        stub = stub or PostgRESTStub()
+        chosen = sources[:subset] if subset else sources
+        server = StubServer(delay=args.delay, handler=stub.handle)
+        host, port = await server.start()
+        start = time.perf_counter()
+        try:
+            report = await load(f"http://{host}:{port}", chosen, batch_size, concurrency,
+                                checkpoint or Checkpoint(), retries)
+        finally:
+            await server.stop()
+        elapsed = time.perf_counter() - start
+        rate = len(chosen) / elapsed
+        print(f"{label:24} {elapsed:8.3f}s  {rate:9.0f} manifestos/s  {stub.requests:6} requisições  "
+              f"inseridos {report.inserted}  falhas {len(report.failed)}")
+        results[label] = {"seconds": round(elapsed, 4), "per_second": round(rate, 1), "requests": stub.requests,
+                          "inserted": report.inserted, "unchanged": report.unchanged,
+                          "resumed": report.resumed, "failed_batches": len(report.failed)}
+        return stub
+
+    await measure("um por vez", 1, 1, subset=args.single)
+    for batch_size in args.batch_size:
+        for concurrency in args.concurrency:
+            stub = await measure(f"lote {batch_size} x{concurrency}", batch_size, concurrency)
+    await measure("nova execução", args.batch_size[-1], args.concurrency[-1], stub=stub)
+
+    if args.fail_every:
+        with tempfile.TemporaryDirectory() as tmp:
+            checkpoint_path = str(Path(tmp) / "checkpoint")
+            stub = PostgRESTStub(args.fail_every)
+            await measure("com falhas", args.batch_size[0], args.concurrency[-1], stub, Checkpoint(checkpoint_path), 0)
+            stub.fail_every = 0
+            await measure("retomada", args.batch_size[0], args.concurrency[-1], stub, Checkpoint(checkpoint_path), 0)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--manifests', type=int, default=5000)
+    parser.add_argument('--delay', type=float, default=0.02, help="Atraso por requisição no servidor (s)")
+    parser.add_argument('--batch-size', type=int, nargs='+', default=[100, 500])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--single', type=int, default=200, help="Manifestos no registro um por vez (é lento)")
+    parser.add_argument('--fail-every', type=int, default=5, help="Uma requisição em N falha (0 desliga)")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = generate(Path(tmp) / "manifests.ndjson", args.manifests, args.seed)
+        sources = list(iter_sources([str(path)]))
+    results = asyncio.run(run(args, sources))
+    write_report(args.output, "manifest_load", vars(args), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Validação e registro de manifestos em volume: manifestos por segundo.
+
+Gera um NDJSON sintético (uma fração inválida, alguns conteúdos repetidos)
+e compara:
+- one-shot: lê e compila o schema a cada manifesto, como uma execução
+  do script por arquivo;
+- compilado: ManifestValidationEngine no próprio processo;
+- pool: o mesmo com N processos;
+- cache: nova passada sobre os mesmos manifestos, com os vereditos no SQLite.
+Com --register mede também o envio dos válidos a um servidor local
+(StubServer), com `concurrency` requisições simultâneas.
+
+Uso: python benchmarks/bench_manifests.py [--manifests 20000] [--workers 2 4] [--output r.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.harness import write_report
+from benchmarks.stub_server import StubServer
+from services.manifests import (
+    PROTOCOL_RULES, ManifestRegistrar, ManifestValidationEngine, compile_schema, iter_sources, load_schema
+)
+
+BASE = Path(__file__).resolve().parent.parent / "MCP_Servers" / "manifests" / "readme.protobuf"
+
+
+def generate(path: Path, count: int, seed: int, invalid: float = 0.05, repeated: float = 0.1) -> Path:
+    rng = random.Random(seed)
+    base = json.loads(BASE.read_text())
+    with open(path, "w") as file:
+        for i in range(count):
+            manifest = json.loads(json.dumps(base))
+            manifest["api_name"] = f"svc-{rng.randrange(count) if rng.random() < repeated else i}"
+            manifest["semantic_purpose"] = f"{base['semantic_purpose']} #{i % 97}"
+            if rng.random() < invalid:
+                manifest.pop("auth", None)
+                manifest["payment"]["token"] = "ETH"
+                manifest["version"] = 1
+            file.write(json.dumps(manifest) + "\n")
+    return path
+
+
+def measure(label: str, count: int, function) -> dict:
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed else 0.0
+    print(f"{label:14} {elapsed:8.3f}s  {rate:10.0f} manifestos/s")
+    return {"seconds": round(elapsed, 4), "per_second": round(rate, 1), "result": result}
+
+
+def one_shot(sources) -> int:
+    invalid = 0
+    for _, raw in sources:
+        check = compile_schema(load_schema(extra=PROTOCOL_RULES))
+        errors = []
+        check(json.loads(raw), (), errors)
+        invalid += bool(errors)
+    return invalid
+
+
+def run_engine(sources, **options) -> int:
+    with ManifestValidationEngine(load_schema(extra=PROTOCOL_RULES), **options) as engine:
+        return sum(not verdict.valid for verdict in engine.validate_many(sources))
+
+
+async def register(manifests, concurrency: int, delay: float) -> int:
+    stub = StubServer(body=b'{"status": "ok"}', delay=delay)
+    host, port = await stub.start()
+    try:
+        async with ManifestRegistrar(f"http://{host}:{port}/api/manifests", concurrency) as registrar:
+            results = await registrar.register_many(manifests)
+    finally:
+        await stub.stop()
+    return sum(error is None for _, error in results)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--manifests', type=int, default=20_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4])
+    parser.add_argument('--one-shot', type=int, default=2000, help="Manifestos na medição one-shot (é lenta)")
+    parser.add_argument('--register', type=int, default=2000, help="Manifestos enviados ao servidor local (0 desliga)")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--upstream-delay', type=float, default=0.005)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    results = {"cpus": os.cpu_count()}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = generate(Path(tmp) / "manifests.ndjson", args.manifests, args.seed)
+        sources = list(iter_sources([str(path)]))
+        print(f"{len(sources)} manifestos, {os.cpu_count()} CPUs")
+
+        results["one_shot"] = measure("one-shot", min(args.one_shot, len(sources)),
+                                      lambda: one_shot(sources[:args.one_shot]))
+        results["compiled"] = measure("compilado", len(sources), lambda: run_engine(sources))
+        for workers in args.workers:
+            results[f"pool_{workers}"] = measure(
+                f"pool {workers}", len(sources), lambda: run_engine(sources, workers=workers)
+            )
+        cache_path = str(Path(tmp) / "verdicts.db")
+        for key, label in (("cold_cache", "cache (frio)"), ("warm_cache", "cache (quente)")):
+            results[key] = measure(label, len(sources), lambda: run_engine(sources, cache_path=cache_path))
+
+    if args.register:
+        manifests = [(name, json.loads(raw)) for name, raw in sources[:args.register]]
+        for concurrency in sorted({1, args.concurrency}):
+            results[f"register_{concurrency}"] = measure(
+                f"registro x{concurrency}", len(manifests),
+                lambda: asyncio.run(register(manifests, concurrency, args.upstream_delay))
+            )
+
+    write_report(args.output, "manifests", vars(args), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Escalabilidade da busca por substring em shards (ParallelSearch).
+
+Compila um catálogo sintético no formato colunar e roda buscas por `q` sem
+limite (a lista completa) no próprio processo e com 1, 2, 4 e 8 processos
+no pool. Mede a latência de cada modo e o atraso do event loop enquanto as
+buscas rodam: um tique a cada 1 ms registra o maior intervalo sem poder
+executar, que é o que as outras requisições do worker esperariam.
+
+O ganho depende dos núcleos livres: com menos núcleos que processos, os
+shards só se revezam.
+
+Uso: python benchmarks/bench_parallel.py [--rows 1000000] [--workers 1 2 4 8] [--output r.json]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.harness import write_report
+from benchmarks.synthetic import generate_catalog
+from services.columnar import ColumnarCatalog, compile_catalog
+from services.parallel_search import ParallelSearch
+
+# Do mais denso (quase toda linha casa) ao que não casa com nada
+QUERIES = ["a", "dados", "gateway-model", "xuxuxuxu"]
+
+
+async def measure(search, rounds: int):
+    """(mediana da latência por consulta em ms, maior atraso do event loop em ms)"""
+    lag = 0.0
+    running = True
+
+    async def ticker():
+        nonlocal lag
+        while running:
+            before = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lag = max(lag, time.perf_counter() - before - 0.001)
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    samples = {query: [] for query in QUERIES}
+    for _ in range(rounds):
+        for query in QUERIES:
+            start = time.perf_counter()
+            await search(query)
+            samples[query].append(time.perf_counter() - start)
+    running = False
+    await tick
+    return {query: round(statistics.median(values) * 1000, 2) for query, values in samples.items()}, round(lag * 1000, 2)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--shard-rows', type=int, default=1 << 17)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = generate_catalog(Path(tmp) / "repositories.csv", args.rows)
+        compiled_path = compile_catalog(str(csv_path), os.path.join(tmp, "repositories.pcat"), "bench")
+        catalog = ColumnarCatalog(compiled_path)
+        expected = {query: catalog.search(q=query) for query in QUERIES}
+        print(f"{args.rows} linhas, {os.cpu_count()} núcleos; mediana por consulta (ms)")
+        print(f"{'modo':10} " + " ".join(f"{query:>14}" for query in QUERIES) + f" {'atraso loop':>12}")
+
+        async def inline(query):
+            return catalog.search(q=query)
+
+        results = {}
+        latencies, lag = await measure(inline, args.rounds)
+        results["inline"] = {"latency_ms": latencies, "loop_lag_ms": lag}
+        print(f"{'inline':10} " + " ".join(f"{latencies[q]:14.1f}" for q in QUERIES) + f" {lag:12.1f}")
+
+        for workers in args.workers:
+            executor = ParallelSearch(workers, shard_rows=args.shard_rows)
+            await executor.start()
+            try:
+                for query in QUERIES:
+                    assert await executor.search(catalog, q=query) == expected[query], query
+                latencies, lag = await measure(lambda query: executor.search(catalog, q=query), args.rounds)
+            finally:
+                executor.shutdown()
+            speedup = {q: round(results["inline"]["latency_ms"][q] / latencies[q], 2) for q in QUERIES}
+            results[f"{workers}_workers"] = {"latency_ms": latencies, "loop_lag_ms": lag, "speedup": speedup}
+            label = f"{workers} proc."
+            print(f"{label:10} " + " ".join(f"{latencies[q]:14.1f}" for q in QUERIES) + f" {lag:12.1f}")
+
+    write_report(args.output, "parallel_search", vars(args), results)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+"""Custo por requisição do RateLimitMiddleware.
+
+Chama diretamente, sem rede, uma aplicação ASGI mínima com e sem o
+middleware e mede a diferença por requisição. As requisições vêm de
+`--clients` IPs distintos, com os quatro tipos de identificação presentes,
+para que o mapa de buckets tenha chaves de verdade. Com `--shared`, usa o
+backend SQLite compartilhado entre workers.
+
+Uso: python benchmarks/bench_rate_limit.py [--requests 200000] [--clients 10000] [--shared]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.rate_limit import (
+    ANY_TARGET, API_KEY, IP, SERVICE, RateLimiter, RateLimitMiddleware, RateLimitRule, SQLiteRateLimitBackend
+)
+
+
+async def app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def measure(handler, scopes) -> float:
+    start = time.perf_counter()
+    for scope in scopes:
+        await handler(scope, receive, send)
+    return (time.perf_counter() - start) / len(scopes) * 1e6
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=200000)
+    parser.add_argument('--clients', type=int, default=10000)
+    parser.add_argument('--shared', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SQLiteRateLimitBackend(os.path.join(tmp, "rate_limit.db")) if args.shared else None
+        limiter = RateLimiter(backend=backend)
+        # Limites altos: mede o custo da verificação, não o caminho do 429
+        limiter.update(RateLimitRule("ip", IP, ANY_TARGET, 1_000_000, 60.0))
+        limiter.update(RateLimitRule("key", API_KEY, ANY_TARGET, 1_000_000, 60.0))
+        limiter.update(RateLimitRule("search", SERVICE, "/search", 10_000_000, 60.0))
+        middleware = RateLimitMiddleware(app, limiter)
+
+        scopes = [
+            {
+                "type": "http",
+                "path": "/search",
+                "client": (f"10.0.{(i % args.clients) // 256}.{i % 256}", 50000),
+                "headers": [
+                    (b"host", b"localhost"),
+                    (b"accept", b"application/json"),
+                    (b"x-api-key", f"key-{i % args.clients}".encode()),
+                    (b"x-user-id", f"user-{i % args.clients}".encode()),
+                ],
+            }
+            for i in range(args.requests)
+        ]
+
+        await measure(middleware, scopes[:10000])
+        base = await measure(app, scopes)
+        limited = await measure(middleware, scopes)
+        print(f"sem middleware  {base:6.2f} us/req")
+        print(f"com middleware  {limited:6.2f} us/req")
+        print(f"custo adicional {limited - base:6.2f} us/req  ({len(limiter)} buckets)")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
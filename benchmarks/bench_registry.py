@@ -0,0 +1,63 @@
+"""Vazão de RegistryService.discover_services contra um upstream local.
+
+Compara o comportamento antigo (um httpx.AsyncClient novo por chamada) com
+o cliente compartilhado do RegistryService.
+
+Uso: python benchmarks/bench_registry.py [--requests 2000] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+
+from benchmarks.stub_server import StubServer
+from services.registry import RegistryService
+
+
+async def legacy_discover(mcp_url: str, tags):
+    """discover_services como era antes: cliente e conexão novos a cada chamada"""
+    async with httpx.AsyncClient() as client:
+        response = await client.get(f"{mcp_url}/search", params={'tags': ','.join(tags)})
+        response.raise_for_status()
+        return response.json()['results']
+
+
+async def run(discover, total: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            await discover([f"tag{i % 10}"])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return total / (time.perf_counter() - start)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+
+    for label in ("antes (cliente por chamada)", "depois (cliente em pool)"):
+        stub = StubServer()
+        host, port = await stub.start()
+        mcp_url = f"http://{host}:{port}"
+        if label.startswith("antes"):
+            throughput = await run(lambda tags: legacy_discover(mcp_url, tags), args.requests, args.concurrency)
+        else:
+            # Sem cache de descoberta, para que toda chamada vá ao upstream
+            async with RegistryService(mcp_url, discovery_ttl=0, discovery_stale_ttl=0) as registry:
+                throughput = await run(registry.discover_services, args.requests, args.concurrency)
+        await stub.stop()
+        print(f"{label:30} {throughput:8.0f} descobertas/s  {stub.connections:5} conexões TCP")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
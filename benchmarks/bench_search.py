@@ -0,0 +1,107 @@
+"""Microbenchmarks, no processo, das etapas do /search.
+
+Para cada tamanho de catálogo sintético mede, por consulta:
+  - filter: a busca no índice (página de `--limit` resultados e lista completa)
+  - relevance: o ranking BM25 dos melhores `--limit`
+  - serialize: SearchResult/SearchResponse e o JSON, como o FastAPI faz
+
+A API é importada com o registro num diretório temporário e sem gRPC.
+
+Uso: python benchmarks/bench_search.py [--sizes 1000 100000 1000000] [--limit 100] [--output resultados.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.harness import percentiles, write_report
+from benchmarks.synthetic import generate_catalog
+from services.catalog import Catalog
+
+QUERIES = [
+    {"tags": ["api"]},
+    {"tags": ["python", "machine-learning"]},
+    {"tags": ["pagamentos"], "license": "MIT"},
+    {"q": "registry"},
+    {"q": "semantic", "tags": ["python"]},
+    {"owner": "owner7"},
+]
+RANKED_QUERIES = ["registry", "semantic pipeline", "dados modelo"]
+
+
+def sample(fn, args_list, budget: float, max_rounds: int = 200):
+    """Repete as chamadas até gastar ~`budget` segundos; devolve os tempos"""
+    samples = []
+    deadline = time.perf_counter() + budget
+    for _ in range(max_rounds):
+        for args in args_list:
+            start = time.perf_counter()
+            fn(args)
+            samples.append(time.perf_counter() - start)
+        if time.perf_counter() > deadline:
+            break
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--budget', type=float, default=2.0, help='segundos por medição')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.setdefault('REGISTRY_DATA_DIR', os.path.join(tmp, 'registry'))
+        os.environ.setdefault('GRPC_ADDRESS', '')
+        os.environ.setdefault('LOG_LEVEL', 'warning')
+        from fastapi.encoders import jsonable_encoder
+        from api.main import SearchResponse, SearchResult
+
+        def serialize(page):
+            response = SearchResponse(
+                results=[SearchResult(**catalog.result(idx)) for idx in page],
+                total_count=len(page),
+                query_timestamp=datetime.now().isoformat()
+            )
+            return json.dumps(jsonable_encoder(response), ensure_ascii=False).encode('utf-8')
+
+        results = []
+        for size in args.sizes:
+            path = generate_catalog(Path(tmp) / f"repositories_{size}.csv", size)
+            start = time.perf_counter()
+            catalog = Catalog.from_csv(str(path))
+            load_time = time.perf_counter() - start
+
+            pages = [list(islice(catalog.iter_search(**query), args.limit)) for query in QUERIES]
+            stages = {
+                "filter_page": sample(lambda query: list(islice(catalog.iter_search(**query), args.limit)),
+                                      QUERIES, args.budget),
+                "filter_all": sample(lambda query: catalog.search(**query), QUERIES, args.budget),
+                "relevance": sample(lambda q: catalog.ranked_search(q, k=args.limit), RANKED_QUERIES, args.budget),
+                "serialize": sample(serialize, pages, args.budget),
+            }
+            entry = {
+                "rows": size,
+                "load_seconds": round(load_time, 3),
+                "stages": {name: percentiles(samples) for name, samples in stages.items()},
+            }
+            results.append(entry)
+
+            print(f"{size:>9} linhas | carga {load_time:.2f}s")
+            for name, stats in entry["stages"].items():
+                print(f"  {name:12} p50 {stats['p50_ms']:9.3f} ms  p95 {stats['p95_ms']:9.3f} ms  "
+                      f"p99 {stats['p99_ms']:9.3f} ms")
+
+    write_report(args.output, "search", vars(args), results)
+
+
+if __name__ == '__main__':
+    main()
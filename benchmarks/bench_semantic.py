@@ -0,0 +1,99 @@
+"""Busca semântica: recall@10 do índice IVF contra a busca exata, e latência.
+
+Monta um catálogo sintético, calcula os embeddings de nome + descrição
+(HashingEmbedder, sem rede) e o índice IVF, e roda consultas de duas ou três
+palavras tiradas das descrições. Para cada nprobe mede o recall@10 (fração
+dos 10 vizinhos exatos que o IVF devolve) e a latência da busca nos vetores;
+a busca exata é a referência. Mede também as buscas `semantic_search` e
+`hybrid_search` do catálogo, com e sem filtro de tag.
+
+Uso: python benchmarks/bench_semantic.py [--rows 100000] [--nprobe 4 8 16 32 64] [--output r.json]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.harness import percentiles, write_report
+from benchmarks.synthetic import generate_catalog
+from services.catalog import Catalog
+from services.embeddings import HashingEmbedder
+from services.semantic import _top
+
+
+def timed(function, queries):
+    samples, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(function(query))
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples), results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[4, 8, 16, 32, 64])
+    parser.add_argument('--dim', type=int, default=256)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = generate_catalog(Path(tmp) / "repositories.csv", args.rows)
+        catalog = Catalog.from_csv(str(csv_path))
+
+    rng = random.Random(args.seed)
+    texts = []
+    for _ in range(args.queries):
+        words = catalog.rows[rng.randrange(len(catalog.rows))].description.split()
+        start = rng.randrange(max(1, len(words) - 2))
+        texts.append(" ".join(words[start:start + rng.randint(2, 3)]))
+
+    start = time.perf_counter()
+    catalog.attach_embeddings(HashingEmbedder(args.dim))
+    build = time.perf_counter() - start
+    index = catalog._semantic
+    print(f"{args.rows} linhas, {len(index.ivf.centroids)} listas; embeddings + IVF em {build:.2f}s")
+
+    vectors = [index.embed_query(text) for text in texts]
+    exact_latency, exact = timed(lambda query: _top(*index.exact(query), 10), vectors)
+    print(f"{'exata':12} p50 {exact_latency['p50_ms']:7.3f} ms  p99 {exact_latency['p99_ms']:7.3f} ms")
+    results = {"rows": args.rows, "lists": len(index.ivf.centroids), "build_seconds": round(build, 3),
+               "exact": exact_latency, "ivf": {}}
+    default_nprobe = index.nprobe
+    for nprobe in args.nprobe:
+        index.nprobe = nprobe
+        latency, found = timed(lambda query: index.search(query, 10), vectors)
+        recall = np.mean([
+            len({idx for _, idx in got} & {idx for _, idx in want}) / max(1, len(want))
+            for got, want in zip(found, exact)
+        ])
+        results["ivf"][nprobe] = {"recall_at_10": round(float(recall), 4), **latency}
+        print(f"{'nprobe ' + str(nprobe):12} p50 {latency['p50_ms']:7.3f} ms  p99 {latency['p99_ms']:7.3f} ms  "
+              f"recall@10 {recall:.3f}")
+
+    index.nprobe = default_nprobe
+    catalog.scored_search(texts[0])
+    for label, function in (
+        ("semantic", lambda text: catalog.semantic_search(text, k=10)),
+        ("semantic+tag", lambda text: catalog.semantic_search(text, tags=["python"], k=10)),
+        ("hybrid", lambda text: catalog.hybrid_search(text, k=10)),
+        ("hybrid+tag", lambda text: catalog.hybrid_search(text, tags=["python"], k=10)),
+    ):
+        latency, _ = timed(function, texts)
+        results[label] = latency
+        print(f"{label:12} p50 {latency['p50_ms']:7.3f} ms  p99 {latency['p99_ms']:7.3f} ms")
+
+    write_report(args.output, "semantic", vars(args), results)
+
+
+if __name__ == '__main__':
+    main()
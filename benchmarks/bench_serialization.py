@@ -0,0 +1,85 @@
+"""CPU por requisição do /search com e sem a saída confiável (TRUSTED_OUTPUT).
+
+Chama a API no processo (TestClient) sobre um catálogo sintético, sem cache
+de consultas, e mede o tempo de CPU do processo por requisição para páginas
+de tamanhos diferentes, com as respostas passando pelos modelos Pydantic
+(antes) e com os dicts codificados direto (depois). Confere
+também que os dois modos devolvem o mesmo JSON.
+
+Uso: python benchmarks/bench_serialization.py [--rows 50000] [--limits 10 100 1000] [--requests 500] [--output r.json]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.harness import write_report
+from benchmarks.synthetic import generate_catalog
+
+TAGS = ["api", "python", "data", "web"]
+ROUNDS = 10
+
+
+def cpu_per_request(client, limit: int, requests: int) -> float:
+    """Milissegundos de CPU por requisição"""
+    start = time.process_time()
+    for i in range(requests):
+        response = client.get("/search", params={"tags": TAGS[i % len(TAGS)], "limit": limit})
+        assert response.status_code == 200, response.text
+    return (time.process_time() - start) / requests * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--limits', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = generate_catalog(Path(tmp) / "repositories.csv", args.rows)
+        os.environ.update({
+            'CATALOG_PATH': str(csv_path),
+            'REGISTRY_DATA_DIR': os.path.join(tmp, 'registry'),
+            'GRPC_ADDRESS': '',
+            'CACHE_MAX_SIZE': '0',
+            'LOG_LEVEL': 'warning',
+        })
+        from fastapi.testclient import TestClient
+        import api.main
+
+        results = []
+        with TestClient(api.main.app) as client:
+            for limit in args.limits:
+                params = {"tags": "api", "limit": limit}
+                samples = {"pydantic": [], "trusted": []}
+                bodies = {}
+                # Os modos se alternam em rodadas para que ruído e aquecimento afetem os dois igualmente
+                for _ in range(ROUNDS):
+                    for label, trusted in (("pydantic", False), ("trusted", True)):
+                        api.main.TRUSTED_OUTPUT = trusted
+                        samples[label].append(cpu_per_request(client, limit, max(1, args.requests // ROUNDS)))
+                for label, trusted in (("pydantic", False), ("trusted", True)):
+                    api.main.TRUSTED_OUTPUT = trusted
+                    body = client.get("/search", params=params).json()
+                    body.pop("query_timestamp")
+                    bodies[label] = body
+                timings = {label: round(statistics.median(values), 4) for label, values in samples.items()}
+                assert bodies["pydantic"] == bodies["trusted"], "os dois modos devolvem JSON diferente"
+
+                speedup = timings["pydantic"] / timings["trusted"]
+                results.append({"limit": limit, "cpu_ms": timings, "speedup": round(speedup, 2)})
+                print(f"limit {limit:5} | pydantic {timings['pydantic']:8.3f} ms CPU  "
+                      f"confiável {timings['trusted']:8.3f} ms CPU  ({speedup:.1f}x)")
+
+    write_report(args.output, "serialization", vars(args), results)
+
+
+if __name__ == '__main__':
+    main()
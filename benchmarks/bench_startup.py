@@ -0,0 +1,121 @@
+"""Cold start da API: do spawn do processo até a primeira resposta 200.
+
+Sobe o uvicorn várias vezes sobre um catálogo sintético, com configurações
+diferentes de WARMUP e CATALOG_FORMAT, e mede o tempo até o primeiro 200 de
+uma rota (/search por padrão), a primeira busca semântica depois disso e, pelo
+STARTUP_PROFILE, quanto o processo levou para ficar pronto.
+
+Uso: python benchmarks/bench_startup.py [--rows 50000] [--runs 5] [--output r.json]
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.harness import ROOT, free_port, percentiles, write_report
+from benchmarks.synthetic import generate_catalog
+from services.columnar import compile_catalog
+
+CONFIGS = {
+    "padrão": {},
+    "sem warmup": {"WARMUP": ""},
+    "colunar": {"CATALOG_FORMAT": "columnar"},
+    "colunar sem warmup": {"CATALOG_FORMAT": "columnar", "WARMUP": ""},
+}
+
+
+def cold_start(csv_path: str, data_dir: str, env, path: str, timeout: float):
+    """(segundos até o primeiro 200, até a primeira busca semântica respondida, relatório do startup)"""
+    port = free_port()
+    profile_path = os.path.join(data_dir, "startup.json")
+    server_env = {
+        **os.environ,
+        "CATALOG_PATH": csv_path,
+        "REGISTRY_DATA_DIR": os.path.join(data_dir, "registry"),
+        "GRPC_ADDRESS": "",
+        "CATALOG_RELOAD_INTERVAL": "3600",
+        "LOG_LEVEL": "warning",
+        "STARTUP_PROFILE": profile_path,
+        **env,
+    }
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=server_env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        first_ok = None
+        with httpx.Client(timeout=timeout) as client:
+            while first_ok is None and time.perf_counter() - started < timeout and server.poll() is None:
+                try:
+                    if client.get(f"http://127.0.0.1:{port}{path}").status_code == 200:
+                        first_ok = time.perf_counter() - started
+                except httpx.TransportError:
+                    time.sleep(0.005)
+            if first_ok is None:
+                raise RuntimeError("API não respondeu 200 a tempo")
+            client.get(f"http://127.0.0.1:{port}/search", params={"q": "payment api", "mode": "semantic", "limit": 10})
+            first_semantic = time.perf_counter() - started
+        for _ in range(100):
+            if os.path.exists(profile_path):
+                break
+            time.sleep(0.01)
+        with open(profile_path) as f:
+            profile = json.load(f)
+        os.unlink(profile_path)
+        return first_ok, first_semantic, profile
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/search?q=api&limit=10')
+    parser.add_argument('--configs', nargs='+', choices=list(CONFIGS), default=list(CONFIGS))
+    parser.add_argument('--timeout', type=float, default=300.0)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = str(generate_catalog(Path(tmp) / "repositories.csv", args.rows))
+        # O arquivo colunar é compilado uma vez, como faria o scripts/compile_catalog.py no deploy
+        source_hash = hashlib.sha256(Path(csv_path).read_bytes()).hexdigest()
+        compile_catalog(csv_path, os.path.splitext(csv_path)[0] + '.pcat', source_hash)
+        for name in args.configs:
+            first, semantic, ready = [], [], []
+            for run in range(args.runs):
+                data_dir = os.path.join(tmp, f"run-{name}-{run}")
+                os.makedirs(data_dir)
+                first_ok, first_semantic, profile = cold_start(csv_path, data_dir, CONFIGS[name], args.path, args.timeout)
+                first.append(first_ok)
+                semantic.append(first_semantic)
+                ready.append(profile["ready_seconds"])
+            results[name] = {
+                "env": CONFIGS[name],
+                "first_200": percentiles(first),
+                "first_semantic": percentiles(semantic),
+                "ready": percentiles(ready),
+                "last_profile": profile["phases"],
+            }
+            print(f"{name:20} primeiro 200 p50 {results[name]['first_200']['p50_ms']:8.1f} ms  "
+                  f"pronto p50 {results[name]['ready']['p50_ms']:8.1f} ms  "
+                  f"1ª semântica p50 {results[name]['first_semantic']['p50_ms']:8.1f} ms")
+
+    write_report(args.output, "startup", vars(args), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""Utilitários comuns dos benchmarks: percentis, relatório JSON e a API local.
+
+Os relatórios levam o commit, a versão do Python e a máquina, para que
+resultados de commits diferentes possam ser comparados.
+"""
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Sequence
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def percentiles(samples: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99, média e máximo, em milissegundos, de amostras em segundos"""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+
+    def at(fraction: float) -> float:
+        return round(ordered[min(last, int(len(ordered) * fraction))] * 1000, 4)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 4),
+        "p50_ms": at(0.50),
+        "p95_ms": at(0.95),
+        "p99_ms": at(0.99),
+        "max_ms": round(ordered[last] * 1000, 4),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_report(path: Optional[str], benchmark: str, parameters: Dict[str, Any], results: Any) -> Dict[str, Any]:
+    """Monta o relatório e, com `path`, grava em JSON"""
+    report = {
+        "benchmark": benchmark,
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "parameters": parameters,
+        "results": results,
+    }
+    if path:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    return report
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_ready(base_url: str, rows: int, timeout: float = 120.0):
+    """Espera o /catalog/status mostrar pelo menos `rows` linhas carregadas"""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                status = (await client.get(f"{base_url}/catalog/status")).json()
+                if status["total_count"] >= rows:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("API não ficou pronta a tempo")
+
+
+@contextmanager
+def api_server(csv_path: str, data_dir: str, env: Optional[Dict[str, str]] = None,
+               workers: int = 1) -> Iterator[str]:
+    """Sobe a API com uvicorn sobre `csv_path` e devolve a URL base.
+
+    O registro e a fila de dados ficam em `data_dir`; o gRPC fica desligado,
+    a não ser que `env` traga um GRPC_ADDRESS.
+    """
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server_env = {
+        **os.environ,
+        "CATALOG_PATH": csv_path,
+        "REGISTRY_DATA_DIR": os.path.join(data_dir, "registry"),
+        "GRPC_ADDRESS": "",
+        "CATALOG_RELOAD_INTERVAL": "3600",
+        "LOG_LEVEL": "warning",
+        # As intenções de descoberta consultam o /search desta mesma instância
+        "MCP_URL": base_url,
+        **(env or {}),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT, env=server_env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        yield base_url
+    finally:
+        server.terminate()
+        server.wait()
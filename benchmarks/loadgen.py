@@ -0,0 +1,164 @@
+"""Gerador de carga assíncrono para a API.
+
+Usa o mesmo cliente httpx de scripts/test_peup_client.py, mas assíncrono e
+com `--concurrency` requisições em voo. Sem `--url`, sobe a API localmente
+(uvicorn) sobre um catálogo sintético de `--rows` linhas. Cada cenário roda
+por `--duration` segundos (ou `--requests` requisições) depois de um
+aquecimento, e o relatório traz vazão, erros e p50/p95/p99.
+
+Cenários:
+  search           GET /search por tags, texto e dono, paginado
+  search-relevance GET /search?sort=relevance
+  readme           GET /protoai/readme.protobuf em JSON
+  readme-protobuf  GET /protoai/readme.protobuf em protobuf binário
+  intents          POST /intents com um lote de intenções de descoberta
+
+Uso: python benchmarks/loadgen.py [--scenarios search readme] [--concurrency 50]
+                                  [--duration 10] [--rows 100000] [--url http://...]
+                                  [--output resultados.json]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+
+from benchmarks.harness import api_server, percentiles, wait_ready, write_report
+from benchmarks.synthetic import TAGS, WORDS, generate_catalog
+
+
+def search_requests(rng: random.Random) -> Callable[[httpx.AsyncClient], Awaitable[httpx.Response]]:
+    def build():
+        kind = rng.random()
+        if kind < 0.6:
+            params = {"tags": ",".join(rng.sample(TAGS[:8], rng.randint(1, 2)))}
+        elif kind < 0.9:
+            params = {"q": rng.choice(WORDS)}
+        else:
+            params = {"owner": f"owner{rng.randint(0, 50)}"}
+        params["limit"] = 50
+        return params
+
+    return lambda client: client.get("/search", params=build())
+
+
+def relevance_requests(rng: random.Random):
+    return lambda client: client.get(
+        "/search", params={"q": " ".join(rng.sample(WORDS, 2)), "sort": "relevance", "limit": 10}
+    )
+
+
+def readme_requests(media_type: str):
+    return lambda client: client.get("/protoai/readme.protobuf", headers={"Accept": media_type})
+
+
+def intent_requests(rng: random.Random, batch: int):
+    def build() -> List[Dict[str, Any]]:
+        return [
+            {"type": "discovery", "tags": rng.sample(TAGS[:8], rng.randint(1, 2))}
+            for _ in range(batch)
+        ]
+
+    return lambda client: client.post("/intents", json=build())
+
+
+async def run_scenario(client: httpx.AsyncClient, request, concurrency: int,
+                       duration: float, total: Optional[int]) -> Dict[str, Any]:
+    """Mantém `concurrency` requisições em voo até o prazo ou o total"""
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    sent = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal sent
+        while (sent < total) if total is not None else (time.perf_counter() < deadline):
+            sent += 1
+            start = time.perf_counter()
+            try:
+                response = await request(client)
+                await response.aread()
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    errors = sum(count for status, count in statuses.items() if not status.startswith("2"))
+    return {
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "errors": errors,
+        "statuses": statuses,
+        "latency": percentiles(latencies),
+    }
+
+
+async def drive(base_url: str, args) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    scenarios = {
+        "search": search_requests(rng),
+        "search-relevance": relevance_requests(rng),
+        "readme": readme_requests("application/json"),
+        "readme-protobuf": readme_requests("application/x-protobuf"),
+        "intents": intent_requests(rng, args.intent_batch),
+    }
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        for name in args.scenarios:
+            await run_scenario(client, scenarios[name], args.concurrency, args.warmup, None)
+            result = await run_scenario(client, scenarios[name], args.concurrency, args.duration, args.requests)
+            results[name] = result
+            latency = result["latency"]
+            print(f"{name:17} {result['throughput_rps']:8.1f} req/s  "
+                  f"p50 {latency.get('p50_ms', 0):8.2f} ms  p95 {latency.get('p95_ms', 0):8.2f} ms  "
+                  f"p99 {latency.get('p99_ms', 0):8.2f} ms  erros {result['errors']}")
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scenarios', nargs='+', default=['search', 'readme', 'readme-protobuf', 'intents'],
+                        choices=['search', 'search-relevance', 'readme', 'readme-protobuf', 'intents'])
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=10.0, help='segundos por cenário')
+    parser.add_argument('--requests', type=int, help='total por cenário (no lugar de --duration)')
+    parser.add_argument('--warmup', type=float, default=1.0)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--intent-batch', type=int, default=10)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--url', help='API já em execução; sem ela, sobe uma local')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    if args.url:
+        results = await drive(args.url.rstrip('/'), args)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, "repositories.csv")
+            generate_catalog(Path(csv_path), args.rows, args.seed)
+            with api_server(csv_path, tmp, workers=args.workers) as base_url:
+                await wait_ready(base_url, args.rows)
+                print(f"{args.rows} linhas, concorrência {args.concurrency}, {args.workers} worker(s)")
+                results = await drive(base_url, args)
+
+    write_report(args.output, "load", vars(args), results)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
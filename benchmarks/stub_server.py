@@ -0,0 +1,78 @@
+import asyncio
+import json
+from http import HTTPStatus
+from typing import Awaitable, Callable, Optional, Tuple
+
+DEFAULT_BODY = json.dumps({
+    "results": [{
+        "name": "stub-service",
+        "description": "Serviço de teste",
+        "url": "http://127.0.0.1",
+        "tags": ["api"],
+        "owner": "stub",
+        "license": "MIT",
+        "version": "1.0.0"
+    }],
+    "total_count": 1,
+    "query_timestamp": "2024-01-01T00:00:00"
+}).encode()
+
+
+class StubServer:
+    """Servidor HTTP/1.1 mínimo com keep-alive para servir de upstream local.
+
+    Sem `handler` responde sempre o mesmo JSON; com ele, cada requisição é
+    passada como (método, alvo, corpo) e o handler devolve (status, corpo
+    JSON). Conta conexões e requisições.
+    """
+
+    def __init__(
+        self,
+        body: bytes = DEFAULT_BODY,
+        delay: float = 0.0,
+        handler: Optional[Callable[[str, str, bytes], Awaitable[Tuple[int, bytes]]]] = None
+    ):
+        self.body = body
+        self.delay = delay
+        self.handler = handler
+        self.connections = 0
+        self.requests = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.split(b"\r\n")
+                length = 0
+                for line in lines:
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                request_body = await reader.readexactly(length) if length else b""
+                self.requests += 1
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                status, body = 200, self.body
+                if self.handler is not None:
+                    method, target, _ = lines[0].decode().split(" ", 2)
+                    status, body = await self.handler(method, target, request_body)
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n".encode() +
+                    b"Content-Type: application/json\r\n"
+                    b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> Tuple[str, int]:
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
@@ -0,0 +1,96 @@
+"""Catálogos sintéticos para os benchmarks.
+
+Uso: python benchmarks/synthetic.py --rows 100000 [--out api/repositories.csv] [--seed 42]
+"""
+import argparse
+import csv
+import random
+from pathlib import Path
+
+FIELDS = ["name", "description", "url", "tags", "owner", "license", "version"]
+
+TAGS = [
+    "api", "python", "machine-learning", "data", "web", "cli", "database",
+    "security", "nlp", "grpc", "rest", "protobuf", "cloud", "devops",
+    "testing", "visão-computacional", "automação", "pagamentos", "busca", "ia"
+]
+WORDS = [
+    "fast", "simple", "semantic", "registry", "client", "server", "toolkit",
+    "engine", "pipeline", "gateway", "parser", "agent", "discovery", "manifest",
+    "biblioteca", "serviço", "integração", "análise", "dados", "modelo"
+]
+LICENSES = ["MIT", "Apache-2.0", "GPL-3.0", "BSD-3-Clause", "MPL-2.0"]
+SYLLABLES = ["da", "ta", "lo", "ser", "vi", "ção", "me", "tri", "ca", "pro", "to", "ne", "xu", "ra", "bi", "que"]
+VOCABULARY_SIZE = 5000
+
+
+def _zipf_cum_weights(size: int, exponent: float):
+    cum_weights = []
+    total = 0.0
+    for rank in range(1, size + 1):
+        total += 1 / rank ** exponent
+        cum_weights.append(total)
+    return cum_weights
+
+
+def _tags(rng: random.Random, cum_weights) -> str:
+    """1 a 4 tags distintas; as primeiras de TAGS são bem mais comuns (Zipf),
+    como em catálogos reais, em que "api" e "python" aparecem em quase tudo"""
+    count = rng.choices((1, 2, 3, 4), weights=(35, 35, 20, 10))[0]
+    tags = []
+    while len(tags) < count:
+        tag = rng.choices(TAGS, cum_weights=cum_weights)[0]
+        if tag not in tags:
+            tags.append(tag)
+    return ','.join(tags)
+
+
+def _vocabulary(rng: random.Random):
+    """Vocabulário com frequência Zipf: as palavras de WORDS entre outras sintéticas"""
+    words = list(WORDS)
+    seen = set(words)
+    while len(words) < VOCABULARY_SIZE:
+        word = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    rng.shuffle(words)
+    return words, _zipf_cum_weights(len(words), 1.07)
+
+
+def generate_catalog(path: Path, rows: int, seed: int = 42) -> Path:
+    """Gera um repositories.csv sintético com `rows` linhas"""
+    rng = random.Random(seed)
+    owners = [f"owner{i}" for i in range(max(10, rows // 50))]
+    vocabulary, cum_weights = _vocabulary(rng)
+    tag_weights = _zipf_cum_weights(len(TAGS), 1.0)
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDS)
+        for i in range(rows):
+            name = f"{rng.choice(WORDS)}-{rng.choice(WORDS)}-{i}"
+            description = ' '.join(rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(5, 12)))
+            owner = rng.choice(owners)
+            writer.writerow([
+                name,
+                description,
+                f"https://github.com/{owner}/{name}",
+                _tags(rng, tag_weights),
+                owner,
+                rng.choice(LICENSES),
+                f"{rng.randint(0, 3)}.{rng.randint(0, 9)}.{rng.randint(0, 9)}"
+            ])
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--out', default='repositories.csv')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    print(generate_catalog(Path(args.out), args.rows, args.seed))
+
+
+if __name__ == '__main__':
+    main()
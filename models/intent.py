@@ -1,5 +1,7 @@
+import json
+
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 from enum import Enum
 
 class IntentType(str, Enum):
@@ -19,4 +21,66 @@ class IntentResponse(BaseModel):
     success: bool
     message: str
     data: Optional[Dict[str, Any]] = None
-    error: Optional[str] = None
\ No newline at end of file
+    error: Optional[str] = None
+
+class CompactIntent:
+    """Intent sem Pydantic, para o caminho de alto volume do /intents.
+
+    Os campos são os mesmos do Intent; quem cria (services.intent_codec)
+    valida uma única vez, na entrada, então aqui não há validação.
+    """
+
+    __slots__ = ('type', 'service_name', 'operation', 'parameters', 'context', 'tags')
+
+    def __init__(
+        self,
+        type: IntentType,
+        service_name: Optional[str] = None,
+        operation: Optional[str] = None,
+        parameters: Optional[Dict[str, Any]] = None,
+        context: Optional[Dict[str, Any]] = None,
+        tags: Optional[List[str]] = None
+    ):
+        self.type = type
+        self.service_name = service_name
+        self.operation = operation
+        self.parameters = parameters
+        self.context = context
+        self.tags = tags
+
+    @classmethod
+    def from_model(cls, intent: Intent) -> "CompactIntent":
+        return cls(intent.type, intent.service_name, intent.operation, intent.parameters, intent.context, intent.tags)
+
+    def to_model(self) -> Intent:
+        # model_construct no Pydantic 2; construct no 1.x, que os requisitos da API fixam
+        construct = getattr(Intent, "model_construct", None) or Intent.construct
+        return construct(
+            type=self.type, service_name=self.service_name, operation=self.operation,
+            parameters=self.parameters, context=self.context, tags=self.tags
+        )
+
+class CompactIntentResponse:
+    """IntentResponse com `data` já serializado em JSON (`data_json`).
+
+    O payload é serializado uma vez, por quem produz a resposta, e vai
+    direto para o corpo (JSON ou protobuf) sem passar por dicts aninhados.
+    """
+
+    __slots__ = ('success', 'message', 'data_json', 'error')
+
+    def __init__(self, success: bool, message: str, data_json: Optional[bytes] = None, error: Optional[str] = None):
+        self.success = success
+        self.message = message
+        self.data_json = data_json
+        self.error = error
+
+    @property
+    def data(self) -> Optional[Dict[str, Any]]:
+        return json.loads(self.data_json) if self.data_json is not None else None
+
+    def to_model(self) -> IntentResponse:
+        return IntentResponse(success=self.success, message=self.message, data=self.data, error=self.error)
+
+# O que RegistryService.process_intent aceita
+AnyIntent = Union[Intent, CompactIntent]
@@ -0,0 +1,30 @@
+import argparse
+import hashlib
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.absolute()))
+
+from services.columnar import compile_catalog
+
+def main():
+    parser = argparse.ArgumentParser(description="Compila o repositories.csv no formato colunar (CATALOG_FORMAT=columnar)")
+    parser.add_argument('csv', nargs='?', default='api/repositories.csv')
+    parser.add_argument('out', nargs='?', help="Padrão: o CSV com extensão .pcat")
+    args = parser.parse_args()
+
+    out = args.out or os.path.splitext(args.csv)[0] + '.pcat'
+    digest = hashlib.sha256()
+    with open(args.csv, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+
+    start = time.perf_counter()
+    # Com o hash do CSV, a API reaproveita o arquivo em vez de compilar de novo no startup
+    compile_catalog(args.csv, out, digest.hexdigest())
+    print(f"{out}: {os.path.getsize(out) / 2**20:.1f} MiB em {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
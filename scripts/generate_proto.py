@@ -1,50 +1,229 @@
+import argparse
+import hashlib
+import json
 import os
+import re
+import shutil
 import subprocess
 import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
-def check_protoc():
+try:
+    import grpc_tools
+    from grpc_tools import grpc_version, protoc as grpc_protoc
+except ImportError:  # sem o grpcio-tools usa o protoc do sistema (sem stubs gRPC)
+    grpc_tools, grpc_version, grpc_protoc = None, None, None
+
+PROJECT_DIR = Path(__file__).parent.parent.absolute()
+CACHE_NAME = '.generate_proto.json'
+
+_IMPORT_RE = re.compile(r'^\s*import\s+(?:public\s+|weak\s+)?"([^"]+)"\s*;', re.MULTILINE)
+_SERVICE_RE = re.compile(r'^\s*service\s+\w+', re.MULTILINE)
+_COMMENT_RE = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+
+
+class ProtoFile:
+    def __init__(self, proto_dir: Path, path: Path):
+        self.path = path
+        self.name = path.relative_to(proto_dir).as_posix()
+        self.source = path.read_bytes()
+        text = _COMMENT_RE.sub('', self.source.decode('utf-8', errors='replace'))
+        self.imports = _IMPORT_RE.findall(text)
+        self.has_service = bool(_SERVICE_RE.search(text))
+        self.key: Optional[str] = None
+
+    def outputs(self, grpc: bool) -> List[str]:
+        """Arquivos gerados, relativos ao diretório de saída"""
+        stem = self.name[:-len('.proto')]
+        names = [f'{stem}_pb2.py', f'{stem}_pb2.pyi']
+        if grpc and self.has_service:
+            names.append(f'{stem}_pb2_grpc.py')
+        return names
+
+
+def discover(proto_dir: Path) -> Dict[str, ProtoFile]:
+    return {file.name: file for file in (ProtoFile(proto_dir, path) for path in sorted(proto_dir.rglob('*.proto')))}
+
+
+def compute_keys(files: Dict[str, ProtoFile], compiler: str):
+    """Chave de cada arquivo: hash do conteúdo, do compilador e das chaves das
+    dependências locais. Mudar um arquivo muda a chave de todos que o importam,
+    direta ou indiretamente. Imports fora de proto/ (google/protobuf/...) vêm
+    com o compilador e entram pela identificação dele."""
+    visiting = set()
+
+    def visit(file: ProtoFile) -> str:
+        if file.key is not None:
+            return file.key
+        if file.name in visiting:
+            raise ValueError(f"Import circular envolvendo {file.name}")
+        visiting.add(file.name)
+        digest = hashlib.sha256(compiler.encode())
+        digest.update(file.source)
+        for name in sorted(file.imports):
+            if name in files:
+                digest.update(name.encode() + visit(files[name]).encode())
+        visiting.discard(file.name)
+        file.key = digest.hexdigest()
+        return file.key
+
+    for file in files.values():
+        visit(file)
+
+
+def load_cache(path: Path) -> Dict[str, Dict]:
     try:
-        subprocess.run(['protoc', '--version'], check=True, capture_output=True)
-        return True
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        print("Erro: protoc não está instalado. Por favor, instale-o primeiro.")
-        print("Visite: https://github.com/protocolbuffers/protobuf/releases")
-        return False
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(path: Path, cache: Dict[str, Dict]):
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def compiler_id(backend: str) -> str:
+    if backend == 'grpc_tools':
+        return f"grpc_tools {grpc_version.VERSION}"
+    version = subprocess.run(['protoc', '--version'], capture_output=True, text=True).stdout.strip()
+    return f"protoc {version}"
+
+
+def choose_backend(requested: str) -> Optional[str]:
+    """grpc_tools (protoc embutido no grpcio-tools, gera também os stubs gRPC e
+    combina com o runtime protobuf instalado) ou o binário protoc do sistema"""
+    has_binary = shutil.which('protoc') is not None
+    if requested == 'grpc_tools' or (requested == 'auto' and grpc_protoc is not None):
+        return 'grpc_tools' if grpc_protoc is not None else None
+    return 'binary' if has_binary else None
+
+
+def _compile_in_process(args: List[str]) -> Tuple[int, str]:
+    """Roda o protoc do grpc_tools neste processo, capturando o stderr (fd 2),
+    onde o protoc escreve os erros"""
+    with tempfile.TemporaryFile() as err:
+        saved = os.dup(2)
+        os.dup2(err.fileno(), 2)
+        try:
+            code = grpc_protoc.main(args)
+        finally:
+            os.dup2(saved, 2)
+            os.close(saved)
+        err.seek(0)
+        return code, err.read().decode('utf-8', errors='replace')
+
+
+def _compile_binary(args: List[str]) -> Tuple[int, str]:
+    result = subprocess.run(args, capture_output=True, text=True)
+    return result.returncode, result.stderr
+
+
+def grpc_plugin(backend: str) -> Optional[str]:
+    """Plugin dos stubs gRPC para o protoc do sistema ('' no grpc_tools, que já o embute)"""
+    return '' if backend == 'grpc_tools' else shutil.which('grpc_python_plugin')
+
+
+def protoc_args(backend: str, file: ProtoFile, proto_dir: Path, output_dir: Path) -> List[str]:
+    args = ['protoc', f'--proto_path={proto_dir}']
+    if backend == 'grpc_tools':
+        # Inclui os .proto bem conhecidos (google/protobuf/*) que vêm no pacote
+        args.append(f"--proto_path={Path(grpc_tools.__file__).parent / '_proto'}")
+    args += [f'--python_out={output_dir}', f'--pyi_out={output_dir}']
+    plugin = grpc_plugin(backend)
+    if file.has_service and plugin is not None:
+        if plugin:
+            args.append(f'--plugin=protoc-gen-grpc_python={plugin}')
+        args.append(f'--grpc_python_out={output_dir}')
+    args.append(str(file.path))
+    return args
+
 
 def main():
-    # Diretório do projeto
-    project_dir = Path(__file__).parent.parent.absolute()
-    proto_dir = project_dir / 'proto'
-    output_dir = project_dir / 'peup' / 'proto'
+    parser = argparse.ArgumentParser(description="Gera o código Python (mensagens, .pyi e stubs gRPC) de proto/")
+    parser.add_argument('--proto-dir', default=str(PROJECT_DIR / 'proto'))
+    parser.add_argument('--output-dir', default=str(PROJECT_DIR / 'peup' / 'proto'))
+    parser.add_argument('--backend', choices=['auto', 'grpc_tools', 'binary'], default='auto')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help="Arquivos compilados em paralelo")
+    parser.add_argument('--force', action='store_true', help="Regenera tudo, ignorando o cache")
+    args = parser.parse_args()
 
-    # Criar diretório de saída se não existir
+    proto_dir = Path(args.proto_dir).absolute()
+    output_dir = Path(args.output_dir).absolute()
     output_dir.mkdir(parents=True, exist_ok=True)
+    # Torna o diretório de saída um pacote Python
+    (output_dir / '__init__.py').touch()
 
-    # Verificar se protoc está instalado
-    if not check_protoc():
+    backend = choose_backend(args.backend)
+    if backend is None:
+        print("Erro: nem o grpcio-tools (pip install grpcio-tools) nem o protoc estão instalados.")
+        print("Visite: https://github.com/protocolbuffers/protobuf/releases")
         sys.exit(1)
+    grpc = grpc_plugin(backend) is not None
+    if not grpc:
+        print("Aviso: sem grpcio-tools nem grpc_python_plugin no PATH; stubs gRPC não serão gerados")
+
+    start = time.perf_counter()
+    files = discover(proto_dir)
+    try:
+        compute_keys(files, f"{compiler_id(backend)} grpc={grpc}")
+    except ValueError as e:
+        print(f"Erro: {e}")
+        sys.exit(1)
+
+    cache_path = output_dir / CACHE_NAME
+    cache = {} if args.force else load_cache(cache_path)
+    # Saídas de .proto que não existem mais
+    for name in [name for name in cache if name not in files]:
+        for output in cache.pop(name).get('outputs', []):
+            (output_dir / output).unlink(missing_ok=True)
 
-    # Gerar código Python
-    proto_file = proto_dir / 'protoai' / 'v1' / 'readme.proto'
-    cmd = [
-        'protoc',
-        f'--proto_path={proto_dir}',
-        f'--python_out={output_dir}',
-        str(proto_file)
+    stale = [
+        file for file in files.values()
+        if cache.get(file.name, {}).get('key') != file.key
+        or not all((output_dir / output).exists() for output in file.outputs(grpc))
     ]
+    if not stale:
+        print(f"{len(files)} arquivo(s) .proto, nada a gerar ({time.perf_counter() - start:.2f}s)")
+        return
 
-    try:
-        subprocess.run(cmd, check=True)
-        print(f"Código gerado com sucesso em: {output_dir}")
-        
-        # Criar arquivo __init__.py para tornar o diretório um pacote Python
-        init_file = output_dir / '__init__.py'
-        init_file.touch()
-        
-    except subprocess.CalledProcessError as e:
-        print(f"Erro ao gerar código: {e}")
+    # Cada arquivo compila sozinho (o protoc lê as dependências do fonte), então
+    # os desatualizados são independentes entre si e rodam em paralelo
+    commands = [protoc_args(backend, file, proto_dir, output_dir) for file in stale]
+    compile_one = _compile_in_process if backend == 'grpc_tools' else _compile_binary
+    jobs = max(1, min(args.jobs, len(stale)))
+    if jobs == 1:
+        results = [compile_one(command) for command in commands]
+    else:
+        # O protoc do grpc_tools segura o GIL: paralelismo por processos
+        executor_cls = ProcessPoolExecutor if backend == 'grpc_tools' else ThreadPoolExecutor
+        with executor_cls(jobs) as executor:
+            results = list(executor.map(compile_one, commands))
+
+    failures = 0
+    for file, (code, errors) in zip(stale, results):
+        if code == 0:
+            cache[file.name] = {'key': file.key, 'outputs': file.outputs(grpc)}
+            print(f"✓ {file.name}")
+        else:
+            failures += 1
+            cache.pop(file.name, None)
+            print(f"✗ {file.name}\n{errors.rstrip()}")
+    save_cache(cache_path, cache)
+
+    elapsed = time.perf_counter() - start
+    print(f"{len(stale) - failures} de {len(files)} arquivo(s) gerado(s) em {output_dir} "
+          f"({backend}, {jobs} em paralelo, {elapsed:.2f}s)")
+    if failures:
         sys.exit(1)
 
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
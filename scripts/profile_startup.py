@@ -0,0 +1,115 @@
+import argparse
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).parent.parent.absolute()
+
+_IMPORT_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def parse_importtime(text: str):
+    """(módulo, self µs, cumulativo µs, profundidade) de cada linha do -X importtime"""
+    for line in text.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            yield module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Perfil do startup da API: tempo de import por pacote (-X importtime), "
+                    "fases do startup e tempo até a primeira resposta 200"
+    )
+    parser.add_argument('--path', default='/search?q=api&limit=10', help="Rota da primeira requisição")
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--timeout', type=float, default=120.0)
+    parser.add_argument('--output', help="Relatório em JSON")
+    args = parser.parse_args()
+
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        profile_path = os.path.join(tmp, 'startup.json')
+        env = {
+            **os.environ,
+            'STARTUP_PROFILE': profile_path,
+            'REGISTRY_DATA_DIR': os.environ.get('REGISTRY_DATA_DIR', os.path.join(tmp, 'registry')),
+            'CATALOG_RELOAD_INTERVAL': '3600',
+        }
+        started = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, '-X', 'importtime', '-m', 'uvicorn', 'api.main:app', '--port', str(port),
+             '--log-level', 'warning'],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+        )
+        first_ok = None
+        try:
+            with httpx.Client() as client:
+                while time.perf_counter() - started < args.timeout and server.poll() is None:
+                    try:
+                        if client.get(f'http://127.0.0.1:{port}{args.path}').status_code == 200:
+                            first_ok = time.perf_counter() - started
+                            break
+                    except httpx.TransportError:
+                        time.sleep(0.005)
+            # O relatório é gravado logo depois da primeira resposta
+            for _ in range(100):
+                if os.path.exists(profile_path):
+                    break
+                time.sleep(0.01)
+            phases = json.load(open(profile_path)) if os.path.exists(profile_path) else None
+        finally:
+            server.terminate()
+            _, stderr = server.communicate()
+
+    imports = list(parse_importtime(stderr))
+    by_package = defaultdict(int)
+    for module, self_us, _, _ in imports:
+        by_package[module.split('.')[0]] += self_us
+    total_us = sum(by_package.values())
+
+    print(f"Imports: {len(imports)} módulos, {total_us / 1000:.1f} ms")
+    print(f"\nPacotes (tempo próprio somado):")
+    for package, us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {package:32} {us / 1000:8.1f} ms  {us / total_us:6.1%}")
+    print(f"\nMódulos do projeto (cumulativo):")
+    own = [entry for entry in imports if entry[0].split('.')[0] in ('api', 'services', 'models')]
+    for module, _, cumulative_us, _ in sorted(own, key=lambda entry: -entry[2])[:args.top]:
+        print(f"  {module:32} {cumulative_us / 1000:8.1f} ms")
+    if phases:
+        print(f"\nFases do startup (desde o início do processo):")
+        for phase in phases['phases']:
+            print(f"  {phase['phase']:32} {phase['seconds'] * 1000:8.1f} ms")
+        print(f"  {'pronto':32} {phases['ready_seconds'] * 1000:8.1f} ms")
+    if first_ok is None:
+        print(f"\nA API não respondeu 200 em {args.path} em {args.timeout:.0f}s")
+        sys.exit(1)
+    print(f"\nPrimeira resposta 200 ({args.path}): {first_ok * 1000:.1f} ms após o spawn")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'first_200_seconds': round(first_ok, 4),
+                'imports_ms': {package: round(us / 1000, 3) for package, us in by_package.items()},
+                'startup': phases,
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
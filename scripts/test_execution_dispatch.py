@@ -0,0 +1,132 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.stub_server import StubServer
+from models.intent import Intent
+from services.dispatch import EXECUTION_LATENCY
+from services.registry import RegistryService
+
+
+def manifest(base_url: str, operations):
+    return {
+        "communication_details": {
+            "access_interfaces": [{
+                "type": 2,
+                "base_url_or_address": base_url,
+                "available_methods_or_operations": operations
+            }]
+        }
+    }
+
+
+class StubService:
+    """Serviço local com manifesto e comportamento configurável por cenário"""
+
+    def __init__(self, name: str, failures: int = 0, delay: float = 0.0):
+        self.name = name
+        self.failures = failures
+        self.delay = delay
+        self.calls = 0
+        self.server = StubServer(handler=self.handle)
+        self.url = ""
+
+    async def handle(self, method: str, target: str, body: bytes):
+        path = urlsplit(target).path
+        if path == "/protoai/readme.protobuf":
+            return 200, json.dumps(manifest(self.url, ["/echo", "POST /items"])).encode()
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.calls <= self.failures:
+            return 503, b'{"error": "indisponivel"}'
+        if path == "/echo":
+            return 200, json.dumps({"echo": parse_qs(urlsplit(target).query)}).encode()
+        if path == "/items" and method == "POST":
+            return 201, json.dumps({"created": json.loads(body)}).encode()
+        return 404, b'{"error": "not found"}'
+
+    async def start(self):
+        host, port = await self.server.start()
+        self.url = f"http://{host}:{port}"
+
+
+async def run_scenarios() -> bool:
+    services = {
+        "estavel": StubService("estavel"),
+        "instavel": StubService("instavel", failures=2),
+        "lento": StubService("lento", delay=1.0),
+        "fora-do-ar": StubService("fora-do-ar", failures=10 ** 6),
+    }
+    for service in services.values():
+        await service.start()
+
+    async def search(method, target, body):
+        q = parse_qs(urlsplit(target).query).get("q", [""])[0]
+        results = [
+            {"name": s.name, "description": "", "url": s.url, "tags": [], "owner": "", "license": "", "version": ""}
+            for s in services.values() if q in s.name
+        ]
+        return 200, json.dumps({"results": results, "total_count": len(results), "query_timestamp": ""}).encode()
+
+    mcp = StubServer(handler=search)
+    host, port = await mcp.start()
+
+    results = []
+    async with RegistryService(f"http://{host}:{port}") as registry:
+        registry.dispatcher.backoff_base = 0.01
+        registry.dispatcher.failure_threshold = 3
+
+        async def execute(name, operation, parameters=None, context=None):
+            return await registry.process_intent(Intent(
+                type="execution", service_name=name, operation=operation,
+                parameters=parameters, context=context
+            ))
+
+        response = await execute("estavel", "/echo", {"msg": "oi"})
+        results.append(("GET resolvido pelo manifesto", response.success and response.data["result"]["echo"] == {"msg": ["oi"]}))
+
+        response = await execute("estavel", "POST /items", {"id": 1})
+        results.append(("POST com parâmetros em JSON", response.success and response.data["result"]["created"] == {"id": 1}))
+
+        response = await execute("instavel", "/echo")
+        results.append(("retentativas com backoff após 503", response.success and services["instavel"].calls == 3))
+
+        response = await execute("lento", "/echo", context={"deadline_ms": 200})
+        results.append(("prazo por chamada respeitado", not response.success and "Prazo" in response.error))
+
+        for _ in range(3):
+            await execute("fora-do-ar", "/echo")
+        calls = services["fora-do-ar"].calls
+        response = await execute("fora-do-ar", "/echo")
+        results.append(("circuit breaker abre e falha na hora", not response.success
+                        and "Circuito aberto" in response.error and services["fora-do-ar"].calls == calls))
+
+        response = await execute("inexistente", "/echo")
+        results.append(("serviço desconhecido", not response.success and "não encontrado" in response.error))
+
+        response = await execute("estavel", "/nao-declarada")
+        results.append(("operação fora do manifesto", not response.success and "não declarada" in response.error))
+
+        results.append(("histograma por serviço", EXECUTION_LATENCY.labels("estavel").count == 2))
+
+    for service in services.values():
+        await service.server.stop()
+    await mcp.stop()
+
+    for name, ok in results:
+        print(f"{'✅' if ok else '❌'} {name}")
+    return all(ok for _, ok in results)
+
+
+def main():
+    success = asyncio.run(run_scenarios())
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,714 @@
+import asyncio
+import copy
+import csv
+import hashlib
+import heapq
+import logging
+import os
+import threading
+import weakref
+from array import array
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from bisect import bisect_right
+from datetime import datetime
+from itertools import groupby, islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from services.fuzzy import FuzzyVocabulary
+from services.semantic import SemanticIndex
+from services.text_index import BM25Index
+
+
+class CatalogRow(NamedTuple):
+    name: str
+    description: str
+    url: str
+    tags: Tuple[str, ...]
+    owner: str
+    license: str
+    version: str
+
+
+def parse_tags(raw: str) -> Tuple[str, ...]:
+    """Converte a string de tags do CSV em tupla, como o /search sempre fez"""
+    return tuple(tag.strip() for tag in raw.strip('"').split(','))
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 do arquivo, lido em blocos"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def rows_digest(rows: Iterable[CatalogRow]) -> str:
+    """SHA-256 do conteúdo das linhas, na ordem"""
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update(repr(tuple(row)).encode())
+    return digest.hexdigest()
+
+
+def read_rows(path: str) -> List[CatalogRow]:
+    """Lê e normaliza as linhas do repositories.csv"""
+    with open(path, 'r', encoding='utf-8') as file:
+        return [
+            CatalogRow(
+                name=row['name'],
+                description=row['description'],
+                url=row['url'],
+                tags=parse_tags(row['tags']),
+                owner=row['owner'],
+                license=row['license'],
+                version=row['version']
+            )
+            for row in csv.DictReader(file)
+        ]
+
+
+# Serializa a montagem do vocabulário da busca aproximada
+_fuzzy_lock = threading.Lock()
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class Catalog:
+    """Catálogo de repositórios em memória, carregado uma única vez.
+
+    As linhas ficam pré-normalizadas (tags já separadas, nome e descrição já
+    em minúsculas) e indexadas por tag, owner, license e pelos tokens de
+    nome/descrição. Uma busca intersecta as listas de postings dos filtros
+    informados e só confere o texto das linhas candidatas, em vez de varrer
+    o CSV inteiro. Um índice BM25 sobre nome e descrição atende as buscas
+    ordenadas por relevância.
+    """
+
+    def __init__(self, rows: Iterable[CatalogRow], base: Optional['Catalog'] = None, epoch: Optional[str] = None):
+        if base is None:
+            self.rows: List[CatalogRow] = []
+            self._name_lower: List[str] = []
+            self._description_lower: List[str] = []
+            self._tag_index: Dict[str, array] = {}
+            self._owner_index: Dict[str, array] = {}
+            self._license_index: Dict[str, array] = {}
+            self._token_index: Dict[str, array] = {}
+            self._token_trigrams: Dict[str, Set[str]] = {}
+            self._deleted: frozenset = frozenset()
+            self._fuzzy: Optional[FuzzyVocabulary] = None
+            self._semantic: Optional[SemanticIndex] = None
+            # Compartilhado pelos snapshots derivados por extend/without/with_semantic
+            self._lineage = object()
+            owned = None
+        else:
+            # Cópia rasa do snapshot base: listas e dicionários novos, mas os
+            # postings só são copiados quando uma linha nova toca a chave
+            self.rows = list(base.rows)
+            self._name_lower = list(base._name_lower)
+            self._description_lower = list(base._description_lower)
+            self._tag_index = dict(base._tag_index)
+            self._owner_index = dict(base._owner_index)
+            self._license_index = dict(base._license_index)
+            self._token_index = dict(base._token_index)
+            self._token_trigrams = dict(base._token_trigrams)
+            self._deleted = base._deleted
+            # O vocabulário da busca aproximada só cresce, então é compartilhado
+            self._fuzzy = base._fuzzy
+            self._semantic = base._semantic
+            self._lineage = base._lineage
+            self.epoch = base.epoch
+            owned = set()
+        first = len(self.rows)
+        self._add_rows(rows, owned)
+        if base is None:
+            # O epoch dos cursores vem do conteúdo, não do processo: outros
+            # workers e reinícios com os mesmos dados aceitam os mesmos cursores
+            self.epoch = epoch or rows_digest(self.rows)[:8]
+        # Identifica o conteúdo do snapshot; o CatalogStore troca pelo hash do CSV
+        self.fingerprint = self.epoch
+        self._index_added(self.rows[first:])
+
+        documents = (f"{row.name} {row.description}" for row in self.rows[first:])
+        self._text_index = BM25Index(documents) if base is None else base._text_index.extend(documents)
+
+    def _add_rows(self, rows: Iterable[CatalogRow], owned: Optional[Set[Tuple[int, str]]]):
+        posting = self._posting
+        new_tokens = []
+        for row in rows:
+            idx = len(self.rows)
+            self.rows.append(row)
+            name_lower = row.name.lower()
+            description_lower = row.description.lower()
+            self._name_lower.append(name_lower)
+            self._description_lower.append(description_lower)
+
+            for tag in set(row.tags):
+                posting(self._tag_index, tag, owned).append(idx)
+            posting(self._owner_index, row.owner.lower(), owned).append(idx)
+            posting(self._license_index, row.license.lower(), owned).append(idx)
+            for token in set(name_lower.split()) | set(description_lower.split()):
+                if token not in self._token_index:
+                    new_tokens.append(token)
+                posting(self._token_index, token, owned).append(idx)
+
+        # Índice de trigramas sobre o vocabulário (não sobre as linhas):
+        # resolve "quais tokens contêm este trecho" sem varrer o vocabulário
+        for token in new_tokens:
+            for gram in _trigrams(token):
+                tokens = self._token_trigrams.get(gram)
+                if tokens is None:
+                    self._token_trigrams[gram] = {token}
+                elif owned is None or (id(self._token_trigrams), gram) in owned:
+                    tokens.add(token)
+                else:
+                    self._token_trigrams[gram] = tokens | {token}
+                    owned.add((id(self._token_trigrams), gram))
+
+    @staticmethod
+    def _posting(index: Dict[str, array], key: str, owned: Optional[Set[Tuple[int, str]]] = None) -> array:
+        posting = index.get(key)
+        if posting is None:
+            posting = index[key] = array('I')
+            if owned is not None:
+                owned.add((id(index), key))
+        elif owned is not None and (id(index), key) not in owned:
+            # Copy-on-write: o array pertence a um snapshot anterior
+            posting = index[key] = array('I', posting)
+            owned.add((id(index), key))
+        return posting
+
+    def extend(self, rows: Iterable[CatalogRow]) -> 'Catalog':
+        """Retorna um novo snapshot com `rows` acrescentadas ao final.
+
+        O snapshot atual não é alterado; só os postings tocados pelas linhas
+        novas são copiados.
+        """
+        return Catalog(rows, base=self)
+
+    def without(self, ids: Iterable[int]) -> 'Catalog':
+        """Retorna um novo snapshot em que as linhas `ids` não aparecem mais.
+
+        As linhas continuam no lugar (os índices e cursores seguem valendo) e
+        são só marcadas como removidas; a próxima reconstrução as descarta.
+        """
+        snapshot = copy.copy(self)
+        snapshot._deleted = self._deleted | frozenset(ids)
+        return snapshot
+
+    def with_semantic(self, semantic: SemanticIndex) -> 'Catalog':
+        """Retorna um novo snapshot igual a este, com outro índice de embeddings"""
+        snapshot = copy.copy(self)
+        snapshot._semantic = semantic
+        return snapshot
+
+    @classmethod
+    def from_csv(cls, path: str) -> 'Catalog':
+        """Carrega o catálogo a partir do repositories.csv"""
+        return cls(read_rows(path), epoch=file_digest(path)[:8])
+
+    def __len__(self) -> int:
+        return len(self.rows) - len(self._deleted)
+
+    @property
+    def ranking_ready(self) -> bool:
+        """Se `ranked_search` responde sem antes montar o índice BM25"""
+        return True
+
+    def prepare(self):
+        """Monta os índices de busca por relevância; aqui o BM25 já sai pronto da carga"""
+
+    @property
+    def fuzzy_ready(self) -> bool:
+        """Se `fuzzy_vocabulary` responde sem antes montar o vocabulário"""
+        return self._fuzzy is not None
+
+    def _vocabulary_terms(self) -> Tuple[Iterable[str], Iterable[str]]:
+        """(tags, nomes) de todas as linhas, para o vocabulário da busca aproximada"""
+        return list(self._tag_index), [row.name for row in self.rows]
+
+    def _index_added(self, rows: List[CatalogRow]):
+        """Leva linhas acrescentadas ao vocabulário da busca aproximada e aos embeddings"""
+        if self._fuzzy is not None:
+            self._fuzzy.add((tag for row in rows for tag in row.tags), (row.name for row in rows))
+        if self._semantic is not None and rows:
+            self._semantic = self._semantic.extend(f"{row.name} {row.description}" for row in rows)
+
+    def fuzzy_vocabulary(self) -> FuzzyVocabulary:
+        """Vocabulário de tags e nomes da busca aproximada, montado no primeiro uso"""
+        if self._fuzzy is None:
+            with _fuzzy_lock:
+                if self._fuzzy is None:
+                    vocabulary = FuzzyVocabulary()
+                    vocabulary.add(*self._vocabulary_terms())
+                    self._fuzzy = vocabulary
+        return self._fuzzy
+
+    def _documents(self) -> Iterable[str]:
+        """Nome e descrição de cada linha, o texto que vira embedding"""
+        return (f"{row.name} {row.description}" for row in self.rows)
+
+    def attach_embeddings(self, embedder):
+        """Calcula os embeddings de todas as linhas para a busca semântica,
+        antes de publicar o snapshot (depois, use CatalogStore.ensure_embeddings).
+        Os derivados dele os estendem."""
+        self._semantic = SemanticIndex.build(embedder, self._documents())
+
+    @property
+    def semantic_ready(self) -> bool:
+        """Se há embeddings para `semantic_search` e `hybrid_search`"""
+        return self._semantic is not None
+
+    def result(self, idx: int) -> Dict[str, Any]:
+        """Retorna a linha no formato do SearchResult"""
+        row = self.rows[idx]
+        return {
+            "name": row.name,
+            "description": row.description,
+            "url": row.url,
+            "tags": list(row.tags),
+            "owner": row.owner,
+            "license": row.license,
+            "version": row.version
+        }
+
+    def _tokens_containing(self, piece: str) -> Iterable[str]:
+        if len(piece) < 3:
+            return [token for token in self._token_index if piece in token]
+        grams = sorted(
+            (self._token_trigrams.get(gram, set()) for gram in _trigrams(piece)),
+            key=len
+        )
+        candidates = set(grams[0]).intersection(*grams[1:])
+        return [token for token in candidates if piece in token]
+
+    @staticmethod
+    def _union(postings: Iterable[Optional[array]]):
+        postings = [posting for posting in postings if posting]
+        if len(postings) == 1:
+            return postings[0]
+        return set().union(*postings)
+
+    def _filter_postings(self, tags: Optional[List[str]], owner: Optional[str], license: Optional[str]) -> list:
+        postings = []
+        if tags:
+            postings.append(self._union(self._tag_index.get(tag) for tag in tags))
+        if owner:
+            owner_lower = owner.lower()
+            postings.append(self._union(
+                posting for key, posting in self._owner_index.items() if owner_lower in key
+            ))
+        if license:
+            license_lower = license.lower()
+            postings.append(self._union(
+                posting for key, posting in self._license_index.items() if license_lower in key
+            ))
+        return postings
+
+    def iter_search(
+        self,
+        q: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        owner: Optional[str] = None,
+        license: Optional[str] = None,
+        after: int = -1
+    ) -> Iterator[int]:
+        """Gera, na ordem do arquivo, os índices das linhas que atendem aos filtros.
+
+        A semântica é a mesma da varredura original: `q` é substring de nome ou
+        descrição, basta uma das `tags` coincidir exatamente, e `owner`/`license`
+        são substrings sem diferenciar maiúsculas. Só são geradas linhas com
+        índice maior que `after`, o que permite paginar por cursor.
+        """
+        postings = self._filter_postings(tags, owner, license)
+        q_lower = q.lower() if q else None
+        if q_lower:
+            # Cada trecho sem espaços de `q` precisa estar dentro de um único
+            # token do texto, então os postings desses tokens são um superconjunto
+            for piece in q_lower.split():
+                postings.append(self._union(
+                    self._token_index[token] for token in self._tokens_containing(piece)
+                ))
+
+        if not postings:
+            ids: Iterable[int] = range(after + 1, len(self.rows))
+        else:
+            # A menor lista conduz a iteração; as demais só respondem pertinência
+            postings.sort(key=len)
+            driver = postings[0]
+            if not isinstance(driver, array):
+                driver = sorted(driver)
+            ids = islice(driver, bisect_right(driver, after), None)
+            others = [set(posting) if isinstance(posting, array) else posting for posting in postings[1:]]
+            if others:
+                ids = (idx for idx in ids if all(idx in posting for posting in others))
+
+        if q_lower:
+            name_lower = self._name_lower
+            description_lower = self._description_lower
+            ids = (
+                idx for idx in ids
+                if q_lower in name_lower[idx] or q_lower in description_lower[idx]
+            )
+        if self._deleted:
+            deleted = self._deleted
+            ids = (idx for idx in ids if idx not in deleted)
+        return iter(ids)
+
+    def iter_search_any(
+        self,
+        queries: List[Optional[str]],
+        tags: Optional[List[str]] = None,
+        owner: Optional[str] = None,
+        license: Optional[str] = None,
+        after: int = -1
+    ) -> Iterator[int]:
+        """Como `iter_search`, mas basta casar com um dos `queries` (as
+        variantes do q de uma busca aproximada); continua na ordem do arquivo"""
+        if len(queries) == 1:
+            return self.iter_search(q=queries[0], tags=tags, owner=owner, license=license, after=after)
+        merged = heapq.merge(*(
+            self.iter_search(q=q, tags=tags, owner=owner, license=license, after=after) for q in queries
+        ))
+        return (idx for idx, _ in groupby(merged))
+
+    def search(
+        self,
+        q: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        owner: Optional[str] = None,
+        license: Optional[str] = None
+    ) -> List[int]:
+        """Retorna todos os índices de `iter_search` numa lista"""
+        return list(self.iter_search(q=q, tags=tags, owner=owner, license=license))
+
+    def ranked_search(
+        self,
+        q: str,
+        tags: Optional[List[str]] = None,
+        owner: Optional[str] = None,
+        license: Optional[str] = None,
+        k: int = 10
+    ) -> List[int]:
+        """Os k índices mais relevantes para `q` segundo o BM25, já filtrados"""
+        return [idx for _, idx in self.scored_search(q, tags=tags, owner=owner, license=license, k=k)]
+
+    def scored_search(
+        self,
+        q: str,
+        tags: Optional[List[str]] = None,
+        owner: Optional[str] = None,
+        license: Optional[str] = None,
+        k: int = 10,
+        accept: Optional[Set[int]] = None
+    ) -> List[Tuple[float, int]]:
+        """Como `ranked_search`, mas em pares (score, índice). `accept`
+        restringe os candidatos a esses índices, além dos filtros."""
+        candidates = self._accept_set(tags, owner, license)
+        if candidates is not None:
+            accept = candidates if accept is None else candidates.intersection(accept)
+        if accept is not None and self._deleted:
+            accept = accept - self._deleted
+        if not self._deleted:
+            return self._text_index.top_k(q, k, accept)
+        # Pede a mais o suficiente para descartar as linhas removidas
+        ranked = self._text_index.top_k(q, k + len(self._deleted), accept)
+        return [(score, idx) for score, idx in ranked if idx not in self._deleted][:k]
+
+    def _accept_set(self, tags: Optional[List[str]], owner: Optional[str],
+                    license: Optional[str]) -> Optional[Set[int]]:
+        """Índices que passam nos filtros, ou None se não há filtros"""
+        postings = self._filter_postings(tags, owner, license)
+        if not postings:
+            return None
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+        return candidates
+
+    def semantic_scored_search(
+        self,
+        q: str,
+        tags: Optional[List[str]] = None,
+        owner: Optional[str] = None,
+        license: Optional[str] = None,
+        k: int = 10
+    ) -> List[Tuple[float, int]]:
+        """Os k índices mais próximos de `q` pelos embeddings (ANN), já
+        filtrados, em pares (cosseno, índice)"""
+        semantic = self._semantic
+        return semantic.search(semantic.embed_query(q), k, self._accept_set(tags, owner, license), self._deleted)
+
+    def semantic_search(
+        self,
+        q: str,
+        tags: Optional[List[str]] = None,
+        owner: Optional[str] = None,
+        license: Optional[str] = None,
+        k: int = 10
+    ) -> List[int]:
+        return [idx for _, idx in self.semantic_scored_search(q, tags=tags, owner=owner, license=license, k=k)]
+
+    def hybrid_search(
+        self,
+        q: str,
+        tags: Optional[List[str]] = None,
+        owner: Optional[str] = None,
+        license: Optional[str] = None,
+        k: int = 10,
+        alpha: float = 0.5
+    ) -> List[int]:
+        """Os k índices de maior `alpha * cosseno + (1 - alpha) * BM25`,
+        com o BM25 dividido pelo maior score entre os candidatos.
+
+        Os candidatos são os melhores de cada ranking (alguns múltiplos de
+        k); quem só aparece no BM25 tem o cosseno calculado, e quem só
+        aparece nos embeddings conta BM25 zero.
+        """
+        pool = max(4 * k, 50)
+        semantic = self._semantic
+        query = semantic.embed_query(q)
+        accept = self._accept_set(tags, owner, license)
+        cosine = {idx: score for score, idx in semantic.search(query, pool, accept, self._deleted)}
+        lexical = {idx: score for score, idx in self.scored_search(q, tags=tags, owner=owner, license=license, k=pool)}
+        missing = [idx for idx in lexical if idx not in cosine]
+        if missing:
+            cosine.update(zip(missing, semantic.similarity(query, missing).tolist()))
+        top = max(lexical.values(), default=0.0) or 1.0
+        blended = (
+            (alpha * max(score, 0.0) + (1 - alpha) * lexical.get(idx, 0.0) / top, -idx)
+            for idx, score in cosine.items()
+        )
+        return [-neg for _, neg in heapq.nlargest(k, blended)]
+
+    def encode_cursor(self, idx: int) -> str:
+        """Cursor opaco que aponta para depois da linha `idx` deste snapshot"""
+        return urlsafe_b64encode(f"{self.epoch}:{idx}".encode()).decode()
+
+    def decode_cursor(self, cursor: str) -> int:
+        """Converte o cursor de volta no índice da última linha já entregue.
+
+        Snapshots estendidos mantêm os índices e herdam o `epoch`; depois de uma
+        reconstrução completa os cursores antigos deixam de valer.
+        """
+        try:
+            epoch, idx = urlsafe_b64decode(cursor.encode()).decode().split(':')
+            if epoch == self.epoch:
+                return int(idx)
+        except ValueError:
+            pass
+        raise ValueError("Cursor inválido ou expirado")
+
+
+class CatalogStore:
+    """Mantém o snapshot atual do catálogo e o recarrega quando o CSV muda.
+
+    O snapshot é imutável e trocado por uma única atribuição de referência:
+    quem lê `store.snapshot` no começo da requisição usa aquele snapshot até o
+    fim, sem lock, e nunca enxerga um índice pela metade. A reconstrução roda
+    numa thread fora do event loop. Os `listeners` são chamados após cada
+    troca (por exemplo, para invalidar caches).
+
+    Serviços registrados em tempo de execução (`apply_registrations`) entram
+    no snapshot atual sem reler o CSV e são mantidos nas reconstruções.
+
+    Com `compiled_path`, o CSV é compilado no formato colunar
+    (services.columnar) e o snapshot lê esse arquivo via mmap. Com um
+    `embedder` (services.embeddings), os embeddings das linhas para a busca
+    semântica são calculados em cada carga (`embed_on_load`) ou só na
+    primeira busca semântica do snapshot (`ensure_embeddings`). A carga monta
+    índices e embeddings do CSV sem segurar o lock dos registros, e
+    `recluster_embeddings` refaz o IVF quando os registrados se acumulam.
+    """
+
+    def __init__(self, path: str, compiled_path: Optional[str] = None, embedder=None, embed_on_load: bool = True):
+        self.path = path
+        self.compiled_path = compiled_path
+        self.embedder = embedder
+        self.embed_on_load = embed_on_load
+        self._embed_lock = threading.Lock()
+        # Cópia com embeddings de cada snapshot que ainda não os tinha
+        self._embedded: 'weakref.WeakKeyDictionary[Catalog, Catalog]' = weakref.WeakKeyDictionary()
+        self.snapshot = Catalog([])
+        self.version = 0
+        self.last_rebuild: Optional[datetime] = None
+        self._stat: Optional[Tuple[int, int]] = None
+        self._hash: Optional[str] = None
+        self._registered: Dict[str, CatalogRow] = {}
+        self._registered_idx: Dict[str, int] = {}
+        self._registered_digest = ''
+        # Serializa quem troca o snapshot (recarga do CSV e registros); leitores não usam
+        self._lock = threading.Lock()
+        # Serializa as recargas, que montam o snapshot novo antes de pegar `_lock`
+        self._refresh_lock = threading.Lock()
+        self.listeners: List[Callable[[], None]] = []
+        self.logger = logging.getLogger(__name__)
+
+    def _file_hash(self) -> str:
+        return file_digest(self.path)
+
+    def _epoch(self, file_hash: str) -> str:
+        """Epoch de uma reconstrução: o CSV e, se houver, os serviços registrados que entram depois dele"""
+        if not self._registered:
+            return file_hash[:8]
+        return hashlib.sha256(f"{file_hash}:{self._registered_digest}".encode()).hexdigest()[:8]
+
+    def refresh(self) -> bool:
+        """Reconstrói o snapshot se o CSV mudou. Retorna True se houve troca"""
+        with self._refresh_lock:
+            stat = os.stat(self.path)
+            fingerprint = (stat.st_mtime_ns, stat.st_size)
+            if fingerprint == self._stat:
+                return False
+            file_hash = self._file_hash()
+            self._stat = fingerprint
+            if file_hash == self._hash:
+                return False
+
+            # Índices e embeddings das linhas do CSV saem fora de `_lock`, para
+            # não travar apply_registrations; os registrados entram depois
+            if self.compiled_path is not None:
+                from services.columnar import load_compiled
+                base = load_compiled(self.path, self.compiled_path, file_hash)
+                rows = None
+            else:
+                rows = read_rows(self.path)
+                current = self.snapshot
+                size = len(current.rows)
+                if self._hash is not None and not self._registered_idx and len(rows) > size and rows[:size] == current.rows:
+                    # Só houve linhas acrescentadas: indexa apenas as novas
+                    base = current.extend(rows[size:])
+                else:
+                    base = Catalog(rows, epoch=file_hash[:8])
+            if self.embedder is not None and self.embed_on_load and not base.semantic_ready:
+                base.attach_embeddings(self.embedder)
+
+            with self._lock:
+                snapshot = base
+                if self._registered:
+                    snapshot = base.extend(self._registered.values())
+                    if rows is not None:
+                        snapshot.epoch = self._epoch(file_hash)
+                self._reindex_registered(len(base.rows))
+                self._hash = file_hash
+                self._publish(snapshot)
+        self.logger.info("Catálogo recarregado - versão %d, %d repositórios", self.version, len(snapshot))
+        return True
+
+    def recluster_embeddings(self) -> bool:
+        """Refaz o IVF se as linhas registradas depois da carga, que têm busca
+        exata, passaram do limite (SemanticIndex.needs_rebuild). O k-means roda
+        fora de `_lock`; registros que chegam no meio são reaplicados no fim.
+        Bloqueia: rodar fora do event loop. Retorna True se houve troca"""
+        with self._refresh_lock:
+            current = self.snapshot
+            semantic = current._semantic
+            if semantic is None or not semantic.needs_rebuild:
+                return False
+            rebuilt = semantic.rebuilt()
+            with self._lock:
+                # Sem recarga no meio (_refresh_lock), o snapshot atual só pode ter
+                # crescido a partir de `current` por extend/without
+                latest = self.snapshot
+                added = latest.rows[len(current.rows):]
+                if added:
+                    rebuilt = rebuilt.extend(f"{row.name} {row.description}" for row in added)
+                self._publish(latest.with_semantic(rebuilt))
+        self.logger.info("Embeddings reagrupados - versão %d, %d linhas no IVF", self.version, len(rebuilt.vectors))
+        return True
+
+    def ensure_embeddings(self, snapshot: Catalog) -> Catalog:
+        """Retorna `snapshot` com embeddings, calculados uma vez só mesmo com
+        buscas concorrentes. O snapshot publicado não é alterado: se o atual
+        ainda deriva de `snapshot`, uma cópia com `with_semantic` toma o lugar
+        dele, com os registros que chegaram no meio reaplicados, como em
+        `recluster_embeddings`. Bloqueia: rodar fora do event loop"""
+        if snapshot.semantic_ready:
+            return snapshot
+        with self._embed_lock:
+            embedded = self._embedded.get(snapshot)
+            if embedded is None:
+                embedded = snapshot.with_semantic(SemanticIndex.build(self.embedder, snapshot._documents()))
+                self._embedded[snapshot] = embedded
+        with self._lock:
+            latest = self.snapshot
+            if (not latest.semantic_ready and latest._lineage is snapshot._lineage
+                    and len(latest.rows) >= len(snapshot.rows)):
+                semantic = embedded._semantic
+                added = latest.rows[len(snapshot.rows):]
+                if added:
+                    semantic = semantic.extend(f"{row.name} {row.description}" for row in added)
+                self._publish(latest.with_semantic(semantic))
+        return embedded
+
+    def _reindex_registered(self, first: int):
+        # Numa reconstrução, os registrados vêm logo depois das linhas do CSV
+        self._registered_idx = {service_id: first + i for i, service_id in enumerate(self._registered)}
+
+    def apply_registrations(self, added: Dict[str, CatalogRow], removed: Iterable[str] = ()):
+        """Publica serviços registrados/removidos sem reler o CSV.
+
+        Os novos entram no fim do snapshot atual via `extend`; os removidos
+        são marcados com `without`. As buscas seguintes já os enxergam.
+        """
+        removed = list(removed)
+        with self._lock:
+            snapshot = self.snapshot
+            replaced = [self._registered_idx[service_id] for service_id in added if service_id in self._registered_idx]
+            gone = [self._registered_idx.pop(service_id) for service_id in removed if service_id in self._registered_idx]
+            for service_id in removed:
+                self._registered.pop(service_id, None)
+            if added:
+                first = len(snapshot.rows)
+                snapshot = snapshot.extend(added.values())
+                for i, (service_id, row) in enumerate(added.items()):
+                    self._registered[service_id] = row
+                    self._registered_idx[service_id] = first + i
+            if replaced or gone:
+                snapshot = snapshot.without(replaced + gone)
+            if snapshot is not self.snapshot:
+                digest = hashlib.sha256(self._registered_digest.encode())
+                for service_id, row in added.items():
+                    digest.update(f"+{service_id}:{row!r}".encode())
+                for service_id in removed:
+                    digest.update(f"-{service_id}".encode())
+                self._registered_digest = digest.hexdigest()[:16]
+                self._publish(snapshot)
+
+    def _publish(self, snapshot: Catalog):
+        # A impressão digital cobre o CSV e os serviços registrados, para que
+        # caches de consulta (inclusive os compartilhados) não misturem versões
+        if self._registered_idx:
+            snapshot.fingerprint = f"{self._hash}:{self._registered_digest}"
+        else:
+            snapshot.fingerprint = self._hash or snapshot.epoch
+        self.version += 1
+        self.last_rebuild = datetime.now()
+        self.snapshot = snapshot
+        for listener in self.listeners:
+            listener()
+
+    async def watch(self, interval: float = 5.0):
+        """Verifica o CSV periodicamente e troca o snapshot quando ele muda"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await loop.run_in_executor(None, self.refresh)
+                await loop.run_in_executor(None, self.recluster_embeddings)
+            except FileNotFoundError:
+                self.logger.error("Catálogo não encontrado em %s", self.path)
+            except Exception as e:
+                self.logger.error("Erro ao recarregar o catálogo: %s", e)
+
+    def status(self) -> Dict[str, Any]:
+        """Versão e horário da última reconstrução do snapshot"""
+        return {
+            "version": self.version,
+            "last_rebuild": self.last_rebuild.isoformat() if self.last_rebuild else None,
+            "total_count": len(self.snapshot),
+            "source_hash": self._hash
+        }
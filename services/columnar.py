@@ -0,0 +1,520 @@
+import copy
+import csv
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+from collections.abc import Sequence
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from services.catalog import Catalog, CatalogRow, parse_tags
+from services.text_index import BM25Index
+
+# Arquivo: MAGIC, offset do cabeçalho (u64), seções alinhadas a 64 bytes e,
+# no fim, o cabeçalho JSON com a tabela de seções (offset, dtype, tamanho)
+MAGIC = b'PCATv2\0\0'
+_PREFIX = struct.Struct('<8sQ')
+_ALIGNMENT = 64
+
+STRING_COLUMNS = ('name', 'description', 'url', 'version')
+# Pool de busca do q: nome e descrição em minúsculas, cada um terminado em \0,
+# para que um trecho nunca case atravessando campos ou linhas
+TEXT_COLUMN = 'text'
+DICTIONARY_COLUMNS = ('owner', 'license')
+
+
+def _pool(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """String pool: offsets (n + 1) e os bytes UTF-8 concatenados"""
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+
+def _encode_dictionary(values: Iterable[str], dictionary: Dict[str, int]) -> array:
+    """Códigos inteiros dos valores; valores novos entram no fim do dicionário"""
+    return array('I', (dictionary.setdefault(value, len(dictionary)) for value in values))
+
+
+def compile_catalog(csv_path: str, out_path: str, source_hash: str = '') -> str:
+    """Compila o repositories.csv no formato colunar lido por ColumnarCatalog.
+
+    Texto vai para string pools; owner, license e tags viram códigos de
+    dicionário; cada tag tem um bitmap de linhas (tags frequentes) ou uma
+    lista ordenada de linhas (tags raras), o que ocupar menos. O arquivo é
+    escrito ao lado e trocado com os.replace, então leitores nunca veem um
+    arquivo pela metade.
+    """
+    columns: Dict[str, List[str]] = {column: [] for column in STRING_COLUMNS + DICTIONARY_COLUMNS}
+    row_tags: List[Tuple[str, ...]] = []
+    with open(csv_path, 'r', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            for column, values in columns.items():
+                values.append(row[column])
+            row_tags.append(parse_tags(row['tags']))
+    count = len(row_tags)
+
+    sections: Dict[str, np.ndarray] = {}
+    for column in STRING_COLUMNS:
+        sections[f'{column}.offsets'], sections[f'{column}.data'] = _pool(columns[column])
+    sections[f'{TEXT_COLUMN}.offsets'], sections[f'{TEXT_COLUMN}.data'] = _pool([
+        f"{name.lower()}\0{description.lower()}\0" for name, description in zip(columns['name'], columns['description'])
+    ])
+    for column in DICTIONARY_COLUMNS:
+        dictionary: Dict[str, int] = {}
+        sections[f'{column}.codes'] = np.frombuffer(_encode_dictionary(columns[column], dictionary), dtype=np.uint32)
+        sections[f'{column}.dict.offsets'], sections[f'{column}.dict.data'] = _pool(list(dictionary))
+
+    # Tags de cada linha (CSR, na ordem do CSV) e as linhas de cada tag
+    tag_dictionary: Dict[str, int] = {}
+    tag_codes = array('I')
+    tag_offsets = array('Q', [0])
+    tag_rows: List[array] = []
+    for idx, tags in enumerate(row_tags):
+        tag_codes.extend(_encode_dictionary(tags, tag_dictionary))
+        tag_offsets.append(len(tag_codes))
+        for tag in dict.fromkeys(tags):
+            code = tag_dictionary[tag]
+            if code == len(tag_rows):
+                tag_rows.append(array('I'))
+            tag_rows[code].append(idx)
+    sections['tags.offsets'] = np.frombuffer(tag_offsets, dtype=np.uint64)
+    sections['tags.codes'] = np.frombuffer(tag_codes, dtype=np.uint32)
+    sections['tag.dict.offsets'], sections['tag.dict.data'] = _pool(list(tag_dictionary))
+
+    # Bitmap custa n/8 bytes; a lista, 4 bytes por linha: bitmap acima de n/32 linhas
+    bitmap_bytes = (count + 7) // 8
+    bitmaps = []
+    postings = []
+    posting_offsets = array('Q', [0])
+    bitmap_slots = array('q')
+    for rows in tag_rows:
+        if len(rows) * 32 >= count:
+            mask = np.zeros(bitmap_bytes * 8, dtype=bool)
+            mask[np.frombuffer(rows, dtype=np.uint32)] = True
+            bitmap_slots.append(len(bitmaps))
+            bitmaps.append(np.packbits(mask, bitorder='little'))
+        else:
+            bitmap_slots.append(-1)
+            postings.append(np.frombuffer(rows, dtype=np.uint32))
+        posting_offsets.append(posting_offsets[-1] + (len(rows) if bitmap_slots[-1] < 0 else 0))
+    sections['tag.bitmap_slots'] = np.frombuffer(bitmap_slots, dtype=np.int64)
+    sections['tag.bitmaps'] = np.concatenate(bitmaps) if bitmaps else np.zeros(0, dtype=np.uint8)
+    sections['tag.postings.offsets'] = np.frombuffer(posting_offsets, dtype=np.uint64)
+    sections['tag.postings'] = np.concatenate(postings) if postings else np.zeros(0, dtype=np.uint32)
+
+    tmp_path = f'{out_path}.{os.getpid()}.tmp'
+    table = {}
+    with open(tmp_path, 'wb') as file:
+        file.write(_PREFIX.pack(MAGIC, 0))
+        for name, data in sections.items():
+            file.write(b'\0' * (-file.tell() % _ALIGNMENT))
+            table[name] = [file.tell(), data.dtype.str, int(data.size)]
+            file.write(np.ascontiguousarray(data).tobytes())
+        header_offset = file.tell()
+        file.write(json.dumps({
+            'rows': count, 'source_hash': source_hash, 'bitmap_bytes': bitmap_bytes, 'sections': table
+        }).encode('utf-8'))
+        file.seek(0)
+        file.write(_PREFIX.pack(MAGIC, header_offset))
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def compiled_source_hash(path: str) -> Optional[str]:
+    """Hash do CSV de origem gravado no arquivo compilado, ou None se não houver um válido"""
+    try:
+        with open(path, 'rb') as file:
+            magic, header_offset = _PREFIX.unpack(file.read(_PREFIX.size))
+            if magic != MAGIC:
+                return None
+            file.seek(header_offset)
+            return json.loads(file.read())['source_hash']
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+class _Rows(Sequence):
+    """`rows` do catálogo colunar: cada linha é decodificada quando acessada"""
+
+    def __init__(self, catalog: 'ColumnarCatalog'):
+        self._catalog = catalog
+
+    def __len__(self) -> int:
+        return self._catalog._count + len(self._catalog._overlay.rows)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if idx < 0:
+            raise IndexError(idx)
+        return self._catalog._row(idx)
+
+
+class _LazyText:
+    """Catálogo só com nome e descrição, para a ordenação por relevância (BM25).
+
+    Construído uma vez por processo, na primeira busca por relevância (ou
+    por `prepare`), e compartilhado pelos snapshots derivados.
+    """
+
+    def __init__(self, build: Callable[[], Catalog]):
+        self._build = build
+        self._lock = threading.Lock()
+        self.catalog: Optional[Catalog] = None
+
+    def get(self) -> Catalog:
+        if self.catalog is None:
+            with self._lock:
+                if self.catalog is None:
+                    self.catalog = self._build()
+        return self.catalog
+
+
+class ColumnarCatalog(Catalog):
+    """Catálogo lido de um arquivo compilado por `compile_catalog` via mmap.
+
+    As colunas são arrays NumPy sobre o mmap, sem cópia: abrir o arquivo é
+    quase instantâneo e vários workers compartilham a mesma cópia no page
+    cache. Os filtros de tags, owner e license são máscaras vetorizadas,
+    calculadas em blocos de BLOCK_SIZE linhas para que a paginação só
+    processe os blocos que consome; o `q` é procurado direto num pool de
+    texto em minúsculas. Só o índice BM25 da ordenação por relevância fica
+    em memória, montado sob demanda.
+
+    Linhas acrescentadas por `extend` (serviços registrados) vão para um
+    Catalog comum em memória, posicionado depois das linhas do arquivo.
+    """
+
+    BLOCK_SIZE = 1 << 16
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_offset = _PREFIX.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Arquivo de catálogo colunar inválido: {path}")
+        header = json.loads(self._mmap[header_offset:])
+        self.path = path
+        self.source_hash: str = header['source_hash']
+        self._count: int = header['rows']
+        self._bitmap_bytes: int = header['bitmap_bytes']
+        self._columns = {
+            name: np.frombuffer(self._mmap, dtype=np.dtype(dtype), count=size, offset=offset)
+            for name, (offset, dtype, size) in header['sections'].items()
+        }
+        # Posição no arquivo dos bytes de cada string pool: as linhas são lidas direto do mmap
+        self._data_offsets = {
+            column: header['sections'][f'{column}.data'][0] for column in STRING_COLUMNS + (TEXT_COLUMN,)
+        }
+        self._dictionaries = {
+            column: self._decode_pool(column + '.dict') for column in DICTIONARY_COLUMNS + ('tag',)
+        }
+        self._tag_codes = {tag: code for code, tag in enumerate(self._dictionaries['tag'])}
+        self._overlay = Catalog([])
+        self._deleted: frozenset = frozenset()
+        self._fuzzy = None
+        self._semantic = None
+        self._lineage = object()
+        self._text = _LazyText(self._build_text)
+        # Índice BM25 do arquivo estendido com as linhas do overlay, montado na primeira busca por relevância
+        self._ranking: Optional[BM25Index] = None
+        self.rows = _Rows(self)
+        self.epoch = (self.source_hash or os.path.basename(path))[:8]
+        self.fingerprint = self.epoch
+
+    def _decode_pool(self, name: str) -> List[str]:
+        offsets = self._columns[f'{name}.offsets'].tolist()
+        data = self._columns[f'{name}.data'].tobytes()
+        return [data[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
+
+    def _string(self, column: str, idx: int) -> str:
+        offsets = self._columns[f'{column}.offsets']
+        base = self._data_offsets[column]
+        return self._mmap[base + int(offsets[idx]):base + int(offsets[idx + 1])].decode('utf-8')
+
+    def _row(self, idx: int) -> CatalogRow:
+        if idx >= self._count:
+            return self._overlay.rows[idx - self._count]
+        columns = self._columns
+        tags = columns['tags.codes'][int(columns['tags.offsets'][idx]):int(columns['tags.offsets'][idx + 1])]
+        tag_names = self._dictionaries['tag']
+        return CatalogRow(
+            name=self._string('name', idx),
+            description=self._string('description', idx),
+            url=self._string('url', idx),
+            tags=tuple(tag_names[code] for code in tags.tolist()),
+            owner=self._dictionaries['owner'][int(columns['owner.codes'][idx])],
+            license=self._dictionaries['license'][int(columns['license.codes'][idx])],
+            version=self._string('version', idx)
+        )
+
+    def _build_text(self) -> Catalog:
+        return Catalog(
+            (CatalogRow(self._string('name', idx), self._string('description', idx), '', (), '', '', '')
+             for idx in range(self._count)),
+            epoch=self.epoch
+        )
+
+    def _ranking_index(self) -> BM25Index:
+        """Índice do arquivo estendido com as linhas registradas, como em
+        `Catalog.extend`: elas são pontuadas com o N, o avgdl e o df do arquivo"""
+        index = self._ranking
+        if index is None:
+            index = self._text.get()._text_index
+            if len(self._overlay.rows):
+                index = index.extend(self._overlay._documents())
+            # Duas threads podem montá-lo ao mesmo tempo; o resultado é o mesmo
+            self._ranking = index
+        return index
+
+    @property
+    def ranking_ready(self) -> bool:
+        return self._text.catalog is not None
+
+    def prepare(self):
+        """Monta o índice BM25 agora, em vez de na primeira busca por relevância"""
+        self._ranking_index()
+
+    def _documents(self) -> Iterable[str]:
+        return chain(
+            (f"{self._string('name', idx)} {self._string('description', idx)}" for idx in range(self._count)),
+            self._overlay._documents()
+        )
+
+    def _accept_set(self, tags: Optional[List[str]], owner: Optional[str],
+                    license: Optional[str]) -> Optional[Set[int]]:
+        block_filter = self._block_filter(tags, owner, license)
+        if block_filter is None:
+            return None
+        accepted = set(self._iter_blocks(block_filter, None, 0, self._count))
+        count = self._count
+        accepted.update(count + idx for idx in self._overlay._accept_set(tags, owner, license))
+        return accepted
+
+    def _vocabulary_terms(self) -> Tuple[Iterable[str], Iterable[str]]:
+        tags, names = self._overlay._vocabulary_terms()
+        return self._dictionaries['tag'] + tags, self._decode_pool('name') + names
+
+    def extend(self, rows: Iterable[CatalogRow]) -> 'ColumnarCatalog':
+        snapshot = copy.copy(self)
+        first = len(self._overlay.rows)
+        snapshot._overlay = self._overlay.extend(rows)
+        snapshot.rows = _Rows(snapshot)
+        added = snapshot._overlay.rows[first:]
+        snapshot._index_added(added)
+        if self._ranking is not None:
+            snapshot._ranking = self._ranking.extend(f"{row.name} {row.description}" for row in added)
+        return snapshot
+
+    def without(self, ids: Iterable[int]) -> 'ColumnarCatalog':
+        snapshot = copy.copy(self)
+        snapshot._deleted = self._deleted | frozenset(ids)
+        snapshot.rows = _Rows(snapshot)
+        return snapshot
+
+    def __len__(self) -> int:
+        return len(self.rows) - len(self._deleted)
+
+    def result(self, idx: int) -> Dict[str, Any]:
+        row = self._row(idx)
+        return {
+            "name": row.name,
+            "description": row.description,
+            "url": row.url,
+            "tags": list(row.tags),
+            "owner": row.owner,
+            "license": row.license,
+            "version": row.version
+        }
+
+    def _block_filter(
+        self, tags: Optional[List[str]], owner: Optional[str], license: Optional[str]
+    ) -> Optional[Callable[[int, int], np.ndarray]]:
+        """Função (início, fim) -> máscara booleana das linhas do bloco que
+        passam nos filtros, ou None se não há filtros. Filtros sem nenhum
+        valor correspondente viram uma máscara sempre vazia."""
+        columns = self._columns
+        steps: List[Callable[[int, int, Optional[np.ndarray]], np.ndarray]] = []
+        if tags:
+            codes = [self._tag_codes[tag] for tag in dict.fromkeys(tags) if tag in self._tag_codes]
+            slots = columns['tag.bitmap_slots']
+            posting_offsets = columns['tag.postings.offsets']
+            bitmaps = columns['tag.bitmaps']
+            postings = columns['tag.postings']
+
+            def tag_step(start: int, end: int, mask: Optional[np.ndarray]) -> np.ndarray:
+                block = np.zeros(end - start, dtype=bool)
+                for code in codes:
+                    slot = int(slots[code])
+                    if slot >= 0:
+                        base = slot * self._bitmap_bytes
+                        bits = bitmaps[base + start // 8:base + (end + 7) // 8]
+                        block |= np.unpackbits(bits, count=end - start, bitorder='little').view(bool)
+                    else:
+                        rows = postings[int(posting_offsets[code]):int(posting_offsets[code + 1])]
+                        hits = rows[np.searchsorted(rows, start):np.searchsorted(rows, end)]
+                        block[hits - start] = True
+                return block if mask is None else mask & block
+
+            steps.append(tag_step)
+
+        for column, value in (('owner', owner), ('license', license)):
+            if not value:
+                continue
+            value = value.lower()
+            # Substring sem diferenciar maiúsculas, avaliada uma vez por valor do dicionário
+            lookup = np.fromiter(
+                (value in entry.lower() for entry in self._dictionaries[column]),
+                dtype=bool, count=len(self._dictionaries[column])
+            )
+            codes_column = columns[f'{column}.codes']
+
+            def dictionary_step(start, end, mask, lookup=lookup, codes_column=codes_column):
+                block = lookup[codes_column[start:end]]
+                return block if mask is None else mask & block
+
+            steps.append(dictionary_step)
+
+        if not steps:
+            return None
+
+        def block_filter(start: int, end: int) -> np.ndarray:
+            mask = None
+            for step in steps:
+                mask = step(start, end, mask)
+                if not mask.any():
+                    break
+            return mask
+
+        return block_filter
+
+    @property
+    def file_rows(self) -> int:
+        """Linhas vindas do arquivo; as registradas vêm depois delas"""
+        return self._count
+
+    def text_bytes(self, start: int = 0, end: Optional[int] = None) -> int:
+        """Bytes do pool de texto das linhas [start, end): o custo de procurar um q nelas"""
+        offsets = self._columns[f'{TEXT_COLUMN}.offsets']
+        return int(offsets[self._count if end is None else end]) - int(offsets[min(start, self._count)])
+
+    def _find(self, needle: bytes, start: int, end: int) -> Iterator[int]:
+        """Linhas em [start, end) cujo texto contém `needle`, via mmap.find: a
+        varredura roda em C e pula para a linha seguinte a cada ocorrência"""
+        offsets = self._columns[f'{TEXT_COLUMN}.offsets']
+        base = self._data_offsets[TEXT_COLUMN]
+        limit = base + int(offsets[end])
+        pos = self._mmap.find(needle, base + int(offsets[start]), limit)
+        while pos != -1:
+            # Com o valor em uint64 o searchsorted não converte o array inteiro a cada chamada
+            idx = int(offsets.searchsorted(np.uint64(pos - base), side='right')) - 1
+            yield idx
+            pos = self._mmap.find(needle, base + int(offsets[idx + 1]), limit)
+
+    def _contains(self, needle: bytes, idx: int) -> bool:
+        offsets = self._columns[f'{TEXT_COLUMN}.offsets']
+        base = self._data_offsets[TEXT_COLUMN]
+        return self._mmap.find(needle, base + int(offsets[idx]), base + int(offsets[idx + 1])) != -1
+
+    def iter_range(
+        self,
+        q: Optional[str],
+        tags: Optional[List[str]],
+        owner: Optional[str],
+        license: Optional[str],
+        start: int,
+        end: int
+    ) -> Iterator[int]:
+        """Linhas do arquivo em [start, end) que atendem aos filtros, em ordem.
+
+        Tags/owner/license são máscaras por bloco; `q` é procurado como
+        substring nos bytes do pool de texto, só nas linhas que passaram
+        pelas máscaras. É a unidade de trabalho dos shards da busca paralela.
+        """
+        end = min(end, self._count)
+        block_filter = self._block_filter(tags, owner, license)
+        needle = q.lower().encode('utf-8') if q else None
+        if needle is not None and b'\0' in needle:
+            return iter(())
+        if block_filter is None:
+            return self._find(needle, start, end) if needle is not None else iter(range(start, end))
+        return self._iter_blocks(block_filter, needle, start, end)
+
+    def _iter_blocks(self, block_filter: Callable[[int, int], np.ndarray], needle: Optional[bytes],
+                     start: int, end: int) -> Iterator[int]:
+        block = start // self.BLOCK_SIZE * self.BLOCK_SIZE
+        while block < end:
+            # Blocos alinhados, para que os bitmaps sejam fatiados em bytes inteiros
+            block_end = min(block + self.BLOCK_SIZE, self._count)
+            mask = block_filter(block, block_end)
+            lo, hi = max(start, block), min(end, block_end)
+            hits = np.flatnonzero(mask[lo - block:hi - block]) + lo
+            if needle is None:
+                yield from hits.tolist()
+            else:
+                yield from (idx for idx in hits.tolist() if self._contains(needle, idx))
+            block = block_end
+
+    def finish_search(
+        self,
+        ids: Iterable[int],
+        q: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        owner: Optional[str] = None,
+        license: Optional[str] = None,
+        after: int = -1
+    ) -> Iterator[int]:
+        """Completa os resultados das linhas do arquivo (`ids`) com os serviços
+        registrados e descarta as linhas removidas"""
+        ids = iter(ids)
+        if len(self._overlay.rows):
+            count = self._count
+            added = self._overlay.iter_search(q=q, tags=tags, owner=owner, license=license,
+                                              after=max(-1, after - count))
+            ids = chain(ids, (count + idx for idx in added))
+        if self._deleted:
+            deleted = self._deleted
+            ids = (idx for idx in ids if idx not in deleted)
+        return ids
+
+    def iter_search(
+        self,
+        q: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        owner: Optional[str] = None,
+        license: Optional[str] = None,
+        after: int = -1
+    ) -> Iterator[int]:
+        ids = self.iter_range(q, tags, owner, license, after + 1, self._count)
+        return self.finish_search(ids, q=q, tags=tags, owner=owner, license=license, after=after)
+
+    def scored_search(
+        self,
+        q: str,
+        tags: Optional[List[str]] = None,
+        owner: Optional[str] = None,
+        license: Optional[str] = None,
+        k: int = 10,
+        accept: Optional[Set[int]] = None
+    ) -> List[Tuple[float, int]]:
+        candidates = self._accept_set(tags, owner, license)
+        if candidates is not None:
+            accept = candidates if accept is None else candidates.intersection(accept)
+        # Um índice só para arquivo e overlay: os scores das duas partes são comparáveis
+        ranked = self._ranking_index().top_k(q, k + len(self._deleted), accept)
+        return [(score, idx) for score, idx in ranked if idx not in self._deleted][:k]
+
+
+def load_compiled(csv_path: str, compiled_path: str, source_hash: str) -> ColumnarCatalog:
+    """Abre o catálogo compilado, compilando antes se ele não corresponder ao CSV"""
+    if compiled_source_hash(compiled_path) != source_hash:
+        compile_catalog(csv_path, compiled_path, source_hash)
+    return ColumnarCatalog(compiled_path)
@@ -0,0 +1,227 @@
+import asyncio
+import random
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from services.metrics import REGISTRY as METRICS
+
+EXECUTION_LATENCY = METRICS.histogram(
+    'protoai_execution_attempt_duration_seconds',
+    'Tempo de cada tentativa de execução por serviço (ou host, sem nome)', ('service',)
+)
+
+
+class DispatchError(Exception):
+    """Falha ao executar uma operação num serviço descoberto"""
+
+
+# Métodos que podem ser repetidos sem efeito colateral a mais (RFC 9110, 9.2.2)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"})
+# Falhas em que a requisição certamente não saiu: qualquer método pode repetir
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class CircuitBreaker:
+    """Circuit breaker por upstream.
+
+    Depois de `failure_threshold` falhas seguidas o circuito abre e as chamadas
+    falham na hora por `reset_timeout` segundos; então uma única chamada de
+    teste é liberada (half-open) e o resultado dela fecha ou reabre o circuito.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_progress = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_in_progress:
+            self.trial_in_progress = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_progress = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_progress = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """Chamada liberada por `allow` terminou sem resultado (cancelada)"""
+        self.trial_in_progress = False
+
+
+class ExecutionDispatcher:
+    """Executa operações de intenções "execution" nos serviços descobertos.
+
+    O serviço é resolvido pelo nome via /search e o endpoint pela interface de
+    acesso do manifesto do serviço (`{url}/protoai/readme.protobuf`) que lista
+    a operação. A chamada usa o cliente em pool do RegistryService, com prazo
+    total por chamada, retentativas com backoff exponencial e jitter e um
+    circuit breaker por upstream.
+
+    Operações no formato "POST /caminho" enviam `parameters` como JSON; as
+    demais ("/caminho" ou "GET /caminho") enviam como query string. Só os
+    métodos idempotentes são repetidos depois de uma resposta de erro ou de
+    um timeout; POST e PATCH só quando a conexão nem chegou a ser feita.
+    """
+
+    def __init__(
+        self,
+        registry,
+        deadline: float = 5.0,
+        max_retries: int = 2,
+        backoff_base: float = 0.1,
+        backoff_max: float = 2.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        manifest_ttl: float = 60.0
+    ):
+        self.registry = registry
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.manifest_ttl = manifest_ttl
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._endpoints: Dict[Tuple[str, str], Tuple[str, str, float]] = {}
+
+    def _breaker(self, url: str) -> CircuitBreaker:
+        parts = urlsplit(url)
+        upstream = f"{parts.scheme}://{parts.netloc}"
+        breaker = self.breakers.get(upstream)
+        if breaker is None:
+            breaker = self.breakers[upstream] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return breaker
+
+    async def resolve(self, service_name: str, operation: str, deadline_at: float) -> Tuple[str, str]:
+        """Resolve (serviço, operação) para (método HTTP, URL) usando o manifesto"""
+        key = (service_name, operation)
+        cached = self._endpoints.get(key)
+        if cached is not None and cached[2] > time.monotonic():
+            return cached[0], cached[1]
+
+        response = await self._call("GET", f"{self.registry.mcp_url}/search", deadline_at, params={"q": service_name})
+        services = [service for service in response.json()["results"] if service["name"] == service_name]
+        if not services:
+            raise DispatchError(f"Serviço não encontrado: {service_name}")
+
+        manifest = (await self._call(
+            "GET", f"{services[0]['url'].rstrip('/')}/protoai/readme.protobuf", deadline_at
+        )).json()
+        method, _, path = operation.partition(" ") if " " in operation else ("GET", "", operation)
+        for interface in manifest.get("communication_details", {}).get("access_interfaces", []):
+            if operation in interface.get("available_methods_or_operations", []):
+                url = interface["base_url_or_address"].rstrip("/") + "/" + path.lstrip("/")
+                self._endpoints[key] = (method.upper(), url, time.monotonic() + self.manifest_ttl)
+                return method.upper(), url
+        raise DispatchError(f"Operação {operation} não declarada no manifesto de {service_name}")
+
+    async def _call(self, method: str, url: str, deadline_at: float, label: Optional[str] = None,
+                    **kwargs) -> httpx.Response:
+        """Uma requisição com prazo, retentativas e circuit breaker.
+
+        A latência de cada tentativa vai para EXECUTION_LATENCY com o rótulo
+        `label` (o nome do serviço) ou, sem ele, o host.
+        """
+        breaker = self._breaker(url)
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                raise DispatchError(f"Prazo excedido chamando {url}")
+            if not breaker.allow():
+                raise DispatchError(f"Circuito aberto para {url}")
+
+            started = time.perf_counter()
+            # Resultado da tentativa para o breaker: True, False ou None (cancelada)
+            succeeded = None
+            try:
+                # wait_for cobre também a espera pelo semáforo do upstream
+                response = await asyncio.wait_for(
+                    self.registry._request(method, url, timeout=remaining, **kwargs), remaining
+                )
+                failed = response.status_code == 429 or response.status_code >= 500
+                error = f"HTTP {response.status_code}" if failed else None
+                retryable = failed and idempotent
+            except (httpx.TransportError, asyncio.TimeoutError) as e:
+                response, failed, error = None, True, f"{type(e).__name__}: {str(e)}"
+                retryable = idempotent or isinstance(e, NOT_SENT_ERRORS)
+                succeeded = False
+            except Exception:
+                succeeded = False
+                raise
+            else:
+                succeeded = not failed
+            finally:
+                # Qualquer saída registra o resultado; sem isso uma chamada de
+                # teste interrompida deixaria o circuito meio aberto para sempre
+                if succeeded is True:
+                    breaker.record_success()
+                elif succeeded is False:
+                    breaker.record_failure()
+                else:
+                    breaker.release()
+            EXECUTION_LATENCY.labels(label or urlsplit(url).netloc).observe(time.perf_counter() - started)
+
+            if not failed:
+                if response.status_code >= 400:
+                    raise DispatchError(f"{url} respondeu HTTP {response.status_code}")
+                return response
+
+            attempt += 1
+            if not retryable:
+                raise DispatchError(f"Falha chamando {url} ({method.upper()} não é repetido): {error}")
+            if attempt > self.max_retries:
+                raise DispatchError(f"Falha chamando {url} após {attempt} tentativas: {error}")
+            # Backoff exponencial com jitter total, sem ultrapassar o prazo
+            backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+            await asyncio.sleep(min(backoff, max(0.0, deadline_at - time.monotonic())))
+
+    async def execute(
+        self,
+        service_name: str,
+        operation: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        deadline: Optional[float] = None
+    ) -> Any:
+        """Executa a operação e retorna o corpo da resposta (JSON quando possível)"""
+        deadline_at = time.monotonic() + (deadline if deadline is not None else self.deadline)
+        method, url = await self.resolve(service_name, operation, deadline_at)
+        if method == "GET":
+            response = await self._call(method, url, deadline_at, label=service_name, params=parameters or {})
+        else:
+            response = await self._call(method, url, deadline_at, label=service_name, json=parameters or {})
+        if response.headers.get("content-type", "").startswith("application/json"):
+            return response.json()
+        return response.text
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado dos circuit breakers por upstream; as latências estão em EXECUTION_LATENCY (/metrics)"""
+        return {
+            "circuits": {upstream: breaker.state for upstream, breaker in self.breakers.items()}
+        }
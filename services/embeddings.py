@@ -0,0 +1,149 @@
+import logging
+import re
+import threading
+import zlib
+from importlib.util import find_spec
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from services.text_index import fold
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class HashingEmbedder:
+    """Embeddings sem modelo: hashing vectorizer sobre as palavras do texto
+    (normalizadas por `fold`) e os trigramas de letras de cada palavra.
+
+    Os trigramas aproximam palavras da mesma família ("pagamento",
+    "pagamentos") e toleram variações de escrita. Cada traço cai numa das
+    `dim` posições com sinal ±1 pelo CRC32, que não muda entre processos
+    (ao contrário do hash() do Python). Os vetores saem com norma 1.
+    """
+
+    name = "hashing"
+    # Traços de palavras já calculados; limpo ao passar de MAX_CACHED
+    MAX_CACHED = 200_000
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self._cache: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _features(self, word: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Posições e pesos dos traços de uma palavra (em minúsculas; a
+        normalização de acentos fica aqui, uma vez por palavra)"""
+        features = self._cache.get(word)
+        if features is None:
+            folded = fold(word)
+            padded = f"<{folded}>"
+            grams = [folded] + [padded[i:i + 3] for i in range(len(padded) - 2)]
+            digests = np.array([zlib.crc32(gram.encode()) for gram in grams], dtype=np.int64)
+            weights = np.full(len(grams), 0.5)
+            weights[0] = 1.0
+            weights[digests & (1 << 31) != 0] *= -1
+            if len(self._cache) >= self.MAX_CACHED:
+                self._cache.clear()
+            features = self._cache[word] = (digests % self.dim, weights)
+        return features
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        # Cada palavra distinta do lote ganha um id local; os textos viram
+        # listas desses ids e os traços são expandidos de uma vez com NumPy
+        local: Dict[str, int] = {}
+        words: List[int] = []
+        ends: List[int] = []
+        for text in texts:
+            words.extend([local.setdefault(word, len(local)) for word in _WORD_RE.findall(text.lower())])
+            ends.append(len(words))
+        size = len(texts) * self.dim
+        if not words:
+            return np.zeros((len(texts), self.dim), dtype=np.float32)
+        features = [self._features(word) for word in local]
+        lengths = np.array([len(columns) for columns, _ in features])
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        columns = np.concatenate([columns for columns, _ in features])
+        weights = np.concatenate([weights for _, weights in features])
+
+        words_array = np.array(words, dtype=np.int64)
+        rows = np.repeat(np.arange(len(texts)), np.diff(np.array([0] + ends)))
+        counts = lengths[words_array]
+        # Posição de cada traço de cada ocorrência dentro de `columns`
+        first = np.repeat(starts[words_array] - np.cumsum(counts) + counts, counts)
+        gather = first + np.arange(len(first))
+        flat = np.bincount(
+            columns[gather] + np.repeat(rows, counts) * self.dim, weights=weights[gather], minlength=size
+        )
+        return _normalize(flat.reshape(len(texts), self.dim).astype(np.float32))
+
+
+class SentenceTransformerEmbedder:
+    """Modelo sentence-transformers pequeno rodando na CPU, só com arquivos
+    locais: o modelo precisa já estar no cache ou num diretório"""
+
+    def __init__(self, model: str, batch_size: int = 64):
+        # Importado aqui: a biblioteca (e o torch) leva segundos para carregar
+        from sentence_transformers import SentenceTransformer
+
+        self.name = model
+        self.batch_size = batch_size
+        self._model = SentenceTransformer(model, device="cpu", local_files_only=True)
+        self.dim = self._model.get_sentence_embedding_dimension()
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = self._model.encode(
+            list(texts), batch_size=self.batch_size, convert_to_numpy=True, normalize_embeddings=True
+        )
+        return vectors.astype(np.float32)
+
+
+def load_embedder(model: str, dim: int = 256):
+    """"hashing" ou o nome/caminho de um modelo sentence-transformers local.
+
+    Sem a biblioteca, ou se o modelo não abrir sem rede, cai no HashingEmbedder.
+    """
+    if model != "hashing":
+        # Modelo local opcional; sem a biblioteca fica o HashingEmbedder
+        if find_spec("sentence_transformers") is None:
+            logger.warning("sentence-transformers não instalado; usando embeddings por hashing")
+        else:
+            try:
+                return SentenceTransformerEmbedder(model)
+            except Exception as e:
+                logger.warning("Modelo de embeddings %s indisponível (%s); usando hashing", model, e)
+    return HashingEmbedder(dim)
+
+
+class LazyEmbedder:
+    """Embedder carregado (com a biblioteca do modelo) só no primeiro uso"""
+
+    def __init__(self, model: str, dim: int = 256):
+        self.model = model
+        self._dim = dim
+        self._embedder = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._embedder is None:
+            with self._lock:
+                if self._embedder is None:
+                    self._embedder = load_embedder(self.model, self._dim)
+        return self._embedder
+
+    @property
+    def name(self) -> str:
+        return self.get().name
+
+    @property
+    def dim(self) -> int:
+        return self.get().dim
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return self.get().embed(texts)
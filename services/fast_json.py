@@ -0,0 +1,30 @@
+import json
+from typing import Any
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usa o json da biblioteca padrão
+    orjson = None
+
+
+def dumps(value: Any) -> bytes:
+    """JSON compacto em UTF-8 de dicts, listas e tipos primitivos"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class TrustedJSONResponse(Response):
+    """Resposta JSON de dados que a própria API já normalizou.
+
+    Devolver uma Response faz o FastAPI pular a validação e a serialização do
+    response_model; a rota continua declarando o modelo, então o OpenAPI não
+    muda. Só serve para conteúdo que já tem o formato do modelo.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
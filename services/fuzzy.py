@@ -0,0 +1,212 @@
+import re
+from array import array
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.text_index import fold
+
+_WORD_RE = re.compile(r'(\w+)')
+_EMPTY = array('I')
+
+# Grupos de termos equivalentes; as tags do catálogo misturam português e inglês
+SYNONYMS: List[Tuple[str, ...]] = [
+    ("machine-learning", "ml", "aprendizado-de-maquina"),
+    ("ia", "ai", "inteligencia-artificial", "artificial-intelligence"),
+    ("llm", "large-language-model"),
+    ("nlp", "pln", "processamento-de-linguagem-natural"),
+    ("visao-computacional", "computer-vision", "cv"),
+    ("dados", "data"),
+    ("database", "db", "banco-de-dados"),
+    ("busca", "search"),
+    ("pagamentos", "payments"),
+    ("automacao", "automation"),
+    ("seguranca", "security"),
+    ("nuvem", "cloud"),
+    ("testes", "testing", "tests"),
+    ("kubernetes", "k8s"),
+    ("javascript", "js"),
+    ("typescript", "ts"),
+    ("python", "py"),
+]
+
+# Termos parecidos aceitos para cada termo consultado
+MAX_MATCHES = 5
+# Variantes do q buscadas por consulta
+MAX_VARIANTS = 8
+
+
+def max_distance(term: str) -> int:
+    """Erros de digitação tolerados: nenhum até 3 letras, 1 até 7 e 2 a partir de 8"""
+    size = len(term)
+    return 0 if size <= 3 else 1 if size <= 7 else 2
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Distância de Levenshtein com transposições de letras vizinhas entre
+    `a` e `b`, ou `limit + 1` assim que ela certamente passa de `limit`.
+
+    Só calcula a faixa de largura 2 * limit + 1 em volta da diagonal: fora
+    dela a distância já passaria do limite.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    over = limit + 1
+    before: List[int] = []
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [over] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        char = a[i - 1]
+        low = max(1, i - limit)
+        for j in range(low, min(len(b), i + limit) + 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != b[j - 1]))
+            if i > 1 and j > 1 and char == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, before[j - 2] + 1)
+            current[j] = min(value, over)
+        if min(current[low - 1:i + limit + 1]) > limit:
+            return over
+        before, previous = previous, current
+    return previous[-1]
+
+
+def _grams(term: str) -> set:
+    """Trigramas do termo com duas marcas em cada ponta, para que o começo e o
+    fim também contem (um termo de n letras tem n + 2 posições)"""
+    padded = f"\x02\x02{term}\x03\x03"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TermIndex:
+    """Vocabulário com índice de trigramas (trigrama -> termos que o contêm).
+
+    Acha os termos a poucas edições de distância de um termo consultado sem
+    compará-lo com o vocabulário inteiro: cada edição destrói no máximo 4
+    trigramas (a transposição de duas letras vizinhas; inserção, remoção e
+    troca destroem até 3), então um termo a `k` edições compartilha pelo
+    menos `len(grams) - 4k` deles. Só os termos que aparecem nessa quantidade de
+    listas do índice viram candidatos para o cálculo da distância.
+
+    Só cresce: termos de linhas removidas continuam no vocabulário e apenas
+    não casam com nada na busca.
+    """
+
+    def __init__(self):
+        self.terms: List[str] = []
+        self._folded: List[str] = []
+        self._ids: Dict[str, int] = {}
+        # Forma normalizada (minúsculas sem acento) -> termos com essa forma
+        self._exact: Dict[str, List[int]] = {}
+        self._grams: Dict[str, array] = {}
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def add(self, terms: Iterable[str]):
+        for term in terms:
+            if not term or term in self._ids:
+                continue
+            term_id = len(self.terms)
+            folded = fold(term)
+            self.terms.append(term)
+            self._folded.append(folded)
+            self._ids[term] = term_id
+            self._exact.setdefault(folded, []).append(term_id)
+            for gram in _grams(folded):
+                posting = self._grams.get(gram)
+                if posting is None:
+                    self._grams[gram] = array('I', (term_id,))
+                else:
+                    posting.append(term_id)
+
+    def similar(self, term: str, limit: Optional[int] = None) -> List[Tuple[int, str]]:
+        """(distância, termo) dos termos a no máximo `limit` edições de `term`
+        (por padrão `max_distance`), do mais próximo ao mais distante"""
+        folded = fold(term)
+        if limit is None:
+            limit = max_distance(folded)
+        matches = [(0, self.terms[term_id]) for term_id in self._exact.get(folded, ())]
+        grams = _grams(folded)
+        required = len(grams) - 4 * limit
+        if limit > 0 and required > 0:
+            # Conta em quantas listas de trigramas do termo cada candidato
+            # aparece. As listas viram bytes antes (cópia), para nunca
+            # exportar o buffer de um array que `add` pode estar aumentando.
+            ids = np.frombuffer(b''.join(self._grams.get(gram, _EMPTY).tobytes() for gram in grams), dtype=np.uint32)
+            candidates, counts = np.unique(ids, return_counts=True)
+            folded_terms = self._folded
+            size = len(folded)
+            for term_id in candidates[counts >= required].tolist():
+                other = folded_terms[term_id]
+                if abs(len(other) - size) <= limit and other != folded:
+                    distance = edit_distance(folded, other, limit)
+                    if distance <= limit:
+                        matches.append((distance, self.terms[term_id]))
+        matches.sort()
+        return matches
+
+
+class FuzzyVocabulary:
+    """Vocabulários de tags e de palavras dos nomes do catálogo, usados nas
+    buscas com fuzzy=true para trocar termos digitados com erro pelos
+    existentes e acrescentar sinônimos"""
+
+    def __init__(self, synonyms: Iterable[Sequence[str]] = SYNONYMS):
+        self.tags = TermIndex()
+        self.names = TermIndex()
+        self._synonyms: Dict[str, List[str]] = {}
+        for group in synonyms:
+            for term in group:
+                self._synonyms.setdefault(fold(term), []).extend(other for other in group if other != term)
+
+    def add(self, tags: Iterable[str], names: Iterable[str]):
+        self.tags.add(tags)
+        self.names.add(
+            word for name in names for word in _WORD_RE.findall(name.lower()) if not word.isdigit()
+        )
+
+    @staticmethod
+    def _corrections(index: TermIndex, term: str) -> List[str]:
+        """O próprio termo, se existe no vocabulário; senão os mais próximos"""
+        matches = index.similar(term)
+        if matches and matches[0][0] == 0:
+            return [match for distance, match in matches if distance == 0]
+        return [match for _, match in matches[:MAX_MATCHES]]
+
+    def _alternatives(self, index: TermIndex, term: str) -> List[str]:
+        """`term`, suas correções e os sinônimos de cada uma (só os que existem no vocabulário)"""
+        found = dict.fromkeys([term] + self._corrections(index, term))
+        for match in list(found):
+            for synonym in self._synonyms.get(fold(match), ()):
+                found.update(dict.fromkeys(existing for _, existing in index.similar(synonym, 0)))
+        return list(found)
+
+    def expand_tags(self, tags: Sequence[str]) -> List[str]:
+        """As tags consultadas mais as tags do catálogo que elas provavelmente queriam dizer"""
+        return list(dict.fromkeys(chain.from_iterable(self._alternatives(self.tags, tag) for tag in tags)))
+
+    def expand_query(self, q: str) -> List[str]:
+        """Variantes do `q` em minúsculas: a original, a com todas as palavras
+        corrigidas (para q com mais de um erro) e as com uma palavra trocada
+        por uma correção ou sinônimo"""
+        pieces = _WORD_RE.split(q.lower())
+        corrected = list(pieces)
+        single = []
+        for pos in range(1, len(pieces), 2):
+            word = pieces[pos]
+            if word.isdigit():
+                continue
+            corrections = self._corrections(self.names, word)
+            if corrections and word not in corrections:
+                corrected[pos] = corrections[0]
+            for alternative in self._alternatives(self.names, word)[1:]:
+                single.append(''.join(pieces[:pos] + [alternative] + pieces[pos + 1:]))
+        variants = dict.fromkeys([''.join(pieces), ''.join(corrected)] + single)
+        return list(variants)[:MAX_VARIANTS]
+
+    def expand(self, q: Optional[str], tags: Optional[List[str]]) -> Tuple[List[Optional[str]], Optional[List[str]]]:
+        """(variantes do q, tags expandidas) de uma busca com fuzzy=true"""
+        queries: List[Optional[str]] = self.expand_query(q) if q else [q]
+        return queries, self.expand_tags(tags) if tags else tags
@@ -0,0 +1,203 @@
+import asyncio
+import hmac
+import logging
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterator, Optional
+
+from google.protobuf import json_format
+
+from services.catalog import Catalog, CatalogRow, CatalogStore
+from services.proto_loader import load_generated
+from services.registry_store import RegistryStore
+
+try:
+    import grpc
+except ImportError:  # grpcio é opcional; sem ele só a API REST sobe
+    grpc = None
+
+MAX_PAGE_SIZE = 1000
+DEFAULT_PAGE_SIZE = 100
+STREAM_CHUNK_SIZE = 128
+
+
+class ProtoAiRegistryServicer:
+    """Implementação de protoai.registry.v1.ProtoAiRegistry sobre os mesmos
+    dados do /search: as buscas e a listagem leem o snapshot atual do
+    CatalogStore, e registro/remoção/consulta por id usam o RegistryStore.
+    As buscas varrem o catálogo num thread, fora do event loop compartilhado
+    com a API REST. Registro e remoção exigem o metadata
+    "authorization: Bearer <admin_token>"; sem admin_token ficam desativados.
+    """
+
+    def __init__(self, catalog_store: CatalogStore, store: RegistryStore, registry_pb2, readme_pb2,
+                 admin_token: str = ''):
+        self.catalog_store = catalog_store
+        self.store = store
+        self.admin_token = admin_token
+        self.registry_pb2 = registry_pb2
+        self.readme_pb2 = readme_pb2
+
+    def _row_message(self, row: CatalogRow):
+        """ReadmeProto a partir de uma linha do catálogo"""
+        message = self.readme_pb2.ReadmeProto()
+        info = message.project_info
+        info.name = row.name
+        info.version = row.version
+        info.description = row.description
+        info.tags.extend(row.tags)
+        message.licensing_info.license_type = row.license
+        if row.url:
+            interface = message.communication_details.access_interfaces.add()
+            interface.type = self.readme_pb2.AccessInterface.REST_HTTP
+            interface.base_url_or_address = row.url
+        return message
+
+    def _manifest_message(self, manifest: Dict[str, Any]):
+        """ReadmeProto a partir do manifesto JSON guardado no registro"""
+        message = self.readme_pb2.ReadmeProto()
+        try:
+            json_format.ParseDict(manifest, message, ignore_unknown_fields=True)
+        except json_format.ParseError:
+            # Manifesto com campos fora do formato da mensagem: fica só o project_info
+            message = self.readme_pb2.ReadmeProto()
+            json_format.ParseDict(
+                {"project_info": manifest.get("project_info", {})}, message, ignore_unknown_fields=True
+            )
+        license = manifest.get("project_info", {}).get("license")
+        if license and not message.licensing_info.license_type:
+            message.licensing_info.license_type = license
+        return message
+
+    @staticmethod
+    def _timestamp(message, value: str):
+        message.FromDatetime(datetime.fromisoformat(value))
+
+    async def _authorize(self, context):
+        """Mesma regra do REST: token ausente na configuração desativa, token errado é recusado"""
+        if not self.admin_token:
+            await context.abort(grpc.StatusCode.PERMISSION_DENIED,
+                                "Registro de serviços desativado (REGISTRY_ADMIN_TOKEN)")
+        metadata = dict(context.invocation_metadata() or ())
+        scheme, _, token = metadata.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), self.admin_token.encode()):
+            await context.abort(grpc.StatusCode.UNAUTHENTICATED, "Credencial de administrador inválida")
+
+    async def RegisterService(self, request, context):
+        await self._authorize(context)
+        manifest = json_format.MessageToDict(request.service_manifest, preserving_proto_field_name=True)
+        # A licença da mensagem protobuf fica em licensing_info; o catálogo a lê do project_info
+        license = manifest.get("licensing_info", {}).get("license_type")
+        if license:
+            manifest.setdefault("project_info", {}).setdefault("license", license)
+        try:
+            record = await self.store.register(manifest)
+        except ValueError as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        response = self.registry_pb2.RegisterServiceResponse(service_id=record.service_id)
+        self._timestamp(response.registration_time, record.registered_at)
+        return response
+
+    async def UnregisterService(self, request, context):
+        await self._authorize(context)
+        return self.registry_pb2.UnregisterServiceResponse(success=await self.store.unregister(request.service_id))
+
+    async def GetService(self, request, context):
+        record = self.store.get(request.service_id)
+        if record is None:
+            await context.abort(grpc.StatusCode.NOT_FOUND, "Serviço não encontrado")
+        response = self.registry_pb2.GetServiceResponse(service_manifest=self._manifest_message(record.manifest))
+        self._timestamp(response.last_updated, record.updated_at)
+        return response
+
+    async def ListServices(self, request, context):
+        """Catálogo inteiro, paginado com o mesmo cursor do /search"""
+        catalog = self.catalog_store.snapshot
+        after = -1
+        if request.page_token:
+            try:
+                after = catalog.decode_cursor(request.page_token)
+            except ValueError as e:
+                await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        size = min(request.page_size or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+        page = list(islice(catalog.iter_search(after=after), size + 1))
+        response = self.registry_pb2.ListServicesResponse()
+        for idx in page[:size]:
+            response.services.append(self._row_message(catalog.rows[idx]))
+        if len(page) > size:
+            response.next_page_token = catalog.encode_cursor(page[size - 1])
+        return response
+
+    def _search(self, catalog: Catalog, request) -> Iterator[int]:
+        """Índices do catálogo com alguma das tags e nome/descrição contendo os padrões"""
+        name_pattern = request.name_pattern.lower()
+        description_pattern = request.description_pattern.lower()
+        # O q do /search casa com nome OU descrição: serve de pré-filtro indexado
+        ids = catalog.iter_search(
+            q=name_pattern or description_pattern or None,
+            tags=list(request.tags) or None
+        )
+        rows = catalog.rows
+        for idx in ids:
+            row = rows[idx]
+            if name_pattern and name_pattern not in row.name.lower():
+                continue
+            if description_pattern and description_pattern not in row.description.lower():
+                continue
+            yield idx
+
+    def _search_chunk(self, catalog: Catalog, ids: Iterator[int], size: Optional[int]):
+        """Próximos `size` resultados de `ids` (todos, se None) numa mensagem; roda num thread"""
+        response = self.registry_pb2.SearchServicesResponse()
+        rows = catalog.rows
+        for idx in islice(ids, size):
+            response.matching_services.append(self._row_message(rows[idx]))
+        return response
+
+    async def SearchServices(self, request, context):
+        catalog = self.catalog_store.snapshot
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self._search_chunk, catalog, self._search(catalog, request), None
+        )
+
+    async def StreamSearchServices(self, request, context):
+        """Envia os resultados em blocos de STREAM_CHUNK_SIZE assim que são
+        encontrados. Uma mensagem por serviço custaria uma escrita no stream
+        por resultado, o que no grpc.aio é bem mais caro que serializar."""
+        loop = asyncio.get_running_loop()
+        catalog = self.catalog_store.snapshot
+        # O mesmo gerador avança em threads diferentes, mas um bloco de cada vez
+        ids = self._search(catalog, request)
+        while True:
+            chunk = await loop.run_in_executor(None, self._search_chunk, catalog, ids, STREAM_CHUNK_SIZE)
+            if chunk.matching_services:
+                yield chunk
+            if len(chunk.matching_services) < STREAM_CHUNK_SIZE:
+                return
+
+
+async def start_grpc_server(catalog_store: CatalogStore, store: RegistryStore, address: str,
+                            admin_token: str = '') -> Optional["grpc.aio.Server"]:
+    """Sobe o servidor grpc.aio do ProtoAiRegistry no event loop atual.
+
+    Retorna None (e a API segue só com REST) se o grpcio não estiver instalado
+    ou se os stubs não foram gerados com scripts/generate_proto.py.
+    """
+    logger = logging.getLogger(__name__)
+    if grpc is None:
+        logger.warning("grpcio não instalado; servidor gRPC desativado")
+        return None
+    registry_pb2 = load_generated("protoai.registry.v1.registry_pb2")
+    registry_pb2_grpc = load_generated("protoai.registry.v1.registry_pb2_grpc")
+    readme_pb2 = load_generated("protoai.v1.readme_pb2")
+    if registry_pb2 is None or registry_pb2_grpc is None or readme_pb2 is None:
+        return None
+
+    server = grpc.aio.server()
+    registry_pb2_grpc.add_ProtoAiRegistryServicer_to_server(
+        ProtoAiRegistryServicer(catalog_store, store, registry_pb2, readme_pb2, admin_token), server
+    )
+    server.add_insecure_port(address)
+    await server.start()
+    logger.info("Servidor gRPC do ProtoAiRegistry ouvindo em %s", address)
+    return server
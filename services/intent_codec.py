@@ -0,0 +1,155 @@
+import json
+from typing import Any, Dict, List, Sequence, Tuple
+
+from models.intent import CompactIntent, CompactIntentResponse, IntentType
+from services.fast_json import dumps
+from services.proto_loader import load_generated
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usa o json da biblioteca padrão
+    orjson = None
+
+_TYPES = {intent_type.value: intent_type for intent_type in IntentType}
+# IntentType do protobuf (INTENT_TYPE_DISCOVERY = 1, ...) na ordem do enum Python
+_PROTO_TYPES = dict(enumerate(IntentType, start=1))
+_PROTO_MODULE = "protoai.v1.intent_pb2"
+
+
+class IntentDecodeError(ValueError):
+    """Intenção inválida; `loc` aponta o campo, no formato dos erros 422 do FastAPI"""
+
+    def __init__(self, loc: Tuple[Any, ...], message: str):
+        super().__init__(f"{'.'.join(map(str, loc))}: {message}")
+        self.loc = loc
+        self.message = message
+
+    def detail(self) -> List[Dict[str, Any]]:
+        return [{"loc": ["body", *self.loc], "msg": self.message, "type": "value_error"}]
+
+
+def _optional(value: Dict[str, Any], field: str, kind: type, index: int):
+    item = value.get(field)
+    if item is not None and not isinstance(item, kind):
+        raise IntentDecodeError((index, field), f"deve ser {kind.__name__}")
+    return item
+
+
+def intent_from_dict(value: Any, index: int = 0) -> CompactIntent:
+    """Valida um dict no formato do Intent (campos extras são ignorados, como no modelo)"""
+    if not isinstance(value, dict):
+        raise IntentDecodeError((index,), "a intenção deve ser um objeto")
+    intent_type = _TYPES.get(value.get("type")) if isinstance(value.get("type"), str) else None
+    if intent_type is None:
+        raise IntentDecodeError((index, "type"), f"deve ser um de {', '.join(_TYPES)}")
+    tags = _optional(value, "tags", list, index)
+    if tags is not None and not all(isinstance(tag, str) for tag in tags):
+        raise IntentDecodeError((index, "tags"), "as tags devem ser strings")
+    return CompactIntent(
+        intent_type,
+        _optional(value, "service_name", str, index),
+        _optional(value, "operation", str, index),
+        _optional(value, "parameters", dict, index),
+        _optional(value, "context", dict, index),
+        tags
+    )
+
+
+def decode_json(body: bytes) -> List[CompactIntent]:
+    """Lote de intenções de um corpo JSON (lista de objetos)"""
+    try:
+        value = orjson.loads(body) if orjson is not None else json.loads(body)
+    except ValueError as e:
+        raise IntentDecodeError((), f"JSON inválido: {e}")
+    if not isinstance(value, list):
+        raise IntentDecodeError((), "o corpo deve ser uma lista de intenções")
+    return [intent_from_dict(item, index) for index, item in enumerate(value)]
+
+
+def proto_module():
+    """Módulo gerado de intent.proto, ou None sem scripts/generate_proto.py"""
+    return load_generated(_PROTO_MODULE)
+
+
+def _value(value) -> Any:
+    kind = value.WhichOneof("kind")
+    if kind == "struct_value":
+        return _struct(value.struct_value)
+    if kind == "list_value":
+        return [_value(item) for item in value.list_value.values]
+    if kind == "number_value":
+        # Struct só tem double; inteiros voltam como int, como no json_format
+        number = value.number_value
+        return int(number) if number.is_integer() else number
+    if kind == "string_value":
+        return value.string_value
+    if kind == "bool_value":
+        return value.bool_value
+    return None
+
+
+def _struct(struct) -> Dict[str, Any]:
+    """google.protobuf.Struct em dict, sem passar pelo json_format (bem mais lento)"""
+    return {key: _value(value) for key, value in struct.fields.items()}
+
+
+def decode_proto(body: bytes, module=None) -> List[CompactIntent]:
+    """Lote de intenções de um IntentBatch serializado"""
+    from google.protobuf.message import DecodeError
+
+    module = module or proto_module()
+    batch = module.IntentBatch()
+    try:
+        batch.ParseFromString(body)
+    except DecodeError as e:
+        raise IntentDecodeError((), f"IntentBatch inválido: {e}")
+    intents = []
+    for index, message in enumerate(batch.intents):
+        intent_type = _PROTO_TYPES.get(message.type)
+        if intent_type is None:
+            raise IntentDecodeError((index, "type"), "tipo de intenção não informado ou desconhecido")
+        intents.append(CompactIntent(
+            intent_type,
+            message.service_name if message.HasField("service_name") else None,
+            message.operation if message.HasField("operation") else None,
+            _struct(message.parameters) if message.HasField("parameters") else None,
+            _struct(message.context) if message.HasField("context") else None,
+            list(message.tags) or None
+        ))
+    return intents
+
+
+def encode_response(response: CompactIntentResponse) -> bytes:
+    """JSON de uma resposta, no formato do IntentResponse, com o `data_json` embutido como está"""
+    return b"".join((
+        b'{"success":', b"true" if response.success else b"false",
+        b',"message":', dumps(response.message),
+        b',"data":', response.data_json if response.data_json is not None else b"null",
+        b',"error":', dumps(response.error), b"}"
+    ))
+
+
+def encode_json(responses: Sequence[CompactIntentResponse]) -> bytes:
+    """Lista JSON das respostas; uma resposta compartilhada no lote é serializada uma vez"""
+    encoded: Dict[int, bytes] = {}
+    parts = []
+    for response in responses:
+        body = encoded.get(id(response))
+        if body is None:
+            body = encoded[id(response)] = encode_response(response)
+        parts.append(body)
+    return b"[" + b",".join(parts) + b"]"
+
+
+def encode_proto(responses: Sequence[CompactIntentResponse], module=None) -> bytes:
+    """IntentResponseBatch serializado"""
+    module = module or proto_module()
+    batch = module.IntentResponseBatch()
+    for response in responses:
+        item = batch.responses.add(success=response.success, message=response.message)
+        if response.data_json is not None:
+            item.data_json = response.data_json
+        if response.error is not None:
+            item.error = response.error
+    return batch.SerializeToString()
+
@@ -0,0 +1,62 @@
+import json
+import logging
+from typing import Any, Dict, Optional
+
+# Atributos padrão do LogRecord; o que sobrar veio de `extra` e vira campo do JSON
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro, com os campos passados em `extra`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            'timestamp': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS:
+                payload[key] = value
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def configure_logging(level: str = 'info', fmt: str = 'text'):
+    """Configura o logging raiz a partir de LOG_LEVEL e LOG_FORMAT (text|json)"""
+    handler = logging.StreamHandler()
+    if fmt == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    logging.basicConfig(level=level.upper(), handlers=[handler])
+
+
+class SampledLogger:
+    """Registra só 1 a cada `every` chamadas de cada mensagem, para linhas de
+    alto volume.
+
+    As mensagens usam formatação preguiçosa (`"%s", valor`): chamadas
+    descartadas pela amostragem ou pelo nível não formatam nada. A contagem
+    é por mensagem (o formato, não o texto final), e cada registro emitido
+    leva `sample_every` para que os totais possam ser reconstruídos.
+    """
+
+    def __init__(self, logger: logging.Logger, every: int = 1):
+        self.logger = logger
+        self.every = max(1, every)
+        self._counts: Dict[str, int] = {}
+
+    def log(self, level: int, msg: str, *args, extra: Optional[Dict[str, Any]] = None):
+        count = self._counts.get(msg, 0) + 1
+        if count < self.every:
+            self._counts[msg] = count
+            return
+        self._counts[msg] = 0
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, msg, *args, extra={'sample_every': self.every, **(extra or {})})
+
+    def info(self, msg: str, *args, extra: Optional[Dict[str, Any]] = None):
+        self.log(logging.INFO, msg, *args, extra=extra)
@@ -0,0 +1,230 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+import httpx
+
+from services.manifests import ManifestValidationEngine, Verdict
+
+
+def content_hash(manifest: Any) -> str:
+    """SHA-256 do JSON canônico: a mesma formatação não importa, só o conteúdo"""
+    canonical = json.dumps(manifest, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def manifest_row(manifest: Dict[str, Any], digest: str) -> Dict[str, Any]:
+    """Linha de mcp_manifests para o manifesto"""
+    return {"manifest": manifest, "version": manifest.get("version", "1.0.0"), "content_hash": digest}
+
+
+class SQLiteManifestTable:
+    """Substituto local da tabela mcp_manifests (MCP_Servers/supabase/schema.sql),
+    com o mesmo upsert por content_hash"""
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS mcp_manifests (
+                id TEXT PRIMARY KEY,
+                manifest TEXT NOT NULL,
+                version TEXT NOT NULL,
+                content_hash TEXT NOT NULL UNIQUE,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE INDEX IF NOT EXISTS idx_manifests_version ON mcp_manifests(version);
+        """)
+        self.lock = threading.Lock()
+
+    def _upsert(self, rows: List[Dict[str, Any]]) -> int:
+        with self.lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT INTO mcp_manifests (id, manifest, version, content_hash) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(content_hash) DO NOTHING",
+                [(str(uuid.uuid4()), json.dumps(row["manifest"]), row["version"], row["content_hash"]) for row in rows]
+            )
+            return self.conn.total_changes - before
+
+    async def upsert(self, rows: List[Dict[str, Any]]) -> int:
+        """Insere as linhas novas e ignora as que já existem; retorna quantas entraram"""
+        return await asyncio.to_thread(self._upsert, rows)
+
+    async def close(self):
+        self.conn.close()
+
+
+class PostgRESTManifestTable:
+    """mcp_manifests via a API REST do Supabase (PostgREST), num cliente
+    assíncrono com pool de conexões.
+
+    Cada lote é um único POST com on_conflict=content_hash e
+    resolution=ignore-duplicates: conteúdos já carregados não são reescritos,
+    e a resposta traz só o content_hash das linhas inseridas.
+    """
+
+    def __init__(self, url: str, key: str, table: str = "mcp_manifests",
+                 concurrency: int = 4, timeout: float = 30.0):
+        self.endpoint = f"{url.rstrip('/')}/rest/v1/{table}"
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            headers={
+                "apikey": key,
+                "Authorization": f"Bearer {key}",
+                "Prefer": "resolution=ignore-duplicates,return=representation",
+            }
+        )
+
+    async def upsert(self, rows: List[Dict[str, Any]]) -> int:
+        response = await self._client.post(
+            self.endpoint, params={"on_conflict": "content_hash", "select": "content_hash"}, json=rows
+        )
+        response.raise_for_status()
+        return len(response.json())
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class Checkpoint:
+    """Hashes já gravados, um por linha num arquivo só de acréscimo.
+
+    Um lote entra no arquivo depois de confirmado pela tabela; ao retomar
+    uma carga interrompida, esses manifestos nem são reenviados.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.done: Set[str] = set()
+        if path and os.path.exists(path):
+            with open(path) as file:
+                self.done.update(line.strip() for line in file if line.strip())
+
+    def __contains__(self, digest: str) -> bool:
+        return digest in self.done
+
+    def add(self, digests: List[str]):
+        self.done.update(digests)
+        if self.path:
+            with open(self.path, "a") as file:
+                file.write("".join(f"{digest}\n" for digest in digests))
+                file.flush()
+                os.fsync(file.fileno())
+
+
+class LoadReport(NamedTuple):
+    inserted: int
+    unchanged: int
+    resumed: int
+    invalid: List[Verdict]
+    failed: List[Tuple[int, str]]
+
+
+def _chunks(sources: Iterable[Tuple[str, bytes]], size: int) -> Iterator[List[Tuple[str, bytes]]]:
+    chunk: List[Tuple[str, bytes]] = []
+    for source in sources:
+        chunk.append(source)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class BulkManifestLoader:
+    """Carga em volume de manifestos na tabela mcp_manifests.
+
+    Os manifestos vêm em stream (diretório ou NDJSON), são validados pelo
+    ManifestValidationEngine em blocos (fora do event loop) e os válidos vão
+    para a tabela em lotes de `batch_size` linhas, com no máximo
+    `concurrency` lotes em andamento. Lotes que falham são tentados de novo
+    `retries` vezes; os que ainda falham ficam fora do checkpoint e entram
+    na próxima execução.
+    """
+
+    def __init__(self, table, engine: ManifestValidationEngine, batch_size: int = 500,
+                 concurrency: int = 4, retries: int = 3, checkpoint: Optional[Checkpoint] = None):
+        self.table = table
+        self.engine = engine
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.retries = retries
+        self.checkpoint = checkpoint or Checkpoint()
+        self.logger = logging.getLogger(__name__)
+
+    async def _send(self, number: int, rows: List[Dict[str, Any]]) -> int:
+        delay = 0.5
+        for attempt in range(self.retries + 1):
+            try:
+                inserted = await self.table.upsert(rows)
+                break
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                self.logger.warning("Lote %d falhou (%s); nova tentativa em %.1fs", number, e, delay)
+                await asyncio.sleep(delay)
+                delay *= 2
+        self.checkpoint.add([row["content_hash"] for row in rows])
+        return inserted
+
+    async def load(self, sources: Iterable[Tuple[str, bytes]]) -> LoadReport:
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks: List[asyncio.Task] = []
+        invalid: List[Verdict] = []
+        seen: Set[str] = set()
+        rows: List[Dict[str, Any]] = []
+        sizes: List[int] = []
+        resumed = 0
+
+        async def send(number: int, batch: List[Dict[str, Any]]) -> int:
+            try:
+                return await self._send(number, batch)
+            finally:
+                slots.release()
+
+        async def flush():
+            # Espera uma vaga antes de criar a tarefa: no máximo `concurrency` lotes na memória
+            await slots.acquire()
+            sizes.append(len(rows))
+            tasks.append(asyncio.create_task(send(len(tasks), rows[:])))
+            rows.clear()
+
+        for chunk in _chunks(sources, self.engine.batch_size):
+            verdicts = await asyncio.to_thread(lambda: list(self.engine.validate_many(chunk)))
+            for verdict, (_, raw) in zip(verdicts, chunk):
+                if not verdict.valid:
+                    invalid.append(verdict)
+                    continue
+                manifest = json.loads(raw)
+                digest = content_hash(manifest)
+                if digest in self.checkpoint:
+                    resumed += 1
+                    continue
+                if digest in seen:
+                    continue
+                seen.add(digest)
+                rows.append(manifest_row(manifest, digest))
+                if len(rows) == self.batch_size:
+                    await flush()
+        if rows:
+            await flush()
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        failed, inserted, unchanged = [], 0, 0
+        for number, (size, result) in enumerate(zip(sizes, results)):
+            if isinstance(result, BaseException):
+                failed.append((number, str(result)))
+            else:
+                inserted += result
+                unchanged += size - result
+        return LoadReport(inserted, unchanged, resumed, invalid, failed)
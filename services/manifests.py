@@ -0,0 +1,495 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "MCP_Servers" / "schemas" / "manifest.json"
+
+# Regras do protocolo além do schema (as antigas verificações do
+# ManifestValidator): autenticação, pagamento em $PAi e capacidades básicas
+PROTOCOL_RULES: Dict[str, Any] = {
+    "required": ["auth", "payment", "capabilities"],
+    "properties": {
+        "auth": {
+            "required": ["methods", "requires_payment"],
+            "properties": {"methods": {"type": "array"}}
+        },
+        "payment": {
+            "type": "object",
+            "required": ["token", "price_per_call"],
+            "properties": {"token": {"const": "$PAi"}}
+        },
+        "capabilities": {
+            "required": ["semantic_discovery", "auto_authentication", "payment_processing"]
+        }
+    }
+}
+
+# Validador compilado: (valor, caminho, lista de erros) -> acrescenta os erros encontrados.
+# O caminho é a tupla de chaves até o valor e só vira texto quando há erro
+Check = Callable[[Any, str, List[str]], None]
+
+# Palavras do JSON Schema que só documentam e não validam nada
+_ANNOTATIONS = {"$schema", "$id", "$comment", "title", "description", "default", "examples"}
+
+_TYPES: Dict[str, Callable[[Any], bool]] = {
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+    "string": lambda value: isinstance(value, str),
+    # bool é subclasse de int no Python, mas não é número no JSON
+    "integer": lambda value: isinstance(value, int) and not isinstance(value, bool)
+    or isinstance(value, float) and value.is_integer(),
+    "number": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    "boolean": lambda value: isinstance(value, bool),
+    "null": lambda value: value is None,
+}
+
+# Tipos que equivalem a um único isinstance
+_CLASSES: Dict[str, type] = {"object": dict, "array": list, "string": str, "boolean": bool}
+
+
+def _uri(value: str) -> bool:
+    parts = urlsplit(value)
+    return bool(parts.scheme and (parts.netloc or parts.path))
+
+
+# Formatos conferidos; os demais são só anotação, como o draft-07 permite
+_FORMATS: Dict[str, Callable[[str], bool]] = {
+    "uri": _uri,
+    "email": lambda value: re.fullmatch(r"[^@\s]+@[^@\s]+\.[^@\s]+", value) is not None,
+}
+
+
+def _where(path: Tuple[Any, ...]) -> str:
+    """Caminho legível do valor: auth.methods[0] (ou $ para a raiz)"""
+    text = ""
+    for key in path:
+        text += f"[{key}]" if isinstance(key, int) else (f".{key}" if text else str(key))
+    return text or "$"
+
+
+def compile_schema(schema: Dict[str, Any]) -> Check:
+    """Compila um JSON Schema (draft-07) numa árvore de funções.
+
+    Cada palavra-chave vira uma verificação pronta (regex já compilada,
+    enum num set, sub-schemas já compilados), e a validação percorre o
+    manifesto uma vez acumulando todos os erros, em vez de parar no
+    primeiro. Palavras-chave não suportadas falham aqui, na compilação,
+    para nunca serem ignoradas em silêncio.
+    """
+    checks: List[Check] = []
+
+    def add(check: Check):
+        checks.append(check)
+
+    for keyword in schema:
+        if keyword in _ANNOTATIONS:
+            continue
+        value = schema[keyword]
+
+        if keyword == "type":
+            names = value if isinstance(value, list) else [value]
+            tests = [_TYPES[name] for name in names]
+            expected = " ou ".join(names)
+            if len(names) == 1 and names[0] in _CLASSES:
+                # Caso comum: um isinstance direto, sem passar pelas funções de _TYPES
+                cls = _CLASSES[names[0]]
+
+                def check_type(data, path, errors, cls=cls, expected=expected):
+                    if not isinstance(data, cls):
+                        errors.append(f"{_where(path)}: deve ser do tipo {expected}")
+            else:
+                def check_type(data, path, errors, tests=tests, expected=expected):
+                    if not any(test(data) for test in tests):
+                        errors.append(f"{_where(path)}: deve ser do tipo {expected}")
+            add(check_type)
+        elif keyword == "required":
+            required = list(value)
+
+            def check_required(data, path, errors, required=required):
+                if isinstance(data, dict):
+                    for field in required:
+                        if field not in data:
+                            errors.append(f"{_where(path + (field,))}: campo obrigatório ausente")
+            add(check_required)
+        elif keyword == "properties":
+            properties = [(name, compile_schema(sub)) for name, sub in value.items()]
+
+            def check_properties(data, path, errors, properties=properties):
+                if isinstance(data, dict):
+                    for name, check in properties:
+                        if name in data:
+                            check(data[name], path + (name,), errors)
+            add(check_properties)
+        elif keyword == "additionalProperties":
+            known = set(schema.get("properties", ()))
+            if value is False:
+                def check_additional(data, path, errors, known=known):
+                    if isinstance(data, dict):
+                        for name in data:
+                            if name not in known:
+                                errors.append(f"{_where(path + (name,))}: campo não permitido")
+            elif value is True:
+                continue
+            else:
+                extra = compile_schema(value)
+
+                def check_additional(data, path, errors, known=known, extra=extra):
+                    if isinstance(data, dict):
+                        for name, item in data.items():
+                            if name not in known:
+                                extra(item, path + (name,), errors)
+            add(check_additional)
+        elif keyword == "items":
+            if isinstance(value, list):
+                raise ValueError("items em forma de lista (tupla) não é suportado")
+            item_check = compile_schema(value)
+
+            def check_items(data, path, errors, item_check=item_check):
+                if isinstance(data, list):
+                    for index, item in enumerate(data):
+                        item_check(item, path + (index,), errors)
+            add(check_items)
+        elif keyword in ("enum", "const"):
+            options = list(value) if keyword == "enum" else [value]
+            # Chave JSON canônica: 1 e True (ou 1 e 1.0) são valores diferentes no JSON
+            allowed = {json.dumps(option, sort_keys=True) for option in options}
+            listed = ", ".join(str(option) for option in options)
+            if all(isinstance(option, str) for option in options):
+                strings = set(options)
+
+                def check_enum(data, path, errors, strings=strings, listed=listed):
+                    if not (type(data) is str and data in strings):
+                        errors.append(f"{_where(path)}: deve ser um de {listed}")
+            else:
+                def check_enum(data, path, errors, allowed=allowed, listed=listed):
+                    if json.dumps(data, sort_keys=True) not in allowed:
+                        errors.append(f"{_where(path)}: deve ser um de {listed}")
+            add(check_enum)
+        elif keyword == "pattern":
+            regex = re.compile(value)
+
+            def check_pattern(data, path, errors, regex=regex, pattern=value):
+                if isinstance(data, str) and not regex.search(data):
+                    errors.append(f"{_where(path)}: não segue o padrão {pattern}")
+            add(check_pattern)
+        elif keyword in ("minLength", "maxLength", "minItems", "maxItems"):
+            kind = str if keyword.endswith("Length") else list
+            limit = value
+            below = keyword.startswith("min")
+            noun = "caracteres" if kind is str else "itens"
+
+            def check_size(data, path, errors, kind=kind, limit=limit, below=below, noun=noun):
+                if isinstance(data, kind) and (len(data) < limit if below else len(data) > limit):
+                    errors.append(f"{_where(path)}: deve ter {'no mínimo' if below else 'no máximo'} {limit} {noun}")
+            add(check_size)
+        elif keyword in ("minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum"):
+            limit = value
+            fails = {
+                "minimum": lambda number, limit: number < limit,
+                "maximum": lambda number, limit: number > limit,
+                "exclusiveMinimum": lambda number, limit: number <= limit,
+                "exclusiveMaximum": lambda number, limit: number >= limit,
+            }[keyword]
+            message = {"minimum": ">=", "maximum": "<=", "exclusiveMinimum": ">", "exclusiveMaximum": "<"}[keyword]
+
+            def check_range(data, path, errors, limit=limit, fails=fails, message=message):
+                if _TYPES["number"](data) and fails(data, limit):
+                    errors.append(f"{_where(path)}: deve ser {message} {limit}")
+            add(check_range)
+        elif keyword == "uniqueItems":
+            if not value:
+                continue
+
+            def check_unique(data, path, errors):
+                if isinstance(data, list):
+                    seen = [json.dumps(item, sort_keys=True) for item in data]
+                    if len(set(seen)) != len(seen):
+                        errors.append(f"{_where(path)}: os itens devem ser únicos")
+            add(check_unique)
+        elif keyword == "format":
+            test = _FORMATS.get(value)
+            if test is None:
+                continue
+
+            def check_format(data, path, errors, test=test, name=value):
+                if isinstance(data, str) and not test(data):
+                    errors.append(f"{_where(path)}: formato {name} inválido")
+            add(check_format)
+        elif keyword == "allOf":
+            parts = [compile_schema(sub) for sub in value]
+
+            def check_all(data, path, errors, parts=parts):
+                for part in parts:
+                    part(data, path, errors)
+            add(check_all)
+        elif keyword == "anyOf":
+            parts = [compile_schema(sub) for sub in value]
+
+            def check_any(data, path, errors, parts=parts):
+                for part in parts:
+                    found: List[str] = []
+                    part(data, path, found)
+                    if not found:
+                        return
+                errors.append(f"{_where(path)}: não atende a nenhuma das alternativas (anyOf)")
+            add(check_any)
+        else:
+            raise ValueError(f"Palavra-chave de JSON Schema não suportada: {keyword}")
+
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all_keywords(data, path, errors):
+        for check in checks:
+            check(data, path, errors)
+    return check_all_keywords
+
+
+def load_schema(path: Path = SCHEMA_PATH, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """O schema de manifest.json, combinado via allOf com as regras `extra`"""
+    with open(path, encoding="utf-8") as file:
+        schema = json.load(file)
+    return {"allOf": [schema, extra]} if extra else schema
+
+
+class Verdict(NamedTuple):
+    source: str
+    digest: str
+    errors: List[str]
+    cached: bool
+
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+
+def iter_directory(path: Path, pattern: str = "*.json") -> Iterator[Tuple[str, bytes]]:
+    """(nome, conteúdo) de cada manifesto do diretório, recursivamente"""
+    for file in sorted(Path(path).rglob(pattern)):
+        if file.is_file():
+            yield str(file), file.read_bytes()
+
+
+def iter_ndjson(stream: BinaryIO, name: str = "-") -> Iterator[Tuple[str, bytes]]:
+    """(nome:linha, conteúdo) de cada manifesto de um stream NDJSON"""
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if line:
+            yield f"{name}:{number}", line
+
+
+def iter_sources(paths: Iterable[str], pattern: str = "*.json") -> Iterator[Tuple[str, bytes]]:
+    """Diretórios, arquivos .ndjson/.jsonl (um manifesto por linha), arquivos
+    com um manifesto e "-" (NDJSON na entrada padrão)"""
+    for path in paths:
+        if path == "-":
+            yield from iter_ndjson(sys.stdin.buffer)
+        elif os.path.isdir(path):
+            yield from iter_directory(Path(path), pattern)
+        elif path.endswith((".ndjson", ".jsonl")):
+            with open(path, "rb") as stream:
+                yield from iter_ndjson(stream, path)
+        else:
+            yield path, Path(path).read_bytes()
+
+
+# Validador de cada processo do pool, compilado uma vez no initializer
+_worker_check: Optional[Check] = None
+
+
+def _validate_raw(check: Check, raw: bytes) -> List[str]:
+    try:
+        manifest = json.loads(raw)
+    except ValueError as e:
+        return [f"JSON inválido: {e}"]
+    errors: List[str] = []
+    check(manifest, (), errors)
+    return errors
+
+
+def _init_worker(schema: Dict[str, Any]):
+    global _worker_check
+    _worker_check = compile_schema(schema)
+
+
+def _validate_chunk(chunk: List[bytes]) -> List[List[str]]:
+    return [_validate_raw(_worker_check, raw) for raw in chunk]
+
+
+class VerdictCache:
+    """Vereditos por hash do conteúdo, em memória e, com `path`, num SQLite
+    compartilhado entre execuções. A chave inclui o hash do schema: mudar o
+    schema invalida todos os vereditos anteriores."""
+
+    def __init__(self, schema_digest: str, path: Optional[str] = None):
+        self.schema_digest = schema_digest
+        self._memory: Dict[str, List[str]] = {}
+        self.conn = None
+        if path:
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS manifest_verdicts (
+                    schema_digest TEXT NOT NULL,
+                    digest TEXT NOT NULL,
+                    errors TEXT NOT NULL,
+                    PRIMARY KEY (schema_digest, digest)
+                )
+            """)
+        self.lock = threading.Lock()
+
+    def get_many(self, digests: List[str]) -> Dict[str, List[str]]:
+        found = {digest: self._memory[digest] for digest in digests if digest in self._memory}
+        missing = [digest for digest in digests if digest not in found]
+        if self.conn is not None and missing:
+            with self.lock:
+                for start in range(0, len(missing), 500):
+                    batch = missing[start:start + 500]
+                    rows = self.conn.execute(
+                        f"SELECT digest, errors FROM manifest_verdicts WHERE schema_digest = ? "
+                        f"AND digest IN ({','.join('?' * len(batch))})",
+                        [self.schema_digest, *batch]
+                    ).fetchall()
+                    for digest, errors in rows:
+                        found[digest] = self._memory[digest] = json.loads(errors)
+        return found
+
+    def put_many(self, verdicts: Dict[str, List[str]]):
+        self._memory.update(verdicts)
+        if self.conn is not None and verdicts:
+            with self.lock, self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO manifest_verdicts (schema_digest, digest, errors) VALUES (?, ?, ?)",
+                    [(self.schema_digest, digest, json.dumps(errors)) for digest, errors in verdicts.items()]
+                )
+
+
+class ManifestValidationEngine:
+    """Valida manifestos contra o JSON Schema compilado uma única vez.
+
+    `validate_many` processa em lotes: o conteúdo de cada manifesto é
+    identificado pelo SHA-256, os já validados saem do cache sem nova
+    validação e o restante é dividido em blocos entre `workers` processos
+    (abaixo de `inline_below` manifestos, ou com `workers=0`, valida no
+    próprio processo). Cada veredito traz todos os erros do manifesto.
+    """
+
+    def __init__(self, schema: Optional[Dict[str, Any]] = None, workers: int = 0,
+                 cache_path: Optional[str] = None, batch_size: int = 4096, inline_below: int = 512):
+        self.schema = schema if schema is not None else load_schema()
+        self.check = compile_schema(self.schema)
+        self.schema_digest = hashlib.sha256(json.dumps(self.schema, sort_keys=True).encode()).hexdigest()[:16]
+        self.cache = VerdictCache(self.schema_digest, cache_path)
+        self.workers = workers
+        self.batch_size = batch_size
+        self.inline_below = inline_below
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.logger = logging.getLogger(__name__)
+
+    def __enter__(self) -> 'ManifestValidationEngine':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def validate(self, manifest: Any) -> List[str]:
+        """Todos os erros do manifesto já carregado (lista vazia se é válido)"""
+        errors: List[str] = []
+        self.check(manifest, (), errors)
+        return errors
+
+    def _pool_for(self, count: int) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 0 or count < self.inline_below:
+            return None
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.schema,))
+        return self._pool
+
+    def _validate_batch(self, raws: List[bytes]) -> List[List[str]]:
+        pool = self._pool_for(len(raws))
+        if pool is None:
+            return [_validate_raw(self.check, raw) for raw in raws]
+        chunk = max(64, math.ceil(len(raws) / (self.workers * 4)))
+        chunks = [raws[start:start + chunk] for start in range(0, len(raws), chunk)]
+        return [errors for result in pool.map(_validate_chunk, chunks) for errors in result]
+
+    def validate_many(self, sources: Iterable[Tuple[str, bytes]]) -> Iterator[Verdict]:
+        """Um Verdict por (nome, conteúdo), na ordem de entrada"""
+        batch: List[Tuple[str, bytes]] = []
+        for source in sources:
+            batch.append(source)
+            if len(batch) == self.batch_size:
+                yield from self._validate_sources(batch)
+                batch = []
+        if batch:
+            yield from self._validate_sources(batch)
+
+    def _validate_sources(self, batch: List[Tuple[str, bytes]]) -> List[Verdict]:
+        digests = [hashlib.sha256(raw).hexdigest() for _, raw in batch]
+        cached = self.cache.get_many(digests)
+        # Conteúdos repetidos no mesmo lote também são validados uma vez só
+        pending = {digest: raw for digest, (_, raw) in zip(digests, batch) if digest not in cached}
+        fresh = dict(zip(pending, self._validate_batch(list(pending.values()))))
+        self.cache.put_many(fresh)
+        return [
+            Verdict(name, digest, cached[digest] if digest in cached else fresh[digest], digest in cached)
+            for (name, _), digest in zip(batch, digests)
+        ]
+
+
+class ManifestRegistrar:
+    """Envia manifestos validados por um cliente HTTP assíncrono com pool de
+    conexões, no máximo `concurrency` requisições em andamento"""
+
+    def __init__(self, url: str, concurrency: int = 16, timeout: float = 10.0):
+        self.url = url
+        self.concurrency = concurrency
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        )
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def __aenter__(self) -> 'ManifestRegistrar':
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        await self._client.aclose()
+
+    async def register(self, manifest: Any) -> Optional[str]:
+        """None se registrou; senão a mensagem de erro"""
+        async with self._semaphore:
+            try:
+                response = await self._client.post(self.url, json=manifest)
+            except httpx.HTTPError as e:
+                return f"Erro na requisição: {e}"
+        if response.status_code >= 300:
+            return f"Erro ao registrar manifesto ({response.status_code}): {response.text[:200]}"
+        return None
+
+    async def register_many(self, manifests: Iterable[Tuple[str, Any]]) -> List[Tuple[str, Optional[str]]]:
+        """(nome, erro ou None) para cada (nome, manifesto), na ordem de entrada"""
+        manifests = list(manifests)
+        results = await asyncio.gather(*(self.register(manifest) for _, manifest in manifests))
+        return [(name, error) for (name, _), error in zip(manifests, results)]
@@ -0,0 +1,174 @@
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Limites superiores (em segundos) dos buckets de latência, como no prometheus_client
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class HistogramChild:
+    """Buckets pré-alocados: observar é um bisect e três somas, sem alocação"""
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metric:
+    """Família de séries de um nome. `labels(...)` cria a série na primeira vez
+    e depois só a devolve; no caminho quente, guarde a série retornada."""
+
+    def __init__(self, kind: str, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values: str):
+        child = self.children.get(values)
+        if child is None:
+            child = self.children[values] = (
+                HistogramChild(self.buckets) if self.kind == 'histogram' else CounterChild()
+            )
+        return child
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        for values, child in list(self.children.items()):
+            if self.kind == 'counter':
+                lines.append(f'{self.name}_total{_labels(self.labelnames, values)} {child.value}')
+                continue
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), child.counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{bound!r}"'
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, values)} {child.sum}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, values)} {child.count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Métricas do processo no formato de texto do Prometheus (sem dependências)"""
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self.gauges: List[Tuple[str, str, Callable[[], float]]] = []
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Metric:
+        metric = Metric('counter', name, help, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Metric:
+        metric = Metric('histogram', name, help, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, help: str, read: Callable[[], float]):
+        """Gauge lido só na coleta (por exemplo, o tamanho de um cache)"""
+        self.gauges.append((name, help, read))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for name, help, read in self.gauges:
+            lines.extend((f'# HELP {name} {help}', f'# TYPE {name} gauge', f'{name} {read()}'))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'protoai_http_requests', 'Requisições HTTP por rota, método e status', ('method', 'route', 'status')
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    'protoai_http_request_duration_seconds', 'Latência das requisições HTTP por rota', ('method', 'route')
+)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que conta e cronometra as requisições por rota.
+
+    A rota é o template (`/registry/services/{service_id}`), não o caminho,
+    para que o número de séries continue limitado. Ela é descoberta pelo
+    endpoint que o roteador do Starlette grava no scope.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: Optional[Dict[Callable, str]] = None
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get('endpoint')
+        if endpoint is None:
+            return '<unmatched>'
+        if self._routes is None:
+            self._routes = {
+                route.endpoint: route.path for route in scope['app'].routes if hasattr(route, 'endpoint')
+            }
+        return self._routes.get(endpoint, '<unmatched>')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = self._route(scope)
+            method = scope['method']
+            HTTP_LATENCY.labels(method, route).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
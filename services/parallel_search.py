@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import multiprocessing
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+
+from services.catalog import Catalog
+from services.columnar import ColumnarCatalog
+
+# Catálogos abertos em cada processo do pool: (caminho, hash do CSV) -> catálogo
+_catalogs: Dict[Tuple[str, str], ColumnarCatalog] = {}
+
+
+class StaleShardError(RuntimeError):
+    """O arquivo colunar no caminho já foi recompilado para outro CSV"""
+
+
+def _search_shard(path: str, source_hash: str, start: int, end: int, q: Optional[str],
+                  tags: Optional[List[str]], owner: Optional[str], license: Optional[str],
+                  limit: Optional[int]) -> bytes:
+    """Roda num processo do pool: busca as linhas [start, end) do arquivo
+    colunar, que cada processo mapeia por conta própria (nada do catálogo é
+    serializado), e devolve os índices como bytes de um array('I')"""
+    catalog = _catalogs.get((path, source_hash))
+    if catalog is None:
+        # O arquivo pode ter sido trocado depois que o snapshot do pedido foi
+        # aberto: só entra no cache se for mesmo o do hash pedido
+        catalog = ColumnarCatalog(path)
+        if catalog.source_hash != source_hash:
+            raise StaleShardError(f"{path} é de {catalog.source_hash[:8]}, não de {source_hash[:8]}")
+        _catalogs.clear()
+        _catalogs[(path, source_hash)] = catalog
+    ids = catalog.iter_range(q, tags, owner, license, start, end)
+    return array('I', islice(ids, limit) if limit is not None else ids).tobytes()
+
+
+def _ready() -> bool:
+    return True
+
+
+class ParallelSearch:
+    """Executa buscas por substring caras em shards, num pool de processos.
+
+    Só o catálogo colunar é dividido: os processos abrem o mesmo arquivo via
+    mmap e recebem apenas o intervalo de linhas e os filtros. O custo de uma
+    busca é estimado pelos bytes de texto que o `q` precisa varrer; abaixo
+    de `inline_bytes` ela roda no próprio worker, como antes. Os shards são
+    disparados em ondas de `workers`: numa busca paginada, a onda que já
+    completa a página encerra a busca.
+
+    Com `workers=0` não há pool, e as buscas caras só saem do event loop
+    para uma thread. O mesmo acontece quando o arquivo já foi recompilado e
+    os processos não conseguem mais abrir o snapshot da busca.
+    """
+
+    def __init__(self, workers: int = 0, shard_rows: int = 1 << 17, inline_bytes: int = 8 << 20):
+        self.workers = workers
+        self.shard_rows = max(ColumnarCatalog.BLOCK_SIZE, shard_rows)
+        self.inline_bytes = inline_bytes
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.logger = logging.getLogger(__name__)
+
+    async def start(self):
+        """Cria o pool e espera os processos subirem, para a primeira busca não pagar por isso"""
+        if self.workers > 0 and self._pool is None:
+            # spawn: o processo da API tem threads (gRPC, registro), e fork com threads não é seguro
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(self._pool, _ready) for _ in range(self.workers)))
+            self.logger.info("Busca paralela com %d processos", self.workers)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def cost(self, catalog: Catalog, q: Optional[str], after: int = -1) -> int:
+        """Bytes que a busca por `q` precisa examinar depois de `after`.
+
+        O catálogo em memória responde o q pelo índice de tokens, e as
+        buscas sem q são máscaras e postings: as duas são baratas (custo 0).
+        """
+        if not q or not isinstance(catalog, ColumnarCatalog):
+            return 0
+        return catalog.text_bytes(after + 1)
+
+    def is_heavy(self, catalog: Catalog, q: Optional[str], after: int = -1) -> bool:
+        return self.cost(catalog, q, after) >= self.inline_bytes
+
+    async def search(
+        self,
+        catalog: Catalog,
+        q: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        owner: Optional[str] = None,
+        license: Optional[str] = None,
+        after: int = -1,
+        limit: Optional[int] = None
+    ) -> List[int]:
+        """Até `limit` índices (todos, se None) de `catalog.iter_search(...)`, fora do event loop"""
+        loop = asyncio.get_running_loop()
+
+        def run():
+            ids = catalog.iter_search(q=q, tags=tags, owner=owner, license=license, after=after)
+            return list(islice(ids, limit) if limit is not None else ids)
+
+        if self._pool is None or not isinstance(catalog, ColumnarCatalog):
+            return await loop.run_in_executor(None, run)
+        try:
+            found = await self._search_shards(catalog, q, tags, owner, license, after, limit)
+        except StaleShardError as e:
+            # Este worker ainda serve o snapshot antigo, que segue mapeado aqui
+            self.logger.info("Busca paralela recusada (%s); buscando numa thread", e)
+            return await loop.run_in_executor(None, run)
+        ids = catalog.finish_search(found, q=q, tags=tags, owner=owner, license=license, after=after)
+        return list(islice(ids, limit) if limit is not None else ids)
+
+    async def _search_shards(self, catalog: ColumnarCatalog, q, tags, owner, license,
+                             after: int, limit: Optional[int]) -> array:
+        loop = asyncio.get_running_loop()
+        count = catalog.file_rows
+        shards = [(start, min(start + self.shard_rows, count)) for start in range(after + 1, count, self.shard_rows)]
+        # Linhas removidas são descartadas depois, então cada shard traz algumas a mais
+        wanted = None if limit is None else limit + len(catalog.rows) - len(catalog)
+        found = array('I')
+        for wave in range(0, len(shards), self.workers):
+            chunks = await asyncio.gather(*(
+                loop.run_in_executor(
+                    self._pool, _search_shard, catalog.path, catalog.source_hash, start, end,
+                    q, tags, owner, license, wanted
+                )
+                for start, end in shards[wave:wave + self.workers]
+            ))
+            for chunk in chunks:
+                found.frombytes(chunk)
+            if wanted is not None and len(found) >= wanted:
+                break
+        return found
@@ -0,0 +1,72 @@
+import gzip
+import hashlib
+from typing import Dict
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele só há gzip e identity
+    brotli = None
+
+
+def parse_quality(header: str) -> Dict[str, float]:
+    """Interpreta cabeçalhos como Accept/Accept-Encoding em {valor: q}"""
+    values: Dict[str, float] = {}
+    for part in header.split(','):
+        value, _, params = part.strip().partition(';')
+        if not value:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, raw = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(raw)
+                except ValueError:
+                    quality = 0.0
+        values[value.strip().lower()] = quality
+    return values
+
+
+class PrecomputedResponse:
+    """Corpo serializado e comprimido uma única vez, servido com ETag forte.
+
+    Cada codificação (identity, gzip, br) tem o seu próprio ETag, e
+    `If-None-Match` com qualquer um deles responde 304 sem corpo.
+    """
+
+    def __init__(self, body: bytes, media_type: str):
+        self.media_type = media_type
+        self.variants: Dict[str, bytes] = {
+            'identity': body,
+            'gzip': gzip.compress(body, compresslevel=9, mtime=0)
+        }
+        if brotli is not None:
+            self.variants['br'] = brotli.compress(body, quality=11)
+        self.etags = {
+            encoding: f'"{hashlib.sha256(payload).hexdigest()[:32]}"'
+            for encoding, payload in self.variants.items()
+        }
+
+    def _encoding(self, request: Request) -> str:
+        accepted = parse_quality(request.headers.get('accept-encoding', ''))
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and accepted.get(encoding, accepted.get('*', 0)) > 0:
+                return encoding
+        return 'identity'
+
+    def respond(self, request: Request) -> Response:
+        encoding = self._encoding(request)
+        headers = {'ETag': self.etags[encoding], 'Vary': 'Accept, Accept-Encoding'}
+
+        if_none_match = request.headers.get('if-none-match')
+        if if_none_match:
+            # If-None-Match usa comparação fraca: W/"x" equivale a "x"
+            tags = {tag.strip().replace('W/', '', 1) for tag in if_none_match.split(',')}
+            if '*' in tags or self.etags[encoding] in tags:
+                return Response(status_code=304, headers=headers)
+
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return Response(content=self.variants[encoding], media_type=self.media_type, headers=headers)
@@ -0,0 +1,23 @@
+import importlib
+import logging
+import sys
+from pathlib import Path
+from types import ModuleType
+from typing import Optional
+
+# Saída de scripts/generate_proto.py
+GENERATED_DIR = Path(__file__).resolve().parent.parent / 'peup' / 'proto'
+
+
+def load_generated(module: str) -> Optional[ModuleType]:
+    """Importa um módulo gerado pelo protoc (ex.: "protoai.v1.readme_pb2").
+
+    Retorna None se o código ainda não foi gerado com scripts/generate_proto.py.
+    """
+    if str(GENERATED_DIR) not in sys.path:
+        sys.path.append(str(GENERATED_DIR))
+    try:
+        return importlib.import_module(module)
+    except ImportError as e:
+        logging.getLogger(__name__).warning("Código protobuf %s indisponível: %s", module, e)
+        return None
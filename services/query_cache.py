@@ -0,0 +1,251 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+
+class SQLiteSemanticCache:
+    """Backend local com o mesmo formato das tabelas semantic_cache e
+    cache_metrics do schema do Supabase (MCP_Servers/supabase/schema.sql).
+
+    Qualquer backend precisa oferecer get/set/clear/record_metrics; este
+    serve de substituto local e é compartilhado entre workers pelo arquivo.
+    As entradas vencidas são apagadas a cada `PRUNE_EVERY` gravações.
+    """
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS semantic_cache (
+                query_hash TEXT NOT NULL UNIQUE,
+                results TEXT NOT NULL,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                expires_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_semantic_cache_expires ON semantic_cache(expires_at);
+            CREATE TABLE IF NOT EXISTS cache_metrics (
+                hit_type TEXT NOT NULL CHECK (hit_type IN ('hit', 'miss')),
+                timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
+                query_hash TEXT,
+                execution_time_ms INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_cache_metrics_timestamp ON cache_metrics(timestamp);
+        """)
+        self.lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, query_hash: str) -> Optional[List[int]]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT results FROM semantic_cache WHERE query_hash = ? AND expires_at > ?",
+                (query_hash, datetime.now().isoformat())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, query_hash: str, results: Sequence[int], expires_at: datetime):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO semantic_cache (query_hash, results, expires_at) VALUES (?, ?, ?)",
+                (query_hash, json.dumps(list(results)), expires_at.isoformat())
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self.conn.execute("DELETE FROM semantic_cache WHERE expires_at <= ?", (datetime.now().isoformat(),))
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM semantic_cache")
+
+    def record_metrics(self, metrics: List[Dict[str, Any]]):
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO cache_metrics (hit_type, timestamp, query_hash, execution_time_ms) "
+                "VALUES (:hit_type, :timestamp, :query_hash, :execution_time_ms)",
+                metrics
+            )
+
+
+class QueryCache:
+    """Cache em processo dos resultados do /search.
+
+    Guarda os índices das linhas de cada página (não os objetos de resposta),
+    com despejo LRU limitado por número de entradas e por bytes, e TTL. Um
+    backend opcional no formato de semantic_cache recebe as entradas por
+    write-through e atende as faltas locais; no event loop use `get_async` e
+    `put_async`, que acessam o backend num thread. Acertos e faltas são
+    registrados no formato de cache_metrics, em lotes; chamado do event loop,
+    `record` grava o lote num thread.
+
+    A chave inclui o fingerprint do catálogo: trocar o snapshot só esvazia o
+    cache local, e as entradas do snapshot antigo no backend compartilhado
+    deixam de ser consultadas e vencem pelo TTL.
+    """
+
+    METRICS_BATCH = 100
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024,
+                 ttl: float = 3600, backend: Optional[SQLiteSemanticCache] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.backend = backend
+        self.entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.total_time_ms = 0.0
+        self.pending_metrics: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(fingerprint: str, q: Optional[str] = None, tags: Optional[List[str]] = None,
+            owner: Optional[str] = None, license: Optional[str] = None, **options) -> str:
+        """Hash normalizado da consulta para o snapshot `fingerprint`.
+
+        Maiúsculas e a ordem das tags não mudam o resultado, então não mudam a chave.
+        """
+        normalized = {
+            "catalog": fingerprint,
+            "q": q.lower() if q else None,
+            "tags": sorted(set(tags)) if tags else None,
+            "owner": owner.lower() if owner else None,
+            "license": license.lower() if license else None,
+            **options
+        }
+        return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[array]:
+        ids = self._get_local(key)
+        if ids is None and self.backend is not None:
+            ids = self._from_backend(key, self.backend.get(key))
+        return ids
+
+    async def get_async(self, key: str) -> Optional[array]:
+        """get sem bloquear o event loop na consulta ao backend"""
+        ids = self._get_local(key)
+        if ids is None and self.backend is not None:
+            results = await asyncio.get_running_loop().run_in_executor(None, self.backend.get, key)
+            ids = self._from_backend(key, results)
+        return ids
+
+    def _get_local(self, key: str) -> Optional[array]:
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                ids, expires = entry
+                if expires > now:
+                    self.entries.move_to_end(key)
+                    return ids
+                self._evict(key)
+        return None
+
+    def _from_backend(self, key: str, results: Optional[List[int]]) -> Optional[array]:
+        if results is None:
+            return None
+        ids = array('I', results)
+        self._store(key, ids)
+        return ids
+
+    def put(self, key: str, ids: Sequence[int]):
+        ids = array('I', ids)
+        self._store(key, ids)
+        if self.backend is not None:
+            self.backend.set(key, ids, datetime.now() + timedelta(seconds=self.ttl))
+
+    async def put_async(self, key: str, ids: Sequence[int]):
+        """put sem bloquear o event loop na gravação no backend"""
+        ids = array('I', ids)
+        self._store(key, ids)
+        if self.backend is not None:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.backend.set, key, ids, datetime.now() + timedelta(seconds=self.ttl)
+            )
+
+    def _store(self, key: str, ids: array):
+        size = ids.itemsize * len(ids)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self._evict(key)
+            self.entries[key] = (ids, time.monotonic() + self.ttl)
+            self.bytes += size
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._evict(next(iter(self.entries)))
+
+    def _evict(self, key: str):
+        ids, _ = self.entries.pop(key)
+        self.bytes -= ids.itemsize * len(ids)
+
+    def clear(self):
+        """Esvazia o cache local; chamado quando o snapshot do catálogo é trocado.
+
+        O backend é compartilhado com workers que ainda podem servir o snapshot
+        antigo, então não é apagado aqui (veja a docstring da classe).
+        """
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def record(self, key: str, hit: bool, execution_time_ms: float):
+        """Registra um acerto ou falta no formato de cache_metrics"""
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self.total_time_ms += execution_time_ms
+            if self.backend is None:
+                return
+            self.pending_metrics.append({
+                "hit_type": "hit" if hit else "miss",
+                "timestamp": datetime.now().isoformat(),
+                "query_hash": key,
+                "execution_time_ms": round(execution_time_ms)
+            })
+            if len(self.pending_metrics) < self.METRICS_BATCH:
+                return
+            batch, self.pending_metrics = self.pending_metrics, []
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.backend.record_metrics(batch)
+            return
+        loop.run_in_executor(None, self.backend.record_metrics, batch).add_done_callback(_log_metrics_error)
+
+    def flush(self):
+        """Grava no backend as métricas ainda pendentes"""
+        with self.lock:
+            batch, self.pending_metrics = self.pending_metrics, []
+        if self.backend is not None and batch:
+            self.backend.record_metrics(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        """Mesmos campos de analyze_cache_performance, mais o uso atual"""
+        total = self.hits + self.misses
+        return {
+            "total_requests": total,
+            "hit_count": self.hits,
+            "miss_count": self.misses,
+            "hit_rate": round(self.hits / total * 100, 2) if total else 0.0,
+            "avg_execution_time": self.total_time_ms / total if total else 0.0,
+            "entries": len(self.entries),
+            "bytes": self.bytes
+        }
+
+
+def _log_metrics_error(future: asyncio.Future):
+    if not future.cancelled() and future.exception() is not None:
+        logging.getLogger(__name__).error("Erro ao gravar métricas do cache: %s", future.exception())
@@ -0,0 +1,389 @@
+import asyncio
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# Nomes do enum RateLimitType de proto/protoai/v1/rate_limit.proto
+USER = "RATE_LIMIT_TYPE_USER"
+IP = "RATE_LIMIT_TYPE_IP"
+API_KEY = "RATE_LIMIT_TYPE_API_KEY"
+SERVICE = "RATE_LIMIT_TYPE_SERVICE"
+RATE_LIMIT_TYPES = (USER, IP, API_KEY, SERVICE)
+
+# Vale para qualquer alvo do tipo que não tenha configuração própria
+ANY_TARGET = "*"
+
+_DURATION_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h|d)?\s*$')
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(value: str) -> float:
+    """Segundos a partir de "900s" (JSON de google.protobuf.Duration) ou "15m" (.env)"""
+    match = _DURATION_RE.match(value)
+    if not match:
+        raise ValueError(f"Duração inválida: {value}")
+    return float(match.group(1)) * _DURATION_UNITS[match.group(2) or "s"]
+
+
+def format_duration(seconds: float) -> str:
+    """Formato JSON de google.protobuf.Duration"""
+    return f"{seconds:.3f}s"
+
+
+class RateLimitRule(NamedTuple):
+    id: str
+    type: str
+    target_id: str
+    requests_per_unit: int
+    time_unit: float
+    block_on_exceed: bool = True
+    metadata: Dict[str, str] = {}
+
+
+class Decision(NamedTuple):
+    allowed: bool
+    remaining_requests: int
+    reset_after: float
+    config: Optional[RateLimitRule] = None
+
+
+class SQLiteRateLimitBackend:
+    """Buckets e configurações compartilhados entre workers por um arquivo SQLite.
+
+    Substituto local de um backend compartilhado (Redis etc.). Os workers não
+    consultam o arquivo a cada requisição: retiram lotes de tokens (`acquire`)
+    e os gastam localmente.
+    """
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS rate_limit_configs (
+                id TEXT PRIMARY KEY,
+                config TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+        """)
+        self.lock = threading.Lock()
+
+    def acquire(self, key: str, capacity: int, rate: float, want: int) -> Tuple[int, float]:
+        """Retira até `want` tokens do bucket compartilhado; retorna (obtidos, tokens restantes)"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    "SELECT tokens, updated_at FROM rate_limit_buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+                granted = min(want, int(tokens))
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                    (key, tokens - granted, now)
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return granted, tokens - granted
+
+    def save_config(self, config: RateLimitRule):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO rate_limit_configs (id, config, updated_at) VALUES (?, ?, ?)",
+                (config.id, json.dumps(config._asdict()), time.time())
+            )
+
+    def load_configs(self) -> List[RateLimitRule]:
+        with self.lock:
+            rows = self.conn.execute("SELECT config FROM rate_limit_configs").fetchall()
+        return [RateLimitRule(**json.loads(row[0])) for row in rows]
+
+
+class RateLimiter:
+    """Token bucket por (configuração, alvo), verificado em O(1).
+
+    Cada configuração permite `requests_per_unit` requisições de rajada,
+    repostas continuamente ao longo de `time_unit`. Os buckets ficam num mapa
+    dividido em `shards` dicionários em ordem LRU, limitado a `max_keys` chaves: bucket
+    parado tempo suficiente para encher de novo é descartado sem perda (recriá-lo
+    cheio dá no mesmo), e acima do limite saem os menos usados.
+
+    Com `backend`, os limites valem para todos os workers: cada bucket local
+    guarda só tokens retirados do backend em lotes de `lease_fraction` da
+    capacidade, então o backend é consultado a cada lote, não a cada requisição.
+    No event loop use as variantes `*_async`, que fazem essas consultas num thread.
+    """
+
+    CONFIG_RELOAD_INTERVAL = 1.0
+
+    def __init__(self, shards: int = 16, max_keys: int = 100_000,
+                 backend: Optional[SQLiteRateLimitBackend] = None, lease_fraction: float = 0.1):
+        # Número de shards potência de 2: a escolha do shard é um AND
+        shard_count = 1 << max(0, (shards - 1).bit_length())
+        self._shard_mask = shard_count - 1
+        self._shards: List[Dict[Tuple[str, str], tuple]] = [{} for _ in range(shard_count)]
+        self._shard_capacity = max(1, max_keys // shard_count)
+        self.backend = backend
+        self.lease_fraction = lease_fraction
+        self.configs: Dict[Tuple[str, str], RateLimitRule] = {}
+        self._next_reload = 0.0
+        # Lotes sendo retirados do backend, um por bucket
+        self._refills: Dict[Tuple[str, str], asyncio.Future] = {}
+        if backend is not None:
+            self._reload_configs()
+
+    def __bool__(self) -> bool:
+        return bool(self.configs) or self.backend is not None
+
+    def update(self, config: RateLimitRule) -> RateLimitRule:
+        """Cria ou substitui a configuração de (type, target_id)"""
+        if config.type not in RATE_LIMIT_TYPES:
+            raise ValueError(f"Tipo de limite inválido: {config.type}")
+        if config.requests_per_unit <= 0 or config.time_unit <= 0:
+            raise ValueError("requests_per_unit e time_unit precisam ser positivos")
+        for key, existing in list(self.configs.items()):
+            if existing.id == config.id:
+                del self.configs[key]
+        self.configs[(config.type, config.target_id)] = config
+        # Os buckets da configuração antiga recomeçam com a capacidade nova
+        for shard in self._shards:
+            for key in [key for key in shard if key[0] == config.id]:
+                del shard[key]
+        if self.backend is not None:
+            self.backend.save_config(config)
+        return config
+
+    def _reload_configs(self):
+        self.configs = {(config.type, config.target_id): config for config in self.backend.load_configs()}
+        self._next_reload = time.monotonic() + self.CONFIG_RELOAD_INTERVAL
+
+    def config_for(self, type: str, target_id: str) -> Optional[RateLimitRule]:
+        configs = self.configs
+        return configs.get((type, target_id)) or configs.get((type, ANY_TARGET))
+
+    def check(self, type: str, target_id: str) -> Decision:
+        """Consome um token do alvo; sem configuração aplicável, sempre permite"""
+        now = time.monotonic()
+        if self.backend is not None and now >= self._next_reload:
+            self._reload_configs()
+        config = self.config_for(type, target_id)
+        if config is None:
+            return Decision(True, -1, 0.0)
+        allowed, tokens = self._take(config, target_id, now)
+        return self._decision(config, allowed, tokens)
+
+    async def check_async(self, type: str, target_id: str) -> Decision:
+        """check sem bloquear o event loop com o backend"""
+        if self.backend is None:
+            return self.check(type, target_id)
+        await self._reload_configs_async()
+        config = self.config_for(type, target_id)
+        if config is None:
+            return Decision(True, -1, 0.0)
+        await self._refill_empty(((config, target_id),))
+        allowed, tokens = self._take(config, target_id, time.monotonic(), acquire=False)
+        return self._decision(config, allowed, tokens)
+
+    def check_request(self, identities: Tuple[Tuple[str, Optional[str]], ...]) -> Optional[Decision]:
+        """Aplica todas as configurações que casam com a requisição.
+
+        Retorna a primeira decisão que bloqueia, ou None se a requisição passa.
+        """
+        now = time.monotonic()
+        if self.backend is not None and now >= self._next_reload:
+            self._reload_configs()
+        return self._check_request(identities, now, acquire=True)
+
+    async def check_request_async(self, identities: Tuple[Tuple[str, Optional[str]], ...]) -> Optional[Decision]:
+        """check_request sem bloquear o event loop.
+
+        Com backend, a releitura das configurações e a retirada dos lotes rodam
+        num thread; os tokens continuam sendo gastos localmente, no loop.
+        """
+        if self.backend is None:
+            return self.check_request(identities)
+        await self._reload_configs_async()
+        matches = []
+        for type, target_id in identities:
+            config = None if target_id is None else self.config_for(type, target_id)
+            if config is not None:
+                matches.append((config, target_id))
+        await self._refill_empty(matches)
+        return self._check_request(identities, time.monotonic(), acquire=False)
+
+    def _check_request(self, identities, now: float, acquire: bool) -> Optional[Decision]:
+        configs = self.configs
+        for type, target_id in identities:
+            if target_id is None:
+                continue
+            config = configs.get((type, target_id)) or configs.get((type, ANY_TARGET))
+            if config is None:
+                continue
+            allowed, tokens = self._take(config, target_id, now, acquire)
+            if not allowed and config.block_on_exceed:
+                return self._decision(config, allowed, tokens)
+        return None
+
+    @staticmethod
+    def _decision(config: RateLimitRule, allowed: bool, tokens: float) -> Decision:
+        rate = config.requests_per_unit / config.time_unit
+        return Decision(allowed, int(tokens), 0.0 if allowed else (1 - tokens) / rate, config)
+
+    async def _reload_configs_async(self):
+        now = time.monotonic()
+        if now >= self._next_reload:
+            # Marcado antes de esperar: as requisições concorrentes não releem de novo
+            self._next_reload = now + self.CONFIG_RELOAD_INTERVAL
+            await asyncio.get_running_loop().run_in_executor(None, self._reload_configs)
+
+    async def _refill_empty(self, matches):
+        """Retira do backend um lote para cada bucket local vazio, fora do loop"""
+        while True:
+            empty = [(config, target_id) for config, target_id in matches if self._tokens((config.id, target_id)) < 1]
+            if not empty:
+                return
+            leases = await asyncio.gather(*(asyncio.shield(self._refill(config, target_id)) for config, target_id in empty))
+            # O lote é dividido com as requisições concorrentes e pode acabar antes
+            # desta acordar; tenta de novo enquanto o backend ainda tiver tokens
+            if not all(granted for granted, _ in leases):
+                return
+
+    def _refill(self, config: RateLimitRule, target_id: str) -> asyncio.Future:
+        # Requisições concorrentes do mesmo alvo esperam o mesmo lote em vez de
+        # cada uma retirar o seu do bucket compartilhado
+        key = (config.id, target_id)
+        future = self._refills.get(key)
+        if future is None:
+            capacity = config.requests_per_unit
+            future = asyncio.get_running_loop().run_in_executor(
+                None, self.backend.acquire, f"{config.id}:{target_id}", capacity,
+                capacity / config.time_unit, max(1, int(capacity * self.lease_fraction))
+            )
+            self._refills[key] = future
+            future.add_done_callback(lambda done: self._refilled(key, done))
+        return future
+
+    def _refilled(self, key: Tuple[str, str], future: asyncio.Future):
+        # Roda no loop; credita o lote mesmo se quem o pediu foi cancelado
+        del self._refills[key]
+        if future.cancelled() or future.exception() is not None:
+            return
+        now = time.monotonic()
+        shard = self._shards[hash(key) & self._shard_mask]
+        bucket = shard.pop(key, None)
+        if bucket is None:
+            self._evict(shard, now)
+            bucket = (0.0, now, now)
+        shard[key] = (bucket[0] + future.result()[0], now, bucket[2])
+
+    def _tokens(self, key: Tuple[str, str]) -> float:
+        bucket = self._shards[hash(key) & self._shard_mask].get(key)
+        return bucket[0] if bucket is not None else 0.0
+
+    def _take(self, config: RateLimitRule, target_id: str, now: float, acquire: bool = True) -> Tuple[bool, float]:
+        """Consome um token; retorna (permitido, tokens que sobraram).
+
+        Com `acquire` falso, não consulta o backend: só gasta o que já está no bucket local.
+        """
+        key = (config.id, target_id)
+        shard = self._shards[hash(key) & self._shard_mask]
+        capacity = config.requests_per_unit
+        rate = capacity / config.time_unit
+        # pop + reinserção deixa a chave no fim: o dict vira um LRU
+        bucket = shard.pop(key, None)
+        if bucket is None:
+            self._evict(shard, now)
+            tokens = 0.0 if self.backend is not None else float(capacity)
+        elif self.backend is None:
+            tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+        else:
+            tokens = bucket[0]
+
+        shared = 0.0
+        if tokens < 1 and self.backend is not None and acquire:
+            granted, shared = self.backend.acquire(
+                f"{config.id}:{target_id}", capacity, rate, max(1, int(capacity * self.lease_fraction))
+            )
+            tokens += granted
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        # (tokens, última atualização, instante em que o bucket estará cheio de novo)
+        shard[key] = (tokens, now, now + (capacity - tokens - shared) / rate)
+        return allowed, tokens + shared
+
+    def _evict(self, shard: Dict[Tuple[str, str], tuple], now: float):
+        # O mais antigo do LRU é o candidato: parado até encher, ou acima da capacidade
+        while shard:
+            key = next(iter(shard))
+            if len(shard) >= self._shard_capacity or (self.backend is None and shard[key][2] <= now):
+                del shard[key]
+            else:
+                return
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+
+def client_identities(scope: Dict[str, Any]) -> Tuple[Tuple[str, Optional[str]], ...]:
+    """(tipo, alvo) de uma requisição ASGI: X-API-Key, X-User-Id, IP do cliente e rota"""
+    api_key = user = None
+    for name, value in scope["headers"]:
+        if name == b"x-api-key":
+            api_key = value.decode("latin-1")
+        elif name == b"x-user-id":
+            user = value.decode("latin-1")
+    client = scope.get("client")
+    return (
+        (API_KEY, api_key),
+        (USER, user),
+        (IP, client[0] if client else None),
+        (SERVICE, scope["path"]),
+    )
+
+
+class RateLimitMiddleware:
+    """Middleware ASGI que aplica o RateLimiter antes de cada requisição HTTP.
+
+    Excedido um limite com block_on_exceed, responde 429 com Retry-After sem
+    chamar a aplicação. Sem configurações, só repassa a requisição.
+    """
+
+    def __init__(self, app, limiter: RateLimiter, exempt_paths: Tuple[str, ...] = ()):
+        self.app = app
+        self.limiter = limiter
+        self.exempt_paths = frozenset(exempt_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.limiter or scope["path"] in self.exempt_paths:
+            return await self.app(scope, receive, send)
+        decision = await self.limiter.check_request_async(client_identities(scope))
+        if decision is None:
+            return await self.app(scope, receive, send)
+
+        body = json.dumps({"detail": "Limite de requisições excedido"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(decision.reset_after)).encode()),
+                (b"x-ratelimit-limit", str(decision.config.requests_per_unit).encode()),
+                (b"x-ratelimit-remaining", b"0"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,68 +1,329 @@
-from typing import List, Dict, Any, Optional
-from models.intent import Intent, IntentResponse
+from typing import List, Dict, Any, Optional, Set, Tuple
+from collections import OrderedDict
+from importlib.util import find_spec
+from urllib.parse import urlsplit
+from models.intent import AnyIntent, CompactIntentResponse
+from services.dispatch import DispatchError, ExecutionDispatcher
+from services.fast_json import dumps
+from services.metrics import REGISTRY as METRICS
+from services.registry_store import RegistryStore
+import asyncio
 import httpx
 import logging
+import time
+
+INTENT_LATENCY = METRICS.histogram(
+    'protoai_intent_duration_seconds', 'Tempo de process_intent por tipo e resultado', ('type', 'outcome')
+)
+UPSTREAM_LATENCY = METRICS.histogram(
+    'protoai_upstream_request_duration_seconds', 'Tempo das chamadas HTTP aos upstreams', ('upstream',)
+)
+DISCOVERY_EVENTS = METRICS.counter(
+    'protoai_discovery_cache_total', 'Consultas ao cache de descoberta por resultado', ('event',)
+)
+
+# Chave da descoberta: (tags ordenadas, busca aproximada)
+DiscoveryKey = Tuple[Tuple[str, ...], bool]
+# Resultado da descoberta: (serviços, {"services": serviços} já em JSON)
+Discovery = Tuple[List[Dict[str, Any]], bytes]
+_NO_SERVICES: Discovery = ([], dumps({"services": []}))
+
+
+def discovery_key(tags: Optional[List[str]], fuzzy: bool = False) -> DiscoveryKey:
+    return (tuple(sorted(set(tags))) if tags else (), fuzzy)
+
 
 class RegistryService:
-    def __init__(self, mcp_url: str = "http://localhost:8000"):
+    def __init__(
+        self,
+        mcp_url: str = "http://localhost:8000",
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        max_concurrency_per_upstream: int = 32,
+        timeout: float = 10.0,
+        discovery_ttl: float = 30.0,
+        discovery_stale_ttl: float = 300.0,
+        discovery_cache_size: int = 1024,
+        store: Optional[RegistryStore] = None
+    ):
         self.mcp_url = mcp_url
         self.logger = logging.getLogger(__name__)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self.timeout = timeout
+        self.max_concurrency_per_upstream = max_concurrency_per_upstream
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+        # Cache de descoberta por conjunto de tags: fresco até discovery_ttl,
+        # servido como stale (com revalidação em background) até discovery_stale_ttl.
+        # Cada entrada guarda também o payload das respostas de intenção já serializado
+        self.discovery_ttl = discovery_ttl
+        self.discovery_stale_ttl = discovery_stale_ttl
+        self.discovery_cache_size = discovery_cache_size
+        self._discovery_cache: "OrderedDict[DiscoveryKey, Tuple[Discovery, float]]" = OrderedDict()
+        self._inflight: Dict[DiscoveryKey, asyncio.Future] = {}
+        self._refreshes: Set[asyncio.Task] = set()
+        # Contadores por chave só das mais recentes (mesmo limite do cache); os
+        # totais ficam em DISCOVERY_EVENTS, com rótulos fixos
+        self._discovery_counters: "OrderedDict[DiscoveryKey, Dict[str, int]]" = OrderedDict()
+
+        self.dispatcher = ExecutionDispatcher(self)
+        self.store = store
+
+    async def startup(self):
+        """Cria o cliente HTTP compartilhado (keep-alive, HTTP/2 se o pacote h2 existir)"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=find_spec("h2") is not None
+            )
+
+    async def shutdown(self):
+        """Fecha as conexões do pool"""
+        for refresh in list(self._refreshes):
+            refresh.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self) -> "RegistryService":
+        await self.startup()
+        return self
 
-    async def discover_services(self, tags: Optional[List[str]] = None) -> List[Dict[str, Any]]:
-        """Descobre serviços baseado em tags usando o MCP"""
+    async def __aexit__(self, *exc_info):
+        await self.shutdown()
+
+    def _semaphore(self, url: str) -> asyncio.Semaphore:
+        """Limita as requisições simultâneas por upstream (esquema + host)"""
+        parts = urlsplit(url)
+        upstream = f"{parts.scheme}://{parts.netloc}"
+        semaphore = self._semaphores.get(upstream)
+        if semaphore is None:
+            semaphore = self._semaphores[upstream] = asyncio.Semaphore(self.max_concurrency_per_upstream)
+        return semaphore
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        if self._client is None:
+            await self.startup()
+        async with self._semaphore(url):
+            started = time.perf_counter()
+            try:
+                return await self._client.request(method, url, **kwargs)
+            finally:
+                UPSTREAM_LATENCY.labels(urlsplit(url).netloc).observe(time.perf_counter() - started)
+
+    async def _get(self, url: str, **kwargs) -> httpx.Response:
+        return await self._request("GET", url, **kwargs)
+
+    async def _search(self, key: DiscoveryKey) -> Optional[List[Dict[str, Any]]]:
+        tags, fuzzy = key
         try:
             params = {}
             if tags:
                 params['tags'] = ','.join(tags)
+            if fuzzy:
+                params['fuzzy'] = 'true'
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.mcp_url}/search", params=params)
-                response.raise_for_status()
-                return response.json()['results']
+            response = await self._get(f"{self.mcp_url}/search", params=params)
+            response.raise_for_status()
+            return response.json()['results']
         except Exception as e:
-            self.logger.error(f"Erro na descoberta de serviços: {str(e)}")
-            return []
+            self.logger.error("Erro na descoberta de serviços: %s", e)
+            return None
+
+    def _count(self, key: DiscoveryKey, event: str):
+        DISCOVERY_EVENTS.labels(event).inc()
+        counters = self._discovery_counters.pop(key, None)
+        if counters is None:
+            counters = {"hit": 0, "stale": 0, "miss": 0, "coalesced": 0}
+            while len(self._discovery_counters) >= self.discovery_cache_size:
+                self._discovery_counters.popitem(last=False)
+        self._discovery_counters[key] = counters
+        counters[event] += 1
+
+    def _fetch(self, key: DiscoveryKey) -> asyncio.Future:
+        """Busca no /search com single-flight: chamadas iguais compartilham o mesmo future"""
+        future = self._inflight.get(key)
+        if future is not None:
+            return future
+
+        async def run():
+            try:
+                services = await self._search(key)
+                if services is None:
+                    return _NO_SERVICES
+                discovery = (services, dumps({"services": services}))
+                self._discovery_cache[key] = (discovery, time.monotonic())
+                self._discovery_cache.move_to_end(key)
+                while len(self._discovery_cache) > self.discovery_cache_size:
+                    self._discovery_cache.popitem(last=False)
+                return discovery
+            finally:
+                del self._inflight[key]
+
+        future = self._inflight[key] = asyncio.ensure_future(run())
+        return future
+
+    async def discover_services(self, tags: Optional[List[str]] = None, fuzzy: bool = False) -> List[Dict[str, Any]]:
+        """Descobre serviços baseado em tags usando o MCP.
 
-    async def process_intent(self, intent: Intent) -> IntentResponse:
-        """Processa uma intenção recebida"""
+        Com `fuzzy`, o /search também aceita tags com erros de digitação e
+        sinônimos das tags pedidas (fuzzy=true).
+        """
+        services, _ = await self._discover(discovery_key(tags, fuzzy))
+        return list(services)
+
+    async def _discover(self, key: DiscoveryKey) -> Discovery:
+        """Descoberta pelo cache; o resultado é compartilhado, quem o altera faz uma cópia"""
+        entry = self._discovery_cache.get(key)
+        if entry is not None:
+            discovery, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < self.discovery_ttl:
+                self._count(key, "hit")
+                return discovery
+            if age < self.discovery_stale_ttl:
+                # Stale-while-revalidate: responde já e atualiza em background
+                self._count(key, "stale")
+                if key not in self._inflight:
+                    refresh = self._fetch(key)
+                    self._refreshes.add(refresh)
+                    refresh.add_done_callback(self._refreshes.discard)
+                return discovery
+
+        self._count(key, "coalesced" if key in self._inflight else "miss")
+        return await asyncio.shield(self._fetch(key))
+
+    def discovery_stats(self) -> Dict[str, Dict[str, int]]:
+        """Contadores de hit/stale/miss/coalesced dos conjuntos de tags usados mais recentemente"""
+        return {
+            ','.join(tags) + (' (fuzzy)' if fuzzy else ''): dict(counters)
+            for (tags, fuzzy), counters in self._discovery_counters.items()
+        }
+
+    async def process_intent(self, intent: AnyIntent) -> CompactIntentResponse:
+        """Processa uma intenção recebida (Intent ou CompactIntent); o `data` da
+        resposta já sai serializado em JSON"""
+        started = time.perf_counter()
+        response = await self._process_intent(intent)
+        INTENT_LATENCY.labels(intent.type.value, "success" if response.success else "error").observe(
+            time.perf_counter() - started
+        )
+        return response
+
+    async def _process_intent(self, intent: AnyIntent) -> CompactIntentResponse:
         try:
             if intent.type == "discovery":
-                services = await self.discover_services(intent.tags)
-                return IntentResponse(
+                fuzzy = bool((intent.context or {}).get("fuzzy", False))
+                _, payload = await self._discover(discovery_key(intent.tags, fuzzy))
+                return CompactIntentResponse(
                     success=True,
                     message="Serviços encontrados com sucesso",
-                    data={"services": services}
+                    data_json=payload
                 )
             
             elif intent.type == "execution":
-                # TODO: Implementar lógica de execução
-                # Aqui você implementaria a lógica para executar
-                # a operação no serviço descoberto
-                return IntentResponse(
-                    success=False,
-                    message="Execução de operações ainda não implementada",
-                    error="Not implemented"
+                if not intent.service_name or not intent.operation:
+                    return CompactIntentResponse(
+                        success=False,
+                        message="service_name e operation são obrigatórios para execução",
+                        error="Invalid intent"
+                    )
+                deadline_ms = (intent.context or {}).get("deadline_ms")
+                try:
+                    result = await self.dispatcher.execute(
+                        intent.service_name,
+                        intent.operation,
+                        intent.parameters,
+                        deadline=deadline_ms / 1000 if deadline_ms else None
+                    )
+                except DispatchError as e:
+                    return CompactIntentResponse(
+                        success=False,
+                        message="Falha na execução da operação",
+                        error=str(e)
+                    )
+                return CompactIntentResponse(
+                    success=True,
+                    message="Operação executada com sucesso",
+                    data_json=dumps({"result": result})
                 )
             
             elif intent.type == "registration":
-                # TODO: Implementar lógica de registro
-                return IntentResponse(
-                    success=False,
-                    message="Registro de serviços ainda não implementado",
-                    error="Not implemented"
+                if self.store is None:
+                    return CompactIntentResponse(
+                        success=False,
+                        message="Registro de serviços não configurado",
+                        error="Registry store unavailable"
+                    )
+                parameters = intent.parameters or {}
+                try:
+                    record = await self.store.register(
+                        parameters.get("manifest", parameters),
+                        service_id=parameters.get("service_id")
+                    )
+                except ValueError as e:
+                    return CompactIntentResponse(
+                        success=False,
+                        message="Manifesto inválido",
+                        error=str(e)
+                    )
+                return CompactIntentResponse(
+                    success=True,
+                    message="Serviço registrado com sucesso",
+                    data_json=dumps({"service_id": record.service_id, "registration_time": record.registered_at})
                 )
             
             else:
-                return IntentResponse(
+                return CompactIntentResponse(
                     success=False,
                     message="Tipo de intenção não suportado",
                     error="Invalid intent type"
                 )
 
         except Exception as e:
-            self.logger.error(f"Erro no processamento da intenção: {str(e)}")
-            return IntentResponse(
+            self.logger.error("Erro no processamento da intenção: %s", e)
+            return CompactIntentResponse(
                 success=False,
                 message="Erro no processamento da intenção",
                 error=str(e)
-            )
\ No newline at end of file
+            )
+
+    async def process_intents(self, batch: List[AnyIntent], max_concurrency: int = 64) -> List[CompactIntentResponse]:
+        """Processa um lote de intenções e devolve as respostas na mesma ordem.
+
+        Descobertas com o mesmo conjunto de tags são resolvidas uma única vez no
+        lote; as demais intenções rodam em paralelo, até `max_concurrency` por vez.
+        Um erro em um item vira uma resposta de erro só para aquele item.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        shared: Dict[DiscoveryKey, asyncio.Task] = {}
+
+        async def run(intent: AnyIntent) -> CompactIntentResponse:
+            async with semaphore:
+                return await self.process_intent(intent)
+
+        tasks = []
+        for intent in batch:
+            if intent.type == "discovery":
+                key = discovery_key(intent.tags, bool((intent.context or {}).get("fuzzy", False)))
+                task = shared.get(key)
+                if task is None:
+                    task = shared[key] = asyncio.ensure_future(run(intent))
+            else:
+                task = asyncio.ensure_future(run(intent))
+            tasks.append(task)
+
+        responses = await asyncio.gather(*tasks, return_exceptions=True)
+        return [
+            CompactIntentResponse(
+                success=False,
+                message="Erro no processamento da intenção",
+                error=str(response)
+            ) if isinstance(response, BaseException) else response
+            for response in responses
+        ]
@@ -0,0 +1,514 @@
+import asyncio
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import uuid
+from bisect import bisect_right
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from services.catalog import CatalogRow
+
+
+class ServiceRecord(NamedTuple):
+    service_id: str
+    seq: int
+    manifest: Dict[str, Any]
+    registered_at: str
+    updated_at: str
+
+
+def catalog_row(manifest: Dict[str, Any]) -> CatalogRow:
+    """Linha do catálogo do /search a partir do project_info do manifesto"""
+    info = manifest.get("project_info", {})
+    return CatalogRow(
+        name=info.get("name", ""),
+        description=info.get("description", ""),
+        url=info.get("repository", ""),
+        tags=tuple(info.get("tags", [])),
+        owner=info.get("owner", ""),
+        license=info.get("license", ""),
+        version=info.get("version", "")
+    )
+
+
+# Campos do project_info lidos pelo índice e pelo catálogo, todos opcionais exceto o nome
+_TEXT_FIELDS = ("name", "description", "repository", "owner", "license", "version")
+
+
+def validate_manifest(manifest: Any):
+    """Confere o formato que o registro lê do manifesto; ValueError se inválido.
+
+    Roda antes de a operação ir para o log: uma entrada gravada precisa
+    poder ser aplicada na recuperação.
+    """
+    if not isinstance(manifest, dict):
+        raise ValueError("Manifesto deve ser um objeto")
+    info = manifest.get("project_info")
+    if not isinstance(info, dict):
+        raise ValueError("Manifesto precisa de project_info")
+    for field in _TEXT_FIELDS:
+        if field in info and not isinstance(info[field], str):
+            raise ValueError(f"project_info.{field} deve ser string")
+    if not info.get("name"):
+        raise ValueError("Manifesto precisa de project_info.name")
+    tags = info.get("tags", [])
+    if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+        raise ValueError("project_info.tags deve ser uma lista de strings")
+
+
+class RegistryStore:
+    """Registro embutido de serviços (manifestos ReadmeProto).
+
+    Cada alteração é gravada primeiro num log append-only (`registry.log`,
+    uma linha JSON por operação, com fsync) e depois no SQLite
+    (`registry.db`), que guarda os manifestos com índices por tag e owner.
+
+    Vários processos (workers) podem abrir o mesmo diretório. Cada lote de
+    escrita roda numa transação BEGIN IMMEDIATE, o lock de escrita do SQLite,
+    que vale entre processos: sob ele o processo lê o último seq gravado,
+    numera as operações, grava o log com fsync e só então faz o commit. Se
+    algo falha antes do commit, o log volta ao tamanho anterior ao lote.
+    Entradas do log além do último seq do SQLite são de um processo que caiu
+    entre o fsync e o commit: o próximo escritor (ou a abertura) as reaplica,
+    e a que não pode ser aplicada vai para `registry.quarantine`.
+
+    As leituras (`get`, `list`, `search`) são atendidas pelos dicionários em
+    memória: busca por service_id é O(1). Eles são atualizados depois de cada
+    commit, relendo do SQLite os serviços que o log diz terem mudado, e a
+    thread de escrita, ociosa, confere a cada `sync_interval` segundos se outro
+    processo gravou algo. A thread altera os índices com `_lock`, e as leituras
+    copiam sob o mesmo lock o que vão percorrer. As escritas agrupam as
+    operações que chegam em `batch_window` segundos (group commit): um fsync e
+    uma transação por lote. Os `listeners` são chamados nessa thread, depois
+    do commit, com (registros adicionados, ids removidos), inclusive para
+    alterações de outros processos; uma falha neles não desfaz a escrita.
+    """
+
+    def __init__(self, directory: str, batch_size: int = 256, batch_window: float = 0.002,
+                 sync_interval: float = 0.5):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.sync_interval = sync_interval
+        self.listeners: List[Callable[[List[ServiceRecord], List[str]], None]] = []
+        self.logger = logging.getLogger(__name__)
+        self._records: Dict[str, ServiceRecord] = {}
+        self._seqs: List[int] = []
+        self._by_seq: Dict[int, str] = {}
+        self._tag_index: Dict[str, Set[str]] = {}
+        self._owner_index: Dict[str, Set[str]] = {}
+        # Último seq refletido na memória e posição do log até onde ele foi lido
+        self._last_seq = 0
+        self._log_offset = 0
+        self._data_version: Optional[int] = None
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Tuple[str, Any, asyncio.Future]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._log_path = os.path.join(directory, "registry.log")
+        self._log_fd: Optional[int] = None
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def open(self):
+        """Abre log e banco, recupera o estado e inicia a thread de escrita"""
+        if self._writer is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        # isolation_level=None: as transações são abertas explicitamente (BEGIN IMMEDIATE)
+        self._conn = sqlite3.connect(
+            os.path.join(self.directory, "registry.db"), check_same_thread=False, isolation_level=None, timeout=30.0
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS services (
+                service_id TEXT PRIMARY KEY,
+                seq INTEGER NOT NULL UNIQUE,
+                name TEXT NOT NULL,
+                owner TEXT NOT NULL,
+                manifest TEXT NOT NULL,
+                registered_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_services_owner ON services(owner);
+            CREATE TABLE IF NOT EXISTS service_tags (
+                service_id TEXT NOT NULL REFERENCES services(service_id) ON DELETE CASCADE,
+                tag TEXT NOT NULL,
+                PRIMARY KEY (tag, service_id)
+            );
+            CREATE TABLE IF NOT EXISTS registry_meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+        """)
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._log_fd = os.open(self._log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+        self._conn.execute("BEGIN")
+        try:
+            self._last_seq = self._meta_seq()
+            records = [ServiceRecord(service_id, seq, json.loads(manifest), registered_at, updated_at)
+                       for service_id, seq, manifest, registered_at, updated_at in self._conn.execute(
+                           "SELECT service_id, seq, manifest, registered_at, updated_at FROM services ORDER BY seq")]
+        finally:
+            self._conn.execute("COMMIT")
+        for record in records:
+            self._index(record)
+        # Lote vazio: só reaplica o que o log tem além do SQLite
+        self._write([])
+
+        self._writer = threading.Thread(target=self._run, name="registry-store-writer", daemon=True)
+        self._writer.start()
+
+    def _meta_seq(self) -> int:
+        row = self._conn.execute("SELECT value FROM registry_meta WHERE key = 'last_seq'").fetchone()
+        return row[0] if row else 0
+
+    def _scan(self, committed_seq: int):
+        """Lê o log a partir de onde a memória parou.
+
+        Retorna os ids alterados até `committed_seq` (já no SQLite), a posição
+        logo depois deles, as entradas posteriores a `committed_seq` com a
+        posição do fim de cada uma e a posição do fim da última linha completa.
+        """
+        touched: Dict[str, None] = {}
+        committed = end = self._log_offset
+        pending: List[Tuple[int, Dict[str, Any]]] = []
+        if not os.path.exists(self._log_path):
+            return touched, committed, pending, end
+        with open(self._log_path, "rb") as log:
+            log.seek(end)
+            for line in log:
+                if not line.endswith(b"\n"):
+                    # Gravação interrompida (ou ainda em andamento noutro processo)
+                    break
+                end += len(line)
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    self.logger.warning("Registro: linha ilegível no log ignorada")
+                    continue
+                if entry["seq"] <= self._last_seq:
+                    committed = end if not pending else committed
+                elif entry["seq"] <= committed_seq and not pending:
+                    touched[entry["service_id"]] = None
+                    committed = end
+                else:
+                    pending.append((end, entry))
+        return touched, committed, pending, end
+
+    def _rows(self, service_ids) -> Dict[str, ServiceRecord]:
+        """Estado atual dos serviços no SQLite; os ausentes foram removidos"""
+        ids = list(service_ids)
+        rows: Dict[str, ServiceRecord] = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            for service_id, seq, manifest, registered_at, updated_at in self._conn.execute(
+                "SELECT service_id, seq, manifest, registered_at, updated_at FROM services "
+                f"WHERE service_id IN ({','.join('?' * len(chunk))})", chunk
+            ):
+                rows[service_id] = ServiceRecord(service_id, seq, json.loads(manifest), registered_at, updated_at)
+        return rows
+
+    def _sync(self):
+        """Traz para a memória o que outros processos gravaram"""
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return
+        self._data_version = version
+        # Uma transação de leitura: o seq e as linhas vêm do mesmo snapshot
+        self._conn.execute("BEGIN")
+        try:
+            committed_seq = self._meta_seq()
+            if committed_seq <= self._last_seq:
+                return
+            touched, offset, _, _ = self._scan(committed_seq)
+            rows = self._rows(touched)
+        finally:
+            self._conn.execute("COMMIT")
+        self._publish(touched, rows, committed_seq, offset)
+
+    def _write(self, batch: List[Tuple[str, Any]]) -> List[Any]:
+        """Aplica um lote sob o lock de escrita do SQLite; retorna o resultado de cada operação"""
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        log_size = None
+        try:
+            committed_seq = self._meta_seq()
+            touched, _, pending, end = self._scan(committed_seq)
+            if os.path.getsize(self._log_path) > end:
+                # Linha incompleta de um processo que caiu no meio da gravação
+                os.ftruncate(self._log_fd, end)
+            seq = committed_seq
+            if pending:
+                self.logger.info("Registro: reaplicando %d operações do log", len(pending))
+            for _, entry in pending:
+                seq = max(seq, entry["seq"])
+                touched[entry["service_id"]] = None
+                # Um savepoint por entrada: a que falhar é desfeita sozinha e separada
+                conn.execute("SAVEPOINT replay")
+                try:
+                    if entry.get("op") == "register":
+                        validate_manifest(entry.get("manifest"))
+                    self._apply_entry(entry)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO replay")
+                    self.logger.warning("Registro: operação %s do log ignorada (%s); ver registry.quarantine",
+                                        entry.get("seq"), e)
+                    self._quarantine(entry)
+                conn.execute("RELEASE replay")
+
+            entries, results = [], []
+            now = datetime.now().isoformat()
+            for op, payload in batch:
+                if op == "register":
+                    service_id, manifest = payload
+                    row = conn.execute(
+                        "SELECT registered_at FROM services WHERE service_id = ?", (service_id,)
+                    ).fetchone()
+                    entry = {
+                        "op": op, "seq": seq + 1, "service_id": service_id, "manifest": manifest,
+                        "registered_at": row[0] if row else now, "updated_at": now
+                    }
+                    self._apply_entry(entry)
+                    results.append(ServiceRecord(service_id, seq + 1, manifest, entry["registered_at"], now))
+                else:
+                    service_id = payload
+                    entry = {"op": op, "seq": seq + 1, "service_id": service_id}
+                    exists = self._apply_entry(entry)
+                    results.append(exists)
+                    if not exists:
+                        continue
+                seq += 1
+                entries.append(entry)
+                touched[service_id] = None
+
+            if seq != committed_seq:
+                conn.execute("INSERT OR REPLACE INTO registry_meta (key, value) VALUES ('last_seq', ?)", (seq,))
+            rows = self._rows(touched)
+            if entries:
+                data = b"".join(
+                    json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+                    for entry in entries
+                )
+                log_size = end
+                written = 0
+                while written < len(data):
+                    written += os.write(self._log_fd, data[written:])
+                os.fsync(self._log_fd)
+                end += len(data)
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            if log_size is not None:
+                # O lote não entrou no SQLite: tira suas linhas do log, para não voltarem na recuperação
+                os.ftruncate(self._log_fd, log_size)
+                os.fsync(self._log_fd)
+            raise
+        self._publish(touched, rows, seq, end)
+        return results
+
+    def _apply_entry(self, entry: Dict[str, Any]) -> bool:
+        """Executa a operação no SQLite (dentro da transação aberta); False se nada mudou"""
+        service_id = entry["service_id"]
+        deleted = self._conn.execute("DELETE FROM services WHERE service_id = ?", (service_id,)).rowcount
+        if entry["op"] != "register":
+            return deleted > 0
+        info = entry["manifest"].get("project_info", {})
+        self._conn.execute(
+            "INSERT INTO services (service_id, seq, name, owner, manifest, registered_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (service_id, entry["seq"], info.get("name", ""), info.get("owner", "").lower(),
+             json.dumps(entry["manifest"], ensure_ascii=False), entry["registered_at"], entry["updated_at"])
+        )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO service_tags (service_id, tag) VALUES (?, ?)",
+            [(service_id, tag) for tag in info.get("tags", [])]
+        )
+        return True
+
+    def _publish(self, touched, rows: Dict[str, ServiceRecord], last_seq: int, offset: int):
+        """Leva aos índices em memória, de uma vez, o estado relido do SQLite"""
+        added: List[ServiceRecord] = []
+        removed: List[str] = []
+        with self._lock:
+            for service_id in touched:
+                existed = self._unindex(service_id) is not None
+                record = rows.get(service_id)
+                if record is not None:
+                    self._index(record)
+                    added.append(record)
+                elif existed:
+                    removed.append(service_id)
+            self._last_seq = max(self._last_seq, last_seq)
+            self._log_offset = offset
+        if not added and not removed:
+            return
+        # Em ordem de seq: todo processo monta o catálogo na mesma ordem
+        added.sort(key=lambda record: record.seq)
+        for listener in self.listeners:
+            try:
+                listener(added, removed)
+            except Exception:
+                self.logger.exception("Erro num listener do registro")
+
+    def _quarantine(self, entry: Dict[str, Any]):
+        with open(os.path.join(self.directory, "registry.quarantine"), "ab") as quarantine:
+            quarantine.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode() + b"\n")
+
+    def close(self):
+        """Conclui as escritas pendentes e fecha log e banco"""
+        if self._writer is None:
+            return
+        self._queue.put(None)
+        self._writer.join()
+        self._writer = None
+        os.close(self._log_fd)
+        self._conn.close()
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.sync_interval)
+            except queue.Empty:
+                try:
+                    self._sync()
+                except Exception as e:
+                    self.logger.error("Erro ao ler alterações do registro: %s", e)
+                continue
+            if item is None:
+                return
+            batch = [item]
+            stop = False
+            # Group commit: junta o que chegar dentro da janela, até batch_size
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=self.batch_window)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._commit(batch)
+            if stop:
+                return
+
+    def _commit(self, batch: List[Tuple[str, Any, asyncio.Future]]):
+        try:
+            results = self._write([(op, payload) for op, payload, _ in batch])
+        except Exception as e:
+            self.logger.error("Erro ao gravar lote do registro: %s", e)
+            for _, _, future in batch:
+                future.get_loop().call_soon_threadsafe(_settle, future, None, e)
+            return
+        for (_, _, future), result in zip(batch, results):
+            future.get_loop().call_soon_threadsafe(_settle, future, result, None)
+
+    def _index(self, record: ServiceRecord):
+        info = record.manifest.get("project_info", {})
+        self._records[record.service_id] = record
+        self._seqs.append(record.seq)
+        self._by_seq[record.seq] = record.service_id
+        for tag in info.get("tags", []):
+            self._tag_index.setdefault(tag, set()).add(record.service_id)
+        self._owner_index.setdefault(info.get("owner", "").lower(), set()).add(record.service_id)
+
+    def _unindex(self, service_id: str) -> Optional[ServiceRecord]:
+        record = self._records.pop(service_id, None)
+        if record is None:
+            return None
+        info = record.manifest.get("project_info", {})
+        pos = bisect_right(self._seqs, record.seq) - 1
+        del self._seqs[pos]
+        del self._by_seq[record.seq]
+        for tag in info.get("tags", []):
+            ids = self._tag_index.get(tag)
+            if ids is not None:
+                ids.discard(service_id)
+                if not ids:
+                    del self._tag_index[tag]
+        owner = info.get("owner", "").lower()
+        self._owner_index[owner].discard(service_id)
+        if not self._owner_index[owner]:
+            del self._owner_index[owner]
+        return record
+
+    async def _submit(self, op: str, payload: Any):
+        if self._writer is None:
+            raise RuntimeError("Registro não foi aberto")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put((op, payload, future))
+        return await future
+
+    async def register(self, manifest: Dict[str, Any], service_id: Optional[str] = None) -> ServiceRecord:
+        """Registra (ou, com `service_id` existente, atualiza) um manifesto.
+
+        Retorna depois que a operação está no disco e visível nas buscas deste processo.
+        """
+        validate_manifest(manifest)
+        return await self._submit("register", (service_id or uuid.uuid4().hex, manifest))
+
+    async def unregister(self, service_id: str) -> bool:
+        """Remove o serviço; False se ele não existia"""
+        return await self._submit("unregister", service_id)
+
+    def get(self, service_id: str) -> Optional[ServiceRecord]:
+        return self._records.get(service_id)
+
+    def list(self, page_size: int = 100, page_token: Optional[str] = None) -> Tuple[List[ServiceRecord], Optional[str]]:
+        """Página de serviços na ordem de registro; o token é a posição no log"""
+        after = int(page_token) if page_token else 0
+        with self._lock:
+            start = bisect_right(self._seqs, after)
+            seqs = self._seqs[start:start + page_size]
+            records = [self._records[self._by_seq[seq]] for seq in seqs]
+            more = start + page_size < len(self._seqs)
+        return records, str(seqs[-1]) if more and seqs else None
+
+    def search(
+        self,
+        tags: Optional[List[str]] = None,
+        name_pattern: Optional[str] = None,
+        description_pattern: Optional[str] = None,
+        owner: Optional[str] = None
+    ) -> List[ServiceRecord]:
+        """Serviços com alguma das `tags`, do `owner` e cujo nome/descrição contenham os padrões"""
+        candidates: Optional[Set[str]] = None
+        with self._lock:
+            if tags:
+                candidates = set().union(*(self._tag_index.get(tag, ()) for tag in tags))
+            if owner:
+                owned = self._owner_index.get(owner.lower(), set())
+                candidates = set(owned) if candidates is None else candidates & owned
+            records = (
+                list(self._records.values()) if candidates is None
+                else sorted((self._records[service_id] for service_id in candidates), key=lambda r: r.seq)
+            )
+        name_pattern = name_pattern.lower() if name_pattern else None
+        description_pattern = description_pattern.lower() if description_pattern else None
+        matches = []
+        for record in records:
+            info = record.manifest.get("project_info", {})
+            if name_pattern and name_pattern not in info.get("name", "").lower():
+                continue
+            if description_pattern and description_pattern not in info.get("description", "").lower():
+                continue
+            matches.append(record)
+        return matches
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+def _settle(future: asyncio.Future, result: Any, error: Optional[BaseException]):
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
@@ -0,0 +1,211 @@
+import math
+from typing import Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+
+def _batches(texts: Iterable[str], size: int) -> Iterator[List[str]]:
+    batch: List[str] = []
+    for text in texts:
+        batch.append(text)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _top(scores: np.ndarray, ids: np.ndarray, k: int) -> List[Tuple[float, int]]:
+    """Os k maiores scores como (score, id); empates saem na ordem dos ids"""
+    if len(scores) > k:
+        keep = np.argpartition(-scores, k - 1)[:k]
+        # O corte do argpartition separa empates arbitrariamente: traz todos os do k-ésimo score
+        keep = np.flatnonzero(scores >= scores[keep].min())
+        scores, ids = scores[keep], ids[keep]
+    order = np.lexsort((ids, -scores))[:k]
+    return [(float(score), int(idx)) for score, idx in zip(scores[order], ids[order])]
+
+
+class IVFIndex:
+    """Índice aproximado de vizinhos (IVF) sobre vetores de norma 1.
+
+    Um k-means esférico numa amostra divide os vetores em `nlist` listas, e
+    os vetores ficam reordenados por lista, contíguos. A busca compara o
+    vetor da consulta com os centróides e só calcula o produto escalar com
+    as `nprobe` listas mais próximas.
+    """
+
+    def __init__(self, vectors: np.ndarray, nlist: Optional[int] = None, iterations: int = 10, seed: int = 0):
+        count = len(vectors)
+        nlist = min(count, nlist or max(1, int(math.sqrt(count))))
+        rng = np.random.default_rng(seed)
+        sample = vectors[np.sort(rng.choice(count, min(count, nlist * 32), replace=False))]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)]
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Lista que ficou vazia mantém o centróide anterior
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+        assignment = np.concatenate([
+            np.argmax(vectors[start:start + 8192] @ centroids.T, axis=1) for start in range(0, count, 8192)
+        ])
+        order = np.argsort(assignment, kind='stable')
+        self.centroids = centroids.astype(np.float32)
+        self.ids = order.astype(np.uint32)
+        self.vectors = vectors[order]
+        self.offsets = np.searchsorted(assignment[order], np.arange(nlist + 1))
+        self.positions = np.empty(count, dtype=np.uint32)
+        self.positions[order] = np.arange(count, dtype=np.uint32)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def vector(self, ids: np.ndarray) -> np.ndarray:
+        return self.vectors[self.positions[ids]]
+
+    def search(self, query: np.ndarray, k: int, nprobe: int,
+               mask: Optional[np.ndarray] = None) -> List[Tuple[float, int]]:
+        """Os k ids de maior produto escalar entre os aceitos por `mask`.
+        Se as listas visitadas não têm k aceitos, visita 4x mais listas."""
+        nlist = len(self.centroids)
+        closest = np.argsort(-(self.centroids @ query))
+        while True:
+            nprobe = min(nprobe, nlist)
+            lists = closest[:nprobe]
+            ranges = [(self.offsets[l], self.offsets[l + 1]) for l in lists]
+            positions = np.concatenate([np.arange(start, end) for start, end in ranges])
+            ids = self.ids[positions]
+            if mask is not None:
+                keep = mask[ids]
+                positions, ids = positions[keep], ids[keep]
+            if len(ids) >= k or nprobe == nlist:
+                return _top(self.vectors[positions] @ query, ids, k)
+            nprobe *= 4
+
+
+class SemanticIndex:
+    """Embeddings de nome + descrição de cada linha do catálogo e a busca
+    pelas linhas mais próximas semanticamente do `q`.
+
+    As linhas da carga ficam num IVFIndex (a partir de ANN_MIN_ROWS; abaixo
+    disso a busca exata já é barata). Linhas acrescentadas depois (serviços
+    registrados) são embutidas em lotes e guardadas à parte, com busca
+    exata; `extend` não altera o índice original. Quando essa parte passa de
+    `REBUILD_TAIL_FRACTION` das linhas agrupadas, `rebuilt` refaz o IVF com todas.
+    """
+
+    BATCH_SIZE = 1024
+    ANN_MIN_ROWS = 20_000
+    # Com filtros que aceitam até EXACT_MAX linhas, comparar com todas elas sai mais barato
+    EXACT_MAX = 4096
+    REBUILD_TAIL_FRACTION = 0.2
+
+    def __init__(self, embedder, vectors: np.ndarray, ivf: Optional[IVFIndex] = None,
+                 tail: Optional[np.ndarray] = None, nprobe: int = 32):
+        self.embedder = embedder
+        self.vectors = vectors
+        self.ivf = ivf
+        self.tail = tail if tail is not None else np.zeros((0, vectors.shape[1]), dtype=np.float32)
+        self.nprobe = nprobe
+
+    @classmethod
+    def build(cls, embedder, texts: Iterable[str], nprobe: int = 32) -> 'SemanticIndex':
+        chunks = [embedder.embed(batch) for batch in _batches(texts, cls.BATCH_SIZE)]
+        vectors = np.concatenate(chunks) if chunks else np.zeros((0, embedder.dim), dtype=np.float32)
+        return cls.from_vectors(embedder, vectors, nprobe)
+
+    @classmethod
+    def from_vectors(cls, embedder, vectors: np.ndarray, nprobe: int = 32) -> 'SemanticIndex':
+        if len(vectors) >= cls.ANN_MIN_ROWS:
+            ivf = IVFIndex(vectors)
+            # O IVF guarda os vetores reordenados; não mantém duas cópias
+            return cls(embedder, ivf.vectors, ivf, nprobe=nprobe)
+        return cls(embedder, vectors, nprobe=nprobe)
+
+    def __len__(self) -> int:
+        return len(self.vectors) + len(self.tail)
+
+    @property
+    def needs_rebuild(self) -> bool:
+        """Se as linhas fora do IVF já pesam o bastante na busca para reagrupar"""
+        return len(self) >= self.ANN_MIN_ROWS and len(self.tail) > self.REBUILD_TAIL_FRACTION * len(self.vectors)
+
+    def rebuilt(self) -> 'SemanticIndex':
+        """Novo índice com as linhas acrescentadas dentro do IVF (refaz o k-means)"""
+        base = self.ivf.vector(np.arange(len(self.vectors))) if self.ivf is not None else self.vectors
+        return self.from_vectors(self.embedder, np.concatenate([base, self.tail]), self.nprobe)
+
+    def extend(self, texts: Iterable[str]) -> 'SemanticIndex':
+        chunks = [self.embedder.embed(batch) for batch in _batches(texts, self.BATCH_SIZE)]
+        if not chunks:
+            return self
+        return SemanticIndex(self.embedder, self.vectors, self.ivf, np.concatenate([self.tail] + chunks), self.nprobe)
+
+    def embed_query(self, q: str) -> np.ndarray:
+        return self.embedder.embed([q])[0]
+
+    def similarity(self, query: np.ndarray, ids: Sequence[int]) -> np.ndarray:
+        """Produto escalar (cosseno) entre `query` e as linhas `ids`"""
+        ids = np.asarray(ids, dtype=np.int64)
+        base = len(self.vectors)
+        scores = np.empty(len(ids), dtype=np.float32)
+        in_base = ids < base
+        if self.ivf is not None:
+            scores[in_base] = self.ivf.vector(ids[in_base]) @ query
+        else:
+            scores[in_base] = self.vectors[ids[in_base]] @ query
+        scores[~in_base] = self.tail[ids[~in_base] - base] @ query
+        return scores
+
+    def exact(self, query: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(scores, índices) de todas as linhas, sem o índice aproximado"""
+        base_ids = self.ivf.ids if self.ivf is not None else np.arange(len(self.vectors))
+        scores = np.concatenate([self.vectors @ query, self.tail @ query])
+        return scores, np.concatenate([base_ids.astype(np.int64), np.arange(len(self.vectors), len(self))])
+
+    def search(self, query: np.ndarray, k: int, accept: Optional[Set[int]] = None,
+               exclude: Iterable[int] = ()) -> List[Tuple[float, int]]:
+        """As k linhas mais próximas de `query`, como (score, índice),
+        restritas a `accept` (filtros) e sem as linhas de `exclude`"""
+        exclude = set(exclude)
+        if k <= 0 or len(self) == 0:
+            return []
+        if accept is not None and len(accept) <= self.EXACT_MAX:
+            ids = np.fromiter(accept, dtype=np.int64, count=len(accept))
+            if exclude:
+                ids = ids[~np.isin(ids, np.fromiter(exclude, dtype=np.int64, count=len(exclude)))]
+            return _top(self.similarity(query, ids), ids, k)
+        if self.ivf is None:
+            scores, ids = self.exact(query)
+            keep = np.ones(len(ids), dtype=bool)
+            if accept is not None:
+                keep &= np.isin(ids, np.fromiter(accept, dtype=np.int64, count=len(accept)))
+            if exclude:
+                keep &= ~np.isin(ids, np.fromiter(exclude, dtype=np.int64, count=len(exclude)))
+            return _top(scores[keep], ids[keep], k)
+
+        base = len(self.vectors)
+        mask = None
+        if accept is not None or exclude:
+            if accept is None:
+                mask = np.ones(base, dtype=bool)
+            else:
+                mask = np.zeros(base, dtype=bool)
+                accepted = np.fromiter(accept, dtype=np.int64, count=len(accept))
+                mask[accepted[accepted < base]] = True
+            removed = np.fromiter(exclude, dtype=np.int64, count=len(exclude))
+            mask[removed[removed < base]] = False
+        found = self.ivf.search(query, k, self.nprobe, mask)
+        if len(self.tail):
+            ids = np.arange(base, len(self))
+            if accept is not None:
+                ids = ids[np.isin(ids, accepted)]
+            if exclude:
+                ids = ids[~np.isin(ids, removed)]
+            found = _top(
+                np.concatenate([np.array([s for s, _ in found], dtype=np.float32), self.tail[ids - base] @ query]),
+                np.concatenate([np.array([i for _, i in found], dtype=np.int64), ids]), k
+            )
+        return found
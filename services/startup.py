@@ -0,0 +1,107 @@
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def process_uptime() -> float:
+    """Segundos desde o início do processo (não só desde este import).
+
+    No Linux vem de /proc (resolução de 1/CLK_TCK); nos demais sistemas,
+    conta a partir do primeiro import deste módulo.
+    """
+    try:
+        with open('/proc/self/stat') as f:
+            # O nome do processo (campo 2) pode ter espaços; os campos seguintes vêm depois do ')'
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - int(fields[19]) / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError):
+        return time.perf_counter() - _IMPORTED
+
+
+_IMPORTED = time.perf_counter()
+
+
+class StartupProfile:
+    """Linha do tempo do startup: quanto cada fase levou, desde o início do
+    processo até a primeira resposta.
+
+    `mark` fecha a fase em andamento; `phase` mede um bloco. Com `path`, o
+    relatório vai para esse arquivo (JSON) quando a primeira resposta sai.
+
+    `process_uptime` (resolução de 10 ms no /proc) só ancora a linha do tempo
+    no início do processo; as durações vêm de `time.perf_counter`.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.phases: List[Tuple[str, float]] = []
+        self.ready: Optional[float] = None
+        self.first_request: Optional[float] = None
+        self._last = time.perf_counter()
+        imports = process_uptime()
+        # Segundos desde o início do processo = _origin + perf_counter()
+        self._origin = imports - self._last
+        self.phases.append(('imports', imports))
+        self.logger = logging.getLogger(__name__)
+
+    def uptime(self) -> float:
+        """Segundos desde o início do processo, com a resolução do perf_counter"""
+        return self._origin + time.perf_counter()
+
+    def mark(self, name: str):
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._last = time.perf_counter()
+            self.phases.append((name, self._last - start))
+
+    def mark_ready(self):
+        self.ready = self.uptime()
+        self.logger.info("Pronto para receber requisições em %.3fs", self.ready)
+
+    def mark_first_request(self):
+        self.first_request = self.uptime()
+        if self.path:
+            with open(self.path, 'w') as f:
+                json.dump(self.report(), f, indent=2)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'pid': os.getpid(),
+            'phases': [{'phase': name, 'seconds': round(seconds, 6)} for name, seconds in self.phases],
+            'ready_seconds': round(self.ready, 6) if self.ready is not None else None,
+            'first_request_seconds': round(self.first_request, 6) if self.first_request is not None else None,
+        }
+
+
+class FirstRequestMiddleware:
+    """Marca no StartupProfile o fim da primeira resposta HTTP e sai do caminho"""
+
+    def __init__(self, app, profile: StartupProfile):
+        self.app = app
+        self.profile = profile
+        self.pending = True
+
+    async def __call__(self, scope, receive, send):
+        if not self.pending or scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        async def send_and_mark(message):
+            await send(message)
+            if message['type'] == 'http.response.body' and not message.get('more_body') and self.pending:
+                self.pending = False
+                self.profile.mark_first_request()
+
+        await self.app(scope, receive, send_and_mark)
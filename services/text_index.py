@@ -0,0 +1,194 @@
+import heapq
+import math
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def fold(text: str) -> str:
+    """Minúsculas sem acentos: "Integração" -> "integracao" """
+    text = text.lower()
+    if text.isascii():
+        return text
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> List[str]:
+    """Quebra o texto em tokens alfanuméricos já normalizados por `fold`"""
+    return _TOKEN_RE.findall(fold(text))
+
+
+class _Postings:
+    """Postings de um termo: documentos em ordem crescente, o impacto BM25 de
+    cada um e a permutação que percorre os impactos do maior para o menor."""
+
+    __slots__ = ('docs', 'impacts', 'order')
+
+    def __init__(self, docs: array, impacts: array):
+        self.docs = docs
+        self.impacts = impacts
+        self.order = array('I', sorted(range(len(docs)), key=impacts.__getitem__, reverse=True))
+
+    @classmethod
+    def appended(cls, previous: '_Postings', docs: array, impacts: array) -> '_Postings':
+        """`previous` com documentos novos (de id maior) no fim. Poucos
+        documentos são inseridos por busca binária na ordem existente, em vez
+        de reordenar a lista inteira."""
+        if len(docs) > 64:
+            return cls(previous.docs + docs, previous.impacts + impacts)
+        postings = cls.__new__(cls)
+        postings.docs = previous.docs + docs
+        postings.impacts = merged = previous.impacts + impacts
+        order = array('I', previous.order)
+        for pos in range(len(previous.docs), len(merged)):
+            # Depois dos empates já existentes, como na ordenação estável
+            order.insert(bisect_right(order, -merged[pos], key=lambda p: -merged[p]), pos)
+        postings.order = order
+        return postings
+
+    def impact(self, doc: int) -> float:
+        pos = bisect_left(self.docs, doc)
+        if pos < len(self.docs) and self.docs[pos] == doc:
+            return self.impacts[pos]
+        return 0.0
+
+
+class BM25Index:
+    """Índice BM25 pré-calculado com recuperação top-k.
+
+    O impacto de cada (termo, documento) é calculado na construção, e os
+    postings ficam ordenados também por impacto. O top-k usa o threshold
+    algorithm: percorre as listas do maior impacto para o menor, mantém um
+    heap com os k melhores e para assim que nenhum documento ainda não visto
+    consegue superar o k-ésimo. Textos curtos geram muitos impactos
+    empatados, e aí o threshold demora a cair quando há vários termos: se a
+    consulta soma mais de `TA_MAX_POSTINGS` postings, os scores são
+    acumulados de uma vez com NumPy sobre os mesmos arrays, sem cópia.
+    """
+
+    TA_MAX_POSTINGS = 20000
+
+    def __init__(self, documents: Iterable[str], k1: float = 1.2, b: float = 0.75,
+                 base: Optional['BM25Index'] = None):
+        self.k1 = k1
+        self.b = b
+        term_docs: Dict[str, Tuple[array, array]] = {}
+        doc_lengths = array('I', base.doc_lengths) if base is not None else array('I')
+        first_doc = len(doc_lengths)
+        for doc, text in enumerate(documents, start=first_doc):
+            tokens = tokenize(text)
+            doc_lengths.append(len(tokens))
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                docs, tfs = term_docs.get(token) or term_docs.setdefault(token, (array('I'), array('I')))
+                docs.append(doc)
+                tfs.append(tf)
+
+        self.doc_lengths = doc_lengths
+        if base is None:
+            self.total_docs = len(doc_lengths)
+            self.avgdl = (sum(doc_lengths) / len(doc_lengths)) if doc_lengths else 0.0
+            self.doc_freq = {term: len(docs) for term, (docs, _) in term_docs.items()}
+            self.postings: Dict[str, _Postings] = {}
+        else:
+            # Estatísticas globais (N, avgdl, df) ficam as do snapshot base até a
+            # próxima reconstrução completa; só os postings tocados são refeitos
+            self.total_docs = base.total_docs
+            self.avgdl = base.avgdl
+            self.doc_freq = base.doc_freq
+            self.postings = dict(base.postings)
+
+        for term, (docs, tfs) in term_docs.items():
+            impacts = array('f', (self._impact(term, tf, doc_lengths[doc]) for doc, tf in zip(docs, tfs)))
+            previous = self.postings.get(term)
+            if previous is not None:
+                self.postings[term] = _Postings.appended(previous, docs, impacts)
+            else:
+                self.postings[term] = _Postings(docs, impacts)
+
+    def _impact(self, term: str, tf: int, length: int) -> float:
+        df = self.doc_freq.get(term, 1)
+        idf = math.log(1 + (self.total_docs - df + 0.5) / (df + 0.5))
+        norm = self.k1 * (1 - self.b + self.b * length / self.avgdl) if self.avgdl else self.k1
+        return idf * tf * (self.k1 + 1) / (tf + norm)
+
+    def extend(self, documents: Iterable[str]) -> 'BM25Index':
+        """Novo índice com `documents` acrescentados após os atuais"""
+        return BM25Index(documents, self.k1, self.b, base=self)
+
+    def top_k(self, query: str, k: int, accept: Optional[Set[int]] = None) -> List[Tuple[float, int]]:
+        """Os k documentos de maior BM25 para `query`, como (score, doc).
+
+        `accept`, se informado, restringe o resultado a esses documentos
+        (filtros de tags/owner/license). Empates saem na ordem do arquivo.
+        """
+        lists = [self.postings[term] for term in dict.fromkeys(tokenize(query)) if term in self.postings]
+        if not lists or k <= 0:
+            return []
+
+        def score(doc: int) -> float:
+            return sum(postings.impact(doc) for postings in lists)
+
+        if accept is not None and len(accept) <= k * 64:
+            # Filtro seletivo: mais barato pontuar os candidatos diretamente
+            scored = ((score(doc), -doc) for doc in accept)
+            return [(s, -neg) for s, neg in heapq.nlargest(k, scored) if s > 0]
+
+        if len(lists) > 1 and sum(len(postings.docs) for postings in lists) > self.TA_MAX_POSTINGS:
+            return self._accumulate(lists, k, accept)
+
+        heap: List[Tuple[float, int]] = []
+        seen: Set[int] = set()
+        depth = 0
+        longest = max(len(postings.docs) for postings in lists)
+        while depth < longest:
+            threshold = 0.0
+            for postings in lists:
+                if depth >= len(postings.order):
+                    continue
+                pos = postings.order[depth]
+                threshold += postings.impacts[pos]
+                doc = postings.docs[pos]
+                if doc in seen:
+                    continue
+                seen.add(doc)
+                if accept is not None and doc not in accept:
+                    continue
+                entry = (score(doc), -doc)
+                if len(heap) < k:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+            if len(heap) == k and heap[0][0] >= threshold:
+                break
+            depth += 1
+        return [(s, -neg) for s, neg in sorted(heap, reverse=True)]
+
+    def _accumulate(self, lists: List[_Postings], k: int, accept: Optional[Set[int]]) -> List[Tuple[float, int]]:
+        """Top-k exato somando todos os postings da consulta com NumPy"""
+        docs = np.concatenate([np.frombuffer(postings.docs, dtype=np.uint32) for postings in lists])
+        impacts = np.concatenate([np.frombuffer(postings.impacts, dtype=np.float32) for postings in lists])
+        if accept is not None:
+            mask = np.zeros(len(self.doc_lengths), dtype=bool)
+            mask[np.fromiter(accept, dtype=np.int64, count=len(accept))] = True
+            keep = mask[docs]
+            docs, impacts = docs[keep], impacts[keep]
+        if not len(docs):
+            return []
+        scores = np.bincount(docs, weights=impacts)
+        # Cada documento aparece no máximo len(lists) vezes em `docs`, então o
+        # (k * len(lists))-ésimo maior valor é um piso para o k-ésimo documento
+        posting_scores = scores[docs]
+        depth = min(len(posting_scores), k * len(lists))
+        floor = np.partition(posting_scores, len(posting_scores) - depth)[len(posting_scores) - depth]
+        candidates = np.unique(docs[posting_scores >= floor])
+        order = np.lexsort((candidates, -scores[candidates]))[:k]
+        return [(float(scores[doc]), int(doc)) for doc in candidates[order]]
@@ -0,0 +1,77 @@
+import math
+import random
+from collections import Counter
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from services.text_index import BM25Index, tokenize
+
+WORDS = ["api", "pagamentos", "mapas", "busca", "cartão", "rota", "rest", "grpc", "fila", "cache",
+         "serviço", "dados", "integração", "usuário", "token", "log", "evento", "arquivo", "imagem", "voz"]
+
+
+def corpus(seed, count=2000):
+    rng = random.Random(seed)
+    # Palavras com frequências bem diferentes, para idf e tamanhos variados
+    weights = [1 / (rank + 1) for rank in range(len(WORDS))]
+    return [" ".join(rng.choices(WORDS, weights, k=rng.randint(1, 12))) for _ in range(count)]
+
+
+def brute_force(documents, query, k1=1.2, b=0.75):
+    """BM25 de cada documento calculado do zero, sem o índice"""
+    tokenized = [tokenize(text) for text in documents]
+    avgdl = sum(map(len, tokenized)) / len(tokenized)
+    df = Counter(term for tokens in tokenized for term in set(tokens))
+    terms = dict.fromkeys(tokenize(query))
+    scores = []
+    for tokens in tokenized:
+        counts = Counter(tokens)
+        score = 0.0
+        for term in terms:
+            tf = counts.get(term, 0)
+            if tf:
+                idf = math.log(1 + (len(tokenized) - df[term] + 0.5) / (df[term] + 0.5))
+                score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(tokens) / avgdl))
+        scores.append(score)
+    return scores
+
+
+def assert_top_k(result, scores, k, accept=None):
+    candidates = [doc for doc, score in enumerate(scores) if score > 0 and (accept is None or doc in accept)]
+    assert len(result) == min(k, len(candidates))
+    assert len({doc for _, doc in result}) == len(result)
+    for score, doc in result:
+        assert doc in candidates and score == pytest.approx(scores[doc], rel=1e-5)
+    assert [score for score, _ in result] == sorted((score for score, _ in result), reverse=True)
+    if result:
+        # Nenhum documento deixado de fora supera o k-ésimo (a menos do float32 dos impactos)
+        returned = {doc for _, doc in result}
+        kth = result[-1][0]
+        assert all(scores[doc] <= kth * (1 + 1e-5) for doc in candidates if doc not in returned)
+
+
+QUERIES = ["api", "pagamentos cartão", "voz imagem arquivo", "integracao dados api", "inexistente", "rota rota busca"]
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+@pytest.mark.parametrize("ta_max_postings", [BM25Index.TA_MAX_POSTINGS, 0])
+def test_top_k_matches_brute_force(seed, ta_max_postings, monkeypatch):
+    # TA_MAX_POSTINGS=0 força o caminho que acumula com NumPy em vez do threshold algorithm
+    monkeypatch.setattr(BM25Index, "TA_MAX_POSTINGS", ta_max_postings)
+    documents = corpus(seed)
+    index = BM25Index(documents)
+    rng = random.Random(seed)
+    for query in QUERIES:
+        scores = brute_force(documents, query)
+        for k in (1, 10, 100):
+            assert_top_k(index.top_k(query, k), scores, k)
+        for size in (50, 1500):
+            accept = set(rng.sample(range(len(documents)), size))
+            assert_top_k(index.top_k(query, 10, accept), scores, 10, accept)
+
+
+def test_ties_come_out_in_file_order():
+    index = BM25Index(["api rest", "mapas", "api rest", "api rest"])
+    assert [doc for _, doc in index.top_k("api", 3)] == [0, 2, 3]
@@ -0,0 +1,56 @@
+import csv
+
+import pytest
+
+from services.catalog import Catalog, CatalogRow, CatalogStore
+
+FIELDS = ["name", "description", "url", "tags", "owner", "license", "version"]
+
+
+def write_csv(path, count, start=0):
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDS)
+        for i in range(start, start + count):
+            writer.writerow([f"api-{i}", f"serviço de api número {i}", f"https://x/{i}", "api,rest", "acme", "MIT", "1.0.0"])
+    return str(path)
+
+
+def page(catalog, cursor=None, limit=10):
+    after = catalog.decode_cursor(cursor) if cursor else -1
+    ids = list(catalog.iter_search(q="api", after=after))[:limit]
+    return [catalog.rows[idx].name for idx in ids], catalog.encode_cursor(ids[-1])
+
+
+def test_cursor_is_accepted_by_another_worker_and_after_restart(tmp_path):
+    path = write_csv(tmp_path / "repositories.csv", 50)
+    first, second = CatalogStore(path), CatalogStore(path)
+    first.refresh()
+    second.refresh()
+
+    names, cursor = page(first.snapshot)
+    assert first.snapshot.epoch == second.snapshot.epoch == Catalog.from_csv(path).epoch
+    # A segunda página vem de outro "worker" e continua de onde a primeira parou
+    assert page(second.snapshot, cursor)[0] == [f"api-{i}" for i in range(10, 20)]
+
+
+def test_cursor_expires_when_the_csv_changes(tmp_path):
+    path = write_csv(tmp_path / "repositories.csv", 50)
+    store = CatalogStore(path)
+    store.refresh()
+    _, cursor = page(store.snapshot)
+
+    write_csv(tmp_path / "repositories.csv", 50, start=1000)
+    store.refresh()
+    with pytest.raises(ValueError):
+        store.snapshot.decode_cursor(cursor)
+
+
+def test_extended_snapshots_keep_the_epoch():
+    rows = [CatalogRow(f"api-{i}", "api", "", ("api",), "acme", "MIT", "1") for i in range(5)]
+    catalog = Catalog(rows)
+    assert Catalog(list(rows)).epoch == catalog.epoch
+    extended = catalog.extend([CatalogRow("api-novo", "api", "", ("api",), "acme", "MIT", "1")])
+    assert extended.epoch == catalog.epoch
+    assert extended.decode_cursor(catalog.encode_cursor(4)) == 4
+    assert Catalog(rows[:4]).epoch != catalog.epoch
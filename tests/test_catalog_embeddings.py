@@ -0,0 +1,110 @@
+import csv
+import threading
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from services.catalog import CatalogRow, CatalogStore
+from services.embeddings import HashingEmbedder
+from services.semantic import SemanticIndex
+
+FIELDS = ["name", "description", "url", "tags", "owner", "license", "version"]
+
+
+def write_csv(path, count):
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDS)
+        for i in range(count):
+            writer.writerow([f"api-{i}", f"serviço de mapas número {i}", "", "api", "acme", "MIT", "1.0.0"])
+    return str(path)
+
+
+def registered(i):
+    return CatalogRow(f"registrado-{i}", f"pagamentos com cartão {i}", "", ("api",), "acme", "MIT", "1")
+
+
+class BlockingEmbedder(HashingEmbedder):
+    """Segura o primeiro lote até o teste liberar"""
+
+    def __init__(self):
+        super().__init__(64)
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def embed(self, texts):
+        if not self.release.is_set():
+            self.started.set()
+            assert self.release.wait(5)
+        return super().embed(texts)
+
+
+def test_registrations_are_published_while_the_csv_is_embedded(tmp_path):
+    path = write_csv(tmp_path / "repositories.csv", 20)
+    embedder = BlockingEmbedder()
+    store = CatalogStore(path, embedder=embedder)
+    loader = threading.Thread(target=store.refresh)
+    loader.start()
+    assert embedder.started.wait(5)
+
+    # Com o carregamento parado nos embeddings, o registro não espera por ele
+    store.apply_registrations({"svc": registered(0)})
+    assert [row.name for row in store.snapshot.rows] == ["registrado-0"]
+    embedder.release.set()
+    loader.join(5)
+
+    snapshot = store.snapshot
+    assert [row.name for row in snapshot.rows] == [f"api-{i}" for i in range(20)] + ["registrado-0"]
+    assert snapshot.semantic_ready and len(snapshot._semantic) == 21
+    assert list(snapshot.iter_search(q="pagamentos")) == [20]
+
+
+def test_registered_tail_is_reclustered(tmp_path, monkeypatch):
+    monkeypatch.setattr(SemanticIndex, "ANN_MIN_ROWS", 50)
+    path = write_csv(tmp_path / "repositories.csv", 100)
+    store = CatalogStore(path, embedder=HashingEmbedder(64))
+    store.refresh()
+    assert store.snapshot._semantic.ivf is not None
+
+    store.apply_registrations({f"svc-{i}": registered(i) for i in range(20)})
+    assert not store.recluster_embeddings()
+    store.apply_registrations({f"svc-{i}": registered(i) for i in range(20, 30)})
+    store.apply_registrations({}, ["svc-0"])
+    before = store.snapshot
+    query = before._semantic.embed_query("pagamentos com cartão")
+    exact = before._semantic.search(query, 5, exclude=before._deleted)
+
+    assert store.recluster_embeddings()
+    after = store.snapshot
+    semantic = after._semantic
+    assert len(semantic.ivf) == 130 and len(semantic.tail) == 0
+    assert after.rows == before.rows and after._deleted == before._deleted
+    assert after.epoch == before.epoch and after.fingerprint == before.fingerprint
+    # Com nprobe cobrindo todas as listas, o IVF novo devolve o mesmo que a busca exata
+    semantic.nprobe = len(semantic.ivf.centroids)
+    assert semantic.search(query, 5, exclude=after._deleted) == exact
+    assert not store.recluster_embeddings()
+
+
+def test_lazy_embeddings_publish_a_copy(tmp_path):
+    path = write_csv(tmp_path / "repositories.csv", 20)
+    embedder = BlockingEmbedder()
+    store = CatalogStore(path, embedder=embedder, embed_on_load=False)
+    store.refresh()
+    published = store.snapshot
+    result = []
+    worker = threading.Thread(target=lambda: result.append(store.ensure_embeddings(published)))
+    worker.start()
+    assert embedder.started.wait(5)
+    store.apply_registrations({"svc": registered(0)})
+    embedder.release.set()
+    worker.join(5)
+
+    # O snapshot que as buscas em andamento leem não muda
+    assert not published.semantic_ready
+    assert result[0].semantic_ready and len(result[0]._semantic) == 20
+    latest = store.snapshot
+    assert latest.semantic_ready and len(latest._semantic) == 21 and len(latest.rows) == 21
+    assert store.ensure_embeddings(latest) is latest
+    assert store.ensure_embeddings(published) is result[0]
@@ -0,0 +1,42 @@
+import csv
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from services.catalog import Catalog, CatalogRow
+from services.columnar import ColumnarCatalog, compile_catalog
+
+FIELDS = ["name", "description", "url", "tags", "owner", "license", "version"]
+
+
+def row(i, description, tags=("api",)):
+    return CatalogRow(f"api-{i}", description, f"https://x/{i}", tags, "acme", "MIT", "1.0.0")
+
+
+def compile_rows(tmp_path, rows):
+    csv_path = tmp_path / "repositories.csv"
+    with open(csv_path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDS)
+        for r in rows:
+            writer.writerow([r.name, r.description, r.url, ",".join(r.tags), r.owner, r.license, r.version])
+    return compile_catalog(str(csv_path), str(tmp_path / "repositories.pcat"), "a" * 64)
+
+
+@pytest.mark.parametrize("prepared", [False, True])
+def test_registered_rows_rank_with_the_file_statistics(tmp_path, prepared):
+    base = [row(i, f"serviço {'pagamentos' if i % 3 == 0 else 'mapas'} número {i}") for i in range(30)]
+    added = [row(100, "pagamentos"), row(101, "pagamentos rápidos", tags=("beta",))]
+    columnar = ColumnarCatalog(compile_rows(tmp_path, base))
+    if prepared:
+        # Índice já montado: o snapshot estendido o reaproveita
+        columnar.prepare()
+    columnar = columnar.extend(added[:1]).extend(added[1:])
+    memory = Catalog(base).extend(added[:1]).extend(added[1:])
+
+    for tags in (None, ["beta"], ["api"]):
+        ranked = columnar.scored_search("pagamentos", tags=tags, k=5)
+        assert ranked == pytest.approx(memory.scored_search("pagamentos", tags=tags, k=5))
+    # O registrado mais curto passa na frente das linhas do arquivo
+    assert columnar.scored_search("pagamentos", k=1)[0][1] == 30
@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from services.dispatch import EXECUTION_LATENCY, CircuitBreaker, DispatchError, ExecutionDispatcher
+from services.metrics import REGISTRY as METRICS
+
+
+class FakeRegistry:
+    """Upstream falso: cada chamada consome o próximo resultado (status ou exceção)"""
+
+    mcp_url = "http://mcp"
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    async def _request(self, method, url, **kwargs):
+        self.calls.append(method)
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, BaseException):
+            raise outcome
+        if outcome == "hang":
+            await asyncio.sleep(3600)
+        return httpx.Response(outcome, json={}, request=httpx.Request(method, url))
+
+
+def dispatcher(outcomes, **kwargs):
+    registry = FakeRegistry(outcomes)
+    return registry, ExecutionDispatcher(registry, backoff_base=0.001, **kwargs)
+
+
+def call(dispatch, method="GET"):
+    return dispatch._call(method, "http://svc/op", time.monotonic() + 5)
+
+
+def half_open(dispatch):
+    breaker = dispatch._breaker("http://svc/op")
+    breaker.failures = breaker.failure_threshold
+    breaker.opened_at = time.monotonic() - breaker.reset_timeout
+    return breaker
+
+
+@pytest.mark.parametrize("method, outcomes, calls", [
+    ("GET", [503], 3),
+    ("PUT", [httpx.ReadTimeout("lento")], 3),
+    ("POST", [503], 1),
+    ("POST", [httpx.ReadTimeout("lento")], 1),
+    ("PATCH", [httpx.RemoteProtocolError("fechou")], 1),
+    ("POST", [httpx.ConnectError("recusada"), 201], 2),
+])
+def test_only_safe_requests_are_retried(method, outcomes, calls):
+    registry, dispatch = dispatcher(outcomes, max_retries=2)
+
+    async def main():
+        try:
+            return (await call(dispatch, method)).status_code
+        except DispatchError:
+            return None
+
+    status = asyncio.run(main())
+    assert len(registry.calls) == calls
+    assert status == (201 if outcomes[-1] == 201 else None)
+
+
+def test_unexpected_error_in_the_trial_call_reopens_the_circuit():
+    registry, dispatch = dispatcher([RuntimeError("bug")])
+    breaker = half_open(dispatch)
+    with pytest.raises(RuntimeError):
+        asyncio.run(call(dispatch))
+    assert not breaker.trial_in_progress and breaker.state == "open"
+
+
+def test_cancelled_trial_call_releases_the_half_open_slot():
+    registry, dispatch = dispatcher(["hang"])
+    breaker = half_open(dispatch)
+
+    async def main():
+        task = asyncio.ensure_future(call(dispatch))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert not breaker.trial_in_progress
+    assert breaker.allow()
+
+
+def test_breaker_closes_after_a_successful_trial():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.0)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_each_attempt_is_observed_in_the_labelled_histogram():
+    registry, dispatch = dispatcher([503, 200], max_retries=2)
+    asyncio.run(dispatch._call("GET", "http://svc/op", time.monotonic() + 5, label="latencia-teste"))
+    assert EXECUTION_LATENCY.labels("latencia-teste").count == 2
+    assert 'protoai_execution_attempt_duration_seconds_count{service="latencia-teste"} 2' in METRICS.render()
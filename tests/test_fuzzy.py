@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from services.fuzzy import FuzzyVocabulary, TermIndex, edit_distance, max_distance
+
+WORDS = ["engine", "semantic", "search", "payment", "gateway", "kubernetes", "database", "graphql", "proxy", "auth"]
+
+
+def vocabulary():
+    vocab = FuzzyVocabulary(synonyms=())
+    vocab.add(["api", "machine-learning"], ["Semantic Search Engine", "Payment Gateway", "Kubernetes Proxy"])
+    return vocab
+
+
+@pytest.mark.parametrize("typo, expected", [
+    ("enigne", "engine"),  # transposição: destrói 4 trigramas
+    ("engnie", "engine"),
+    ("semantc", "semantic"),  # remoção
+    ("paymnet", "payment"),
+    ("kuberentes", "kubernetes"),
+    ("gatewya", "gateway"),
+])
+def test_transpositions_and_deletions_are_found(typo, expected):
+    assert expected in [term for _, term in vocabulary().names.similar(typo)]
+
+
+def test_expand_query_corrects_every_word():
+    assert "semantic engine" in vocabulary().expand_query("semantc enigne")
+
+
+def test_similar_matches_a_brute_force_scan():
+    rng = random.Random(3)
+    index = TermIndex()
+    index.add(WORDS)
+    for _ in range(500):
+        word = list(rng.choice(WORDS))
+        for _ in range(rng.randint(1, 2)):
+            pos = rng.randrange(len(word) - 1)
+            op = rng.choice(("swap", "drop", "replace", "insert"))
+            if op == "swap":
+                word[pos], word[pos + 1] = word[pos + 1], word[pos]
+            elif op == "drop":
+                del word[pos]
+            elif op == "replace":
+                word[pos] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+            else:
+                word.insert(pos, rng.choice("abcdefghijklmnopqrstuvwxyz"))
+        typo = "".join(word)
+        limit = max_distance(typo)
+        expected = sorted((edit_distance(typo, term, limit), term) for term in WORDS
+                          if edit_distance(typo, term, limit) <= limit)
+        assert index.similar(typo) == expected, typo
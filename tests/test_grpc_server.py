@@ -0,0 +1,95 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("grpc")
+
+from services.catalog import Catalog, CatalogRow
+from services.grpc_server import STREAM_CHUNK_SIZE, ProtoAiRegistryServicer
+from services.proto_loader import load_generated
+
+registry_pb2 = load_generated("protoai.registry.v1.registry_pb2")
+readme_pb2 = load_generated("protoai.v1.readme_pb2")
+pytestmark = pytest.mark.skipif(registry_pb2 is None or readme_pb2 is None,
+                                reason="stubs não gerados (scripts/generate_proto.py)")
+
+
+def servicer(count):
+    rows = [CatalogRow(f"api-{i}", "pagamentos" if i % 2 else "mapas", "", ("api",), "acme", "MIT", "1")
+            for i in range(count)]
+    return ProtoAiRegistryServicer(SimpleNamespace(snapshot=Catalog(rows)), None, registry_pb2, readme_pb2)
+
+
+def record_threads(service):
+    threads = []
+    search_chunk = service._search_chunk
+    service._search_chunk = lambda *args: threads.append(threading.get_ident()) or search_chunk(*args)
+    return threads
+
+
+def test_search_runs_off_the_event_loop():
+    service = servicer(10)
+    threads = record_threads(service)
+    request = registry_pb2.SearchServicesRequest(tags=["api"], description_pattern="Pagamentos")
+    response = asyncio.run(service.SearchServices(request, None))
+    assert [info.project_info.name for info in response.matching_services] == [f"api-{i}" for i in (1, 3, 5, 7, 9)]
+    assert threads and threading.get_ident() not in threads
+
+
+@pytest.mark.parametrize("count, sizes", [
+    (2 * (2 * STREAM_CHUNK_SIZE + 44), [STREAM_CHUNK_SIZE, STREAM_CHUNK_SIZE, 44]),
+    (2 * 2 * STREAM_CHUNK_SIZE, [STREAM_CHUNK_SIZE, STREAM_CHUNK_SIZE]),
+    (0, []),
+])
+def test_stream_sends_full_chunks_from_a_thread(count, sizes):
+    service = servicer(count)
+    threads = record_threads(service)
+    request = registry_pb2.SearchServicesRequest(description_pattern="pagamentos")
+
+    async def main():
+        return [len(chunk.matching_services) async for chunk in service.StreamSearchServices(request, None)]
+
+    assert asyncio.run(main()) == sizes
+    assert threading.get_ident() not in threads
+
+
+class AbortContext:
+    def __init__(self, metadata=()):
+        self.metadata = metadata
+
+    def invocation_metadata(self):
+        return self.metadata
+
+    async def abort(self, code, details):
+        raise RuntimeError(code)
+
+
+@pytest.mark.parametrize("token, metadata, code", [
+    ("", (("authorization", "Bearer segredo"),), "PERMISSION_DENIED"),
+    ("segredo", (), "UNAUTHENTICATED"),
+    ("segredo", (("authorization", "Bearer errado"),), "UNAUTHENTICATED"),
+])
+def test_write_rpcs_require_the_admin_token(token, metadata, code):
+    import grpc
+    removed = []
+    store = SimpleNamespace(unregister=lambda service_id: removed.append(service_id))
+    service = ProtoAiRegistryServicer(None, store, registry_pb2, readme_pb2, admin_token=token)
+    for method, request in ((service.RegisterService, registry_pb2.RegisterServiceRequest()),
+                            (service.UnregisterService, registry_pb2.UnregisterServiceRequest(service_id="x"))):
+        with pytest.raises(RuntimeError) as error:
+            asyncio.run(method(request, AbortContext(metadata)))
+        assert error.value.args[0] == getattr(grpc.StatusCode, code)
+    assert removed == []
+
+
+def test_unregister_with_the_admin_token():
+    async def unregister(service_id):
+        return service_id == "x"
+
+    service = ProtoAiRegistryServicer(None, SimpleNamespace(unregister=unregister), registry_pb2, readme_pb2,
+                                      admin_token="segredo")
+    response = asyncio.run(service.UnregisterService(registry_pb2.UnregisterServiceRequest(service_id="x"),
+                                                     AbortContext((("authorization", "Bearer segredo"),))))
+    assert response.success
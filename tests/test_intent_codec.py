@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from models.intent import CompactIntentResponse, Intent, IntentResponse, IntentType
+from services import intent_codec
+from services.intent_codec import IntentDecodeError
+
+BATCH = [
+    {"type": "discovery", "tags": ["api", "rest"], "context": {"fuzzy": True}},
+    {"type": "execution", "service_name": "pagamentos", "operation": "cobrar",
+     "parameters": {"valor": 10, "taxa": 0.5, "itens": [1, "dois", None, {"ok": True}]},
+     "context": {"deadline_ms": 500}},
+    {"type": "registration", "parameters": {"manifest": {"project_info": {"name": "x"}}}, "extra": "ignorado"},
+]
+FIELDS = ("type", "service_name", "operation", "parameters", "context", "tags")
+
+
+def model_json(model) -> str:
+    return model.model_dump_json() if hasattr(model, "model_dump_json") else model.json()
+
+
+def as_tuple(intent):
+    return tuple(getattr(intent, field) for field in FIELDS)
+
+
+def test_json_decode_matches_the_pydantic_model():
+    decoded = intent_codec.decode_json(json.dumps(BATCH).encode())
+    assert [as_tuple(intent) for intent in decoded] == [as_tuple(Intent(**item)) for item in BATCH]
+    assert decoded[0].type is IntentType.DISCOVERY
+    assert as_tuple(decoded[1].to_model()) == as_tuple(decoded[1])
+
+
+@pytest.mark.parametrize("body, loc", [
+    (b"{", ()),
+    (b'{"type": "discovery"}', ()),
+    (b"[1]", (0,)),
+    (b'[{"type": "outro"}]', (0, "type")),
+    (b'[{"type": "discovery"}, {"type": "discovery", "tags": ["a", 1]}]', (1, "tags")),
+    (b'[{"type": "execution", "service_name": 3}]', (0, "service_name")),
+    (b'[{"type": "execution", "parameters": []}]', (0, "parameters")),
+])
+def test_invalid_json_is_rejected_with_the_field_location(body, loc):
+    with pytest.raises(IntentDecodeError) as error:
+        intent_codec.decode_json(body)
+    assert error.value.loc == loc
+    assert error.value.detail()[0]["loc"] == ["body", *loc]
+
+
+def test_json_encode_matches_the_pydantic_response():
+    responses = [
+        CompactIntentResponse(True, "ok", json.dumps({"services": [{"name": "á"}]}).encode()),
+        CompactIntentResponse(False, "falhou", error="Invalid intent"),
+    ]
+    # A mesma resposta repetida no lote (descobertas compartilhadas) sai igual
+    responses.append(responses[0])
+    expected = [IntentResponse(success=r.success, message=r.message, data=r.data, error=r.error) for r in responses]
+    assert json.loads(intent_codec.encode_json(responses)) == [json.loads(model_json(model)) for model in expected]
+
+
+def test_protobuf_round_trip():
+    module = intent_codec.proto_module()
+    if module is None:
+        pytest.skip("intent.proto não gerado (scripts/generate_proto.py)")
+    batch = module.IntentBatch()
+    for item in BATCH:
+        message = batch.intents.add(type=module.IntentType.Value(f"INTENT_TYPE_{item['type'].upper()}"))
+        for field in ("service_name", "operation"):
+            if field in item:
+                setattr(message, field, item[field])
+        for field in ("parameters", "context"):
+            if field in item:
+                getattr(message, field).update(item[field])
+        message.tags.extend(item.get("tags", []))
+
+    decoded = intent_codec.decode_proto(batch.SerializeToString(), module)
+    assert [as_tuple(intent) for intent in decoded] == [as_tuple(Intent(**item)) for item in BATCH]
+    # Struct só tem double: inteiros voltam como int, frações como float
+    assert type(decoded[1].parameters["valor"]) is int and decoded[1].parameters["taxa"] == 0.5
+
+    responses = [CompactIntentResponse(True, "ok", b'{"services":[]}'), CompactIntentResponse(False, "x", error="e")]
+    out = module.IntentResponseBatch.FromString(intent_codec.encode_proto(responses, module))
+    assert [(r.success, r.message, r.data_json if r.HasField("data_json") else None,
+             r.error if r.HasField("error") else None) for r in out.responses] == \
+        [(True, "ok", b'{"services":[]}', None), (False, "x", None, "e")]
+
+    empty = module.IntentBatch()
+    empty.intents.add()
+    with pytest.raises(IntentDecodeError):
+        intent_codec.decode_proto(empty.SerializeToString(), module)
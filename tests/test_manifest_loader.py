@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+from services.manifest_loader import BulkManifestLoader, Checkpoint, SQLiteManifestTable, content_hash
+from services.manifests import ManifestValidationEngine
+
+SCHEMA = {"type": "object", "required": ["name"], "properties": {"name": {"type": "string"}}}
+
+
+class FlakyTable(SQLiteManifestTable):
+    """Tabela cujo upsert falha para lotes com `poison` enquanto `failures` > 0"""
+
+    def __init__(self, path, poison=None, failures=0):
+        super().__init__(path)
+        self.poison = poison
+        self.failures = failures
+        self.calls = []
+
+    async def upsert(self, rows):
+        self.calls.append([row["manifest"]["name"] for row in rows])
+        if self.failures and any(row["manifest"]["name"] == self.poison for row in rows):
+            self.failures -= 1
+            raise RuntimeError("tabela indisponível")
+        return await super().upsert(rows)
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM mcp_manifests").fetchone()[0]
+
+
+def sources(count, invalid=()):
+    items = [(f"m{i}.json", json.dumps({"name": f"m{i}"}).encode()) for i in range(count)]
+    return items + [(f"ruim{i}.json", json.dumps({"nome": i}).encode()) for i in invalid]
+
+
+def load(table, items, checkpoint, retries=0):
+    async def main():
+        with ManifestValidationEngine(SCHEMA) as engine:
+            loader = BulkManifestLoader(table, engine, batch_size=2, concurrency=2, retries=retries,
+                                        checkpoint=checkpoint)
+            return await loader.load(items)
+    return asyncio.run(main())
+
+
+def test_second_run_inserts_only_the_failed_batch(tmp_path):
+    checkpoint_path = str(tmp_path / "checkpoint")
+    table = FlakyTable(str(tmp_path / "manifests.db"), poison="m3", failures=1)
+
+    first = load(table, sources(5, invalid=[1]), Checkpoint(checkpoint_path))
+    assert (first.inserted, first.unchanged, first.resumed) == (3, 0, 0)
+    assert first.failed == [(1, "tabela indisponível")] and len(first.invalid) == 1
+    assert table.count() == 3
+
+    table.calls.clear()
+    second = load(table, sources(5), Checkpoint(checkpoint_path))
+    # Os lotes confirmados nem são reenviados: só o que falhou vai à tabela
+    assert table.calls == [["m2", "m3"]]
+    assert (second.inserted, second.unchanged, second.resumed, second.failed) == (2, 0, 3, [])
+    assert table.count() == 5
+
+
+def test_rerun_without_checkpoint_is_idempotent(tmp_path):
+    table = FlakyTable(str(tmp_path / "manifests.db"))
+    assert load(table, sources(5), Checkpoint()).inserted == 5
+    again = load(table, sources(5), Checkpoint())
+    assert (again.inserted, again.unchanged, again.resumed) == (0, 5, 0)
+    assert table.count() == 5
+
+
+def test_checkpointed_and_duplicate_manifests_are_skipped(tmp_path):
+    table = FlakyTable(str(tmp_path / "manifests.db"))
+    checkpoint = Checkpoint()
+    checkpoint.add([content_hash({"name": "m0"})])
+    report = load(table, sources(3) + sources(3), checkpoint)
+    assert [name for call in table.calls for name in call] == ["m1", "m2"]
+    assert (report.inserted, report.resumed) == (2, 2)
+
+
+def test_failed_batch_is_retried(tmp_path):
+    checkpoint_path = str(tmp_path / "checkpoint")
+    table = FlakyTable(str(tmp_path / "manifests.db"), poison="m0", failures=1)
+    report = load(table, sources(2), Checkpoint(checkpoint_path), retries=1)
+    assert table.calls == [["m0", "m1"], ["m0", "m1"]]
+    assert (report.inserted, report.failed) == (2, [])
+    assert Checkpoint(checkpoint_path).done == {content_hash({"name": "m0"}), content_hash({"name": "m1"})}
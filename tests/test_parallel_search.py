@@ -0,0 +1,58 @@
+import asyncio
+import csv
+from array import array
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from services import parallel_search
+from services.columnar import ColumnarCatalog, compile_catalog
+from services.parallel_search import ParallelSearch, StaleShardError, _search_shard
+
+FIELDS = ["name", "description", "url", "tags", "owner", "license", "version"]
+
+
+def compile_rows(tmp_path, words, source_hash):
+    csv_path = tmp_path / "repositories.csv"
+    with open(csv_path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDS)
+        for i, word in enumerate(words):
+            writer.writerow([f"api-{i}", f"serviço {word}", f"https://x/{i}", "api", "acme", "MIT", "1.0.0"])
+    return compile_catalog(str(csv_path), str(tmp_path / "repositories.pcat"), source_hash)
+
+
+@pytest.fixture(autouse=True)
+def clear_shard_cache():
+    parallel_search._catalogs.clear()
+    yield
+    parallel_search._catalogs.clear()
+
+
+def test_shard_refuses_a_recompiled_file(tmp_path):
+    path = compile_rows(tmp_path, ["alfa", "beta", "alfa"], "a" * 64)
+    old = ColumnarCatalog(path)
+    compile_rows(tmp_path, ["beta", "alfa", "beta"], "b" * 64)
+
+    with pytest.raises(StaleShardError):
+        _search_shard(path, old.source_hash, 0, 3, "alfa", None, None, None, None)
+    # O arquivo novo não fica no cache com o hash antigo
+    assert (path, old.source_hash) not in parallel_search._catalogs
+    assert _search_shard(path, "b" * 64, 0, 3, "alfa", None, None, None, None) == array("I", [1]).tobytes()
+
+
+def test_stale_snapshot_falls_back_to_its_own_mapping(tmp_path):
+    path = compile_rows(tmp_path, ["alfa", "beta", "alfa"], "a" * 64)
+    old = ColumnarCatalog(path)
+    compile_rows(tmp_path, ["beta", "alfa", "beta"], "b" * 64)
+
+    async def main():
+        search = ParallelSearch(workers=1, shard_rows=1)
+        await search.start()
+        try:
+            return await search.search(old, q="alfa")
+        finally:
+            search.shutdown()
+
+    assert asyncio.run(main()) == [0, 2]
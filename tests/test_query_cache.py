@@ -0,0 +1,65 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+from services.query_cache import QueryCache, SQLiteSemanticCache
+
+
+def test_snapshot_swap_keeps_the_shared_backend(tmp_path):
+    path = str(tmp_path / "cache.db")
+    old_worker = QueryCache(backend=SQLiteSemanticCache(path))
+    new_worker = QueryCache(backend=SQLiteSemanticCache(path))
+    old_key = QueryCache.key("snapshot-antigo", q="api")
+    new_key = QueryCache.key("snapshot-novo", q="api")
+    assert old_key != new_key
+
+    old_worker.put(old_key, [1, 2, 3])
+    # O worker que já trocou de snapshot não apaga o que o outro ainda serve
+    new_worker.clear()
+    assert old_worker.backend.get(old_key) == [1, 2, 3]
+    assert list(new_worker.get(old_key)) == [1, 2, 3]
+    assert new_worker.get(new_key) is None
+
+
+def test_async_access_runs_the_backend_off_the_loop(tmp_path):
+    cache = QueryCache(backend=SQLiteSemanticCache(str(tmp_path / "cache.db")))
+    threads = []
+    for name in ("get", "set"):
+        method = getattr(cache.backend, name)
+        setattr(cache.backend, name, lambda *args, method=method: threads.append(threading.get_ident()) or method(*args))
+
+    async def main():
+        key = QueryCache.key("snapshot", q="api")
+        await cache.put_async(key, [4, 5])
+        cache.clear()
+        return list(await cache.get_async(key)), list(await cache.get_async(key))
+
+    assert asyncio.run(main()) == ([4, 5], [4, 5])
+    # Um set e um get: o segundo get é atendido pelo cache local
+    assert len(threads) == 2 and threading.get_ident() not in threads
+
+
+def test_expired_rows_are_pruned(tmp_path):
+    backend = SQLiteSemanticCache(str(tmp_path / "cache.db"))
+    backend.PRUNE_EVERY = 3
+    backend.set("vencida", [1], datetime.now() - timedelta(seconds=1))
+    backend.set("valida", [2], datetime.now() + timedelta(hours=1))
+    assert backend.conn.execute("SELECT COUNT(*) FROM semantic_cache").fetchone()[0] == 2
+    backend.set("outra", [3], datetime.now() + timedelta(hours=1))
+    assert sorted(row[0] for row in backend.conn.execute("SELECT query_hash FROM semantic_cache")) == ["outra", "valida"]
+
+
+def test_metrics_batch_is_written_off_the_loop(tmp_path):
+    cache = QueryCache(backend=SQLiteSemanticCache(str(tmp_path / "cache.db")))
+    cache.METRICS_BATCH = 3
+    threads = []
+    record_metrics = cache.backend.record_metrics
+    cache.backend.record_metrics = lambda batch: threads.append(threading.get_ident()) or record_metrics(batch)
+
+    async def main():
+        for i in range(3):
+            cache.record(f"k{i}", i % 2 == 0, 1.0)
+
+    asyncio.run(main())
+    assert threads and threading.get_ident() not in threads
+    assert cache.backend.conn.execute("SELECT COUNT(*) FROM cache_metrics").fetchone()[0] == 3
@@ -0,0 +1,115 @@
+import asyncio
+import threading
+
+import pytest
+
+from services.rate_limit import (
+    ANY_TARGET, IP, SERVICE, RateLimiter, RateLimitMiddleware, RateLimitRule, SQLiteRateLimitBackend
+)
+
+
+async def app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def status_of(middleware, ip, path="/search"):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "path": path, "client": (ip, 50000), "headers": []}
+    await middleware(scope, None, send)
+    start = sent[0]
+    return start["status"], dict(start["headers"])
+
+
+def test_middleware_blocks_each_client_after_its_burst():
+    limiter = RateLimiter()
+    limiter.update(RateLimitRule("ip", IP, ANY_TARGET, 3, 60.0))
+    middleware = RateLimitMiddleware(app, limiter)
+
+    async def main():
+        first = [(await status_of(middleware, "10.0.0.1"))[0] for _ in range(4)]
+        blocked = await status_of(middleware, "10.0.0.1")
+        other = (await status_of(middleware, "10.0.0.2"))[0]
+        return first, blocked, other
+
+    first, (status, headers), other = asyncio.run(main())
+    assert first == [200, 200, 200, 429]
+    assert status == 429 and int(headers[b"retry-after"]) == 20
+    assert other == 200
+
+
+def test_shared_backend_enforces_one_limit_across_workers(tmp_path):
+    path = str(tmp_path / "rate_limit.db")
+    rule = RateLimitRule("search", SERVICE, "/search", 50, 3600.0)
+    RateLimiter(backend=SQLiteRateLimitBackend(path)).update(rule)
+    workers = [RateLimiter(backend=SQLiteRateLimitBackend(path), lease_fraction=0.1) for _ in range(2)]
+    loop_thread = threading.get_ident()
+    acquired_on = []
+    for worker in workers:
+        acquire = worker.backend.acquire
+        worker.backend.acquire = lambda *args, acquire=acquire: acquired_on.append(threading.get_ident()) or acquire(*args)
+
+    async def burst(worker):
+        middleware = RateLimitMiddleware(app, worker)
+        # Requisições concorrentes: o lote retirado do backend é compartilhado, não multiplicado
+        return await asyncio.gather(*(status_of(middleware, f"10.0.0.{i}") for i in range(40)))
+
+    async def main():
+        results = []
+        for worker in workers * 2:
+            results += [status for status, _ in await burst(worker)]
+        return results
+
+    statuses = asyncio.run(main())
+    assert statuses.count(200) == 50
+    assert acquired_on and loop_thread not in acquired_on
+
+
+def test_check_async_matches_check():
+    limiter = RateLimiter()
+    limiter.update(RateLimitRule("user", IP, "10.0.0.1", 2, 60.0))
+
+    async def main():
+        return await asyncio.gather(*(limiter.check_async(IP, "10.0.0.1") for _ in range(3)))
+
+    decisions = asyncio.run(main())
+    assert [decision.allowed for decision in decisions] == [True, True, False]
+    assert asyncio.run(limiter.check_async(IP, "10.0.0.9")).remaining_requests == -1
+
+
+@pytest.fixture
+def main(monkeypatch):
+    pytest.importorskip("fastapi.testclient")
+    import api.main as main
+    monkeypatch.setattr(main, "RATE_LIMIT_ADMIN_TOKEN", "segredo")
+    monkeypatch.setattr(main.rate_limiter, "configs", {})
+    monkeypatch.setattr(main.rate_limiter, "_shards", [{} for _ in main.rate_limiter._shards])
+    return main
+
+
+def put_config(main, token=None, **config):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    body = {"config": {"id": "config", "type": SERVICE, "target_id": "/ratelimit/config",
+                       "requests_per_unit": 2, "time_unit": "60s", **config}}
+    from fastapi.testclient import TestClient
+    return TestClient(main.app).put("/ratelimit/config", json=body, headers=headers)
+
+
+def test_config_endpoint_requires_the_admin_token(main, monkeypatch):
+    assert put_config(main).status_code == 401
+    assert put_config(main, "errado").status_code == 401
+    assert main.rate_limiter.configs == {}
+    monkeypatch.setattr(main, "RATE_LIMIT_ADMIN_TOKEN", "")
+    assert put_config(main, "segredo").status_code == 403
+
+
+def test_config_endpoint_is_rate_limited(main):
+    # O primeiro PUT limita o próprio endpoint a 2 requisições; a terceira depois dele é barrada
+    assert put_config(main, "segredo").status_code == 200
+    statuses = [put_config(main, "segredo", id=f"user-{i}", type=IP, target_id=f"10.0.0.{i}").status_code
+                for i in range(3)]
+    assert statuses == [200, 200, 429]
@@ -0,0 +1,37 @@
+import pytest
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    pytest.importorskip("fastapi.testclient")
+    from fastapi.testclient import TestClient
+    import api.main as main
+    monkeypatch.setattr(main, "REGISTRY_ADMIN_TOKEN", "segredo")
+    calls = []
+
+    async def register(manifest):
+        calls.append(manifest)
+        raise ValueError("não deveria chegar aqui")
+
+    async def unregister(service_id):
+        calls.append(service_id)
+        return True
+
+    monkeypatch.setattr(main.registry_store, "register", register)
+    monkeypatch.setattr(main.registry_store, "unregister", unregister)
+    return main, TestClient(main.app), calls
+
+
+def test_registry_writes_require_the_admin_token(client, monkeypatch):
+    main, http, calls = client
+    body = {"service_manifest": {"project_info": {"name": "api"}}}
+    wrong = {"Authorization": "Bearer errado"}
+    assert http.post("/registry/services", json=body).status_code == 401
+    assert http.post("/registry/services", json=body, headers=wrong).status_code == 401
+    assert http.delete("/registry/services/x", headers=wrong).status_code == 401
+    assert calls == []
+
+    assert http.delete("/registry/services/x", headers={"Authorization": "Bearer segredo"}).json() == {"success": True}
+    assert calls == ["x"]
+    monkeypatch.setattr(main, "REGISTRY_ADMIN_TOKEN", "")
+    assert http.delete("/registry/services/x", headers={"Authorization": "Bearer segredo"}).status_code == 403
@@ -0,0 +1,26 @@
+import asyncio
+
+from services.registry import DISCOVERY_EVENTS, RegistryService
+
+
+def test_discovery_counters_stay_bounded():
+    registry = RegistryService(discovery_cache_size=4)
+
+    async def search(key):
+        return [{"name": ",".join(key[0])}]
+
+    registry._search = search
+    misses = DISCOVERY_EVENTS.labels("miss").value
+    hits = DISCOVERY_EVENTS.labels("hit").value
+
+    async def main():
+        for i in range(50):
+            await registry.discover_services([f"tag-{i}"])
+        await registry.discover_services(["tag-49"])
+
+    asyncio.run(main())
+    stats = registry.discovery_stats()
+    assert len(stats) == 4
+    assert stats["tag-49"] == {"hit": 1, "stale": 0, "miss": 1, "coalesced": 0}
+    assert DISCOVERY_EVENTS.labels("miss").value - misses == 50
+    assert DISCOVERY_EVENTS.labels("hit").value - hits == 1
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import os
+import threading
+
+import pytest
+
+from services.registry_store import RegistryStore, validate_manifest
+
+
+def manifest(name, **info):
+    return {"project_info": {"name": name, "tags": ["api"], "owner": "acme", **info}}
+
+
+def run(store_dir, coroutine_factory):
+    async def main():
+        store = RegistryStore(store_dir)
+        store.open()
+        try:
+            return await coroutine_factory(store)
+        finally:
+            store.close()
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("bad", [
+    None,
+    {},
+    {"project_info": {"name": ""}},
+    manifest("x", tags=5),
+    manifest("x", tags=["ok", 1]),
+    manifest("x", owner=None),
+    manifest("x", license=["MIT"]),
+])
+def test_invalid_manifest_never_reaches_the_log(tmp_path, bad):
+    with pytest.raises(ValueError):
+        validate_manifest(bad)
+
+    async def register(store):
+        with pytest.raises(ValueError):
+            await store.register(bad)
+
+    run(str(tmp_path), register)
+    log = tmp_path / "registry.log"
+    assert not log.exists() or log.read_bytes() == b""
+
+
+def test_replay_restores_registrations_after_restart(tmp_path):
+    async def register(store):
+        first = await store.register(manifest("primeiro"))
+        await store.register(manifest("segundo"))
+        await store.unregister(first.service_id)
+        return first.service_id
+
+    removed = run(str(tmp_path), register)
+    # Simula uma queda antes do commit no SQLite: o log é a fonte da verdade
+    for name in ("registry.db", "registry.db-wal", "registry.db-shm"):
+        if os.path.exists(tmp_path / name):
+            os.remove(tmp_path / name)
+    names = run(str(tmp_path), lambda store: _names(store))
+    assert names == ["segundo"]
+    assert run(str(tmp_path), lambda store: _get(store, removed)) is None
+
+
+def test_replay_quarantines_entries_that_cannot_be_applied(tmp_path):
+    run(str(tmp_path), lambda store: store.register(manifest("bom")))
+    with open(tmp_path / "registry.log", "ab") as log:
+        log.write(json.dumps({
+            "op": "register", "seq": 99, "service_id": "ruim",
+            "manifest": {"project_info": {"name": "ruim", "tags": 5}},
+            "registered_at": "2026-01-01T00:00:00", "updated_at": "2026-01-01T00:00:00"
+        }).encode() + b"\n")
+
+    assert run(str(tmp_path), _names) == ["bom"]
+    quarantined = (tmp_path / "registry.quarantine").read_text().splitlines()
+    assert [json.loads(line)["service_id"] for line in quarantined] == ["ruim"]
+    # A entrada ruim não é reaplicada (nem quarentenada de novo) na próxima abertura
+    assert run(str(tmp_path), _names) == ["bom"]
+    assert len((tmp_path / "registry.quarantine").read_text().splitlines()) == 1
+
+
+async def _names(store):
+    return [record.manifest["project_info"]["name"] for record in store.search()]
+
+
+async def _get(store, service_id):
+    return store.get(service_id)
+
+
+def test_reads_during_concurrent_registrations(tmp_path):
+    errors = []
+    done = threading.Event()
+
+    def reader(store):
+        while not done.is_set():
+            try:
+                store.search()
+                store.search(tags=["api"], owner="acme")
+                store.list(page_size=50)
+            except Exception as e:
+                errors.append(e)
+
+    async def register(store):
+        thread = threading.Thread(target=reader, args=(store,))
+        thread.start()
+        try:
+            for round in range(20):
+                await asyncio.gather(*(store.register(manifest(f"svc-{round}-{i}")) for i in range(100)))
+        finally:
+            done.set()
+            thread.join()
+        return len(store)
+
+    assert run(str(tmp_path), register) == 2000
+    assert errors == []
+
+
+def test_two_stores_share_one_directory(tmp_path):
+    async def main():
+        first, second = RegistryStore(str(tmp_path), sync_interval=0.01), RegistryStore(str(tmp_path), sync_interval=0.01)
+        first.open()
+        second.open()
+        seen = []
+        second.listeners.append(lambda added, removed: seen.extend(record.manifest["project_info"]["name"] for record in added))
+        try:
+            a = await first.register(manifest("do-primeiro"))
+            b = await second.register(manifest("do-segundo"))
+            await asyncio.sleep(0.1)
+            return a.seq, b.seq, [sorted(r.manifest["project_info"]["name"] for r in store.list()[0])
+                                  for store in (first, second)], seen
+        finally:
+            first.close()
+            second.close()
+
+    a, b, names, seen = asyncio.run(main())
+    # O segundo processo numera depois do primeiro, sem colidir no seq
+    assert (a, b) == (1, 2)
+    assert names == [["do-primeiro", "do-segundo"]] * 2
+    assert seen == ["do-primeiro", "do-segundo"]
+
+
+def test_failed_batch_is_removed_from_the_log(tmp_path, monkeypatch):
+    fsync = os.fsync
+    calls = []
+
+    def failing_fsync(fd):
+        calls.append(fd)
+        if len(calls) == 1:
+            raise OSError("disco cheio")
+        fsync(fd)
+
+    async def main(store):
+        monkeypatch.setattr(os, "fsync", failing_fsync)
+        with pytest.raises(OSError):
+            await store.register(manifest("perdido"))
+        monkeypatch.setattr(os, "fsync", fsync)
+        record = await store.register(manifest("gravado"))
+        return record.seq, await _names(store)
+
+    seq, names = run(str(tmp_path), main)
+    assert seq == 1
+    assert names == ["gravado"]
+    lines = [json.loads(line) for line in (tmp_path / "registry.log").read_bytes().splitlines()]
+    assert [(line["seq"], line["manifest"]["project_info"]["name"]) for line in lines] == [(1, "gravado")]
+    # Nada do lote que falhou volta na recuperação
+    for name in ("registry.db", "registry.db-wal", "registry.db-shm"):
+        if os.path.exists(tmp_path / name):
+            os.remove(tmp_path / name)
+    assert run(str(tmp_path), lambda store: _names(store)) == ["gravado"]
+
+
+def test_listener_failure_does_not_fail_a_committed_write(tmp_path):
+    async def main(store):
+        store.listeners.append(lambda added, removed: 1 / 0)
+        record = await store.register(manifest("gravado"))
+        return store.get(record.service_id) is not None
+
+    assert run(str(tmp_path), main)
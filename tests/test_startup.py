@@ -0,0 +1,23 @@
+import time
+
+from services import startup
+from services.startup import StartupProfile
+
+
+def test_phase_deltas_use_the_fine_grained_clock(monkeypatch):
+    # /proc só avança de 10 em 10 ms: sem perf_counter, as fases curtas dariam 0
+    monkeypatch.setattr(startup, "process_uptime", lambda: 1.0)
+    profile = StartupProfile()
+    for name in ("a", "b", "c"):
+        time.sleep(0.002)
+        profile.mark(name)
+    with profile.phase("d"):
+        time.sleep(0.002)
+    time.sleep(0.002)
+    profile.mark("e")
+
+    phases = dict(profile.phases)
+    assert phases["imports"] == 1.0
+    assert all(0.002 <= phases[name] < 0.5 for name in "abcde")
+    profile.mark_ready()
+    assert 1.01 <= profile.ready < 1.5